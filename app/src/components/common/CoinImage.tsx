@@ -1,23 +1,35 @@
 import { useState } from 'react';
+import { API_BASE_URL } from '../../api/http';
 
 interface CoinImageProps {
   label: string;
   subtitle?: string;
   src?: string;
+  size?: number;
 }
 
-export default function CoinImage({ label, subtitle, src }: CoinImageProps) {
-  const [failed, setFailed] = useState(!src);
+function thumbnailUrl(src: string, size: number) {
+  if (!/^https?:\/\//.test(src)) {
+    return src;
+  }
+  return `${API_BASE_URL}/api/images/resolve?url=${encodeURIComponent(src)}&size=${size}`;
+}
+
+export default function CoinImage({ label, subtitle, src, size = 512 }: CoinImageProps) {
+  // Try the cached thumbnail first, then the original URL, then the placeholder.
+  const [attempt, setAttempt] = useState(src ? 0 : 2);
+  const imageUrl = src ? (attempt === 0 ? thumbnailUrl(src, size) : src) : undefined;
 
   return (
     <div className="group">
       <div className="relative aspect-square overflow-hidden rounded-lg border border-stone-200 bg-stone-100 shadow-inner">
-        {src && !failed ? (
+        {imageUrl && attempt < 2 ? (
           <img
-            src={src}
+            src={imageUrl}
             alt={label}
+            loading="lazy"
             className="h-full w-full object-cover transition duration-500 group-hover:scale-[1.02]"
-            onError={() => setFailed(true)}
+            onError={() => setAttempt((current) => (current === 0 && imageUrl !== src ? 1 : 2))}
           />
         ) : (
           <div className="flex h-full w-full flex-col items-center justify-center bg-gradient-to-br from-parchment via-white to-stone-100 text-center">
@@ -1,11 +1,11 @@
 from typing import Generator, Optional
 
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.db.session import session_scope
 from app.models import User
-from app.services.auth import get_user_by_token
+from app.services.auth import get_user_by_ticket, get_user_by_token, is_admin
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -24,3 +24,32 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired session")
     return user
 
+
+def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    if not is_admin(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrator access required")
+    return user
+
+
+EVENTS_TICKET_PURPOSE = "events"
+
+
+def get_stream_user(
+    x_session_token: Optional[str] = Header(None, alias="X-Session-Token"),
+    ticket: Optional[str] = Query(None)
+) -> User:
+    """Session check for long-lived streams: browsers' EventSource cannot send headers, so a short-lived
+    ``?ticket=`` from ``POST /api/events/ticket`` also works. The session token itself is never accepted in the URL.
+
+    The session is closed before the stream starts instead of being held open for the connection's lifetime.
+    """
+    if not x_session_token and not ticket:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing session token or stream ticket")
+    with session_scope() as db:
+        if x_session_token:
+            user = get_user_by_token(db, x_session_token)
+        else:
+            user = get_user_by_ticket(db, ticket, EVENTS_TICKET_PURPOSE)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired session")
+    return user
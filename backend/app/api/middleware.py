@@ -0,0 +1,76 @@
+import time
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.services.auth import get_user_by_token, is_admin
+from app.services.metrics import (
+    REQUEST_LATENCY,
+    REQUEST_SQL_QUERIES,
+    REQUEST_SQL_SECONDS,
+    QueryStats,
+    current_query_stats
+)
+from app.services.profiling import StackSampler, new_profile_path, write_folded
+
+
+async def record_request_metrics(request: Request, call_next):
+    if not get_settings().metrics_enabled:
+        return await call_next(request)
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        current_query_stats.reset(token)
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=route_path, status=str(status_code))
+        REQUEST_SQL_QUERIES.observe(stats.count, method=request.method, route=route_path)
+        REQUEST_SQL_SECONDS.observe(stats.seconds, method=request.method, route=route_path)
+
+
+def _can_profile(token: str | None) -> bool:
+    if not token:
+        return False
+    with session_scope() as session:
+        user = get_user_by_token(session, token)
+        return bool(user and is_admin(user))
+
+
+async def profile_request(request: Request, call_next):
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile") or ""
+    if not get_settings().profiling_enabled or flag.lower() not in ("1", "true", "yes"):
+        return await call_next(request)
+    if not await run_in_threadpool(_can_profile, request.headers.get("X-Session-Token")):
+        return await call_next(request)
+    sampler = StackSampler()
+    sampler.activate()
+    sampler.start()
+    path = new_profile_path(f"{request.method}{request.url.path}", ".folded")
+    try:
+        response = await call_next(request)
+    except BaseException:
+        sampler.stop()
+        raise
+    response.headers["X-Profile-Id"] = path.name
+    body_iterator = response.body_iterator
+
+    async def sampled_body():
+        # The handler may still be producing a streaming body; keep sampling until the last chunk is sent.
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            samples = sampler.stop()
+            await run_in_threadpool(write_folded, samples, path)
+
+    response.body_iterator = sampled_body()
+    return response
@@ -1,25 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_admin_user, get_db
 from app.services.ingest import fetch_museum_coins, fetch_online_coins, upsert_museum_coins, upsert_online_coins
+from app.services.columnar import COLUMNAR_FORMATS, export_columnar
+from app.services.dates import rebuild_date_index
+from app.services.exports import EXPORT_TABLES
+from app.services.dedup import rebuild_listing_clusters
+from app.services.events import SYNC_FINISHED, stage_event
+from app.services.facets import rebuild_facets
+from app.services.images import (
+    build_missing_descriptors,
+    fetch_pending_images,
+    register_existing_images,
+    schedule_image_fetch
+)
+from app.services.inscriptions import rebuild_legend_index
 from app.services.matcher import generate_matches
+from app.services.profiling import list_profiles, resolve_profile
+from app.services.references import rebuild_reference_index
+from app.services.stats import get_dashboard_stats, rebuild_stats
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 
 @router.post("/sync")
-def sync_sources(db: Session = Depends(get_db), _: object = Depends(get_current_user)):
+def sync_sources(background_tasks: BackgroundTasks, db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
     museum_data = fetch_museum_coins()
     online_data = fetch_online_coins()
     museum_count = upsert_museum_coins(db, museum_data)
     online_count = upsert_online_coins(db, online_data)
+    stage_event(db, SYNC_FINISHED, {"museumUpdated": museum_count, "onlineUpdated": online_count})
+    schedule_image_fetch(background_tasks)
     return {"museum_updated": museum_count, "online_updated": online_count}
 
 
 @router.post("/match")
-def run_matching(db: Session = Depends(get_db), _: object = Depends(get_current_user)):
+def run_matching(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
     updated = generate_matches(db)
     return {"matches_updated": updated}
 
+
+
+@router.post("/stats/rebuild")
+def rebuild_dashboard_stats(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    rebuild_stats(db)
+    return get_dashboard_stats(db)
+
+
+@router.post("/references/rebuild")
+def rebuild_references(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"references_indexed": rebuild_reference_index(db)}
+
+
+@router.post("/legends/rebuild")
+def rebuild_legends(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"trigrams_indexed": rebuild_legend_index(db)}
+
+
+@router.post("/dates/rebuild")
+def rebuild_dates(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"dates_parsed": rebuild_date_index(db)}
+
+
+@router.post("/facets/rebuild")
+def rebuild_facet_counts(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"facet_values": rebuild_facets(db)}
+
+
+@router.post("/clusters/rebuild")
+def rebuild_clusters(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"clusters": rebuild_listing_clusters(db)}
+
+
+@router.post("/images/register")
+def register_images(db: Session = Depends(get_db), _: object = Depends(get_admin_user)):
+    return {"registered": register_existing_images(db)}
+
+
+@router.post("/images/fetch")
+def fetch_images(limit: int | None = None, retry_failed: bool = False, _: object = Depends(get_admin_user)):
+    return fetch_pending_images(limit=limit, retry_failed=retry_failed)
+
+
+@router.post("/images/descriptors/rebuild")
+def rebuild_image_descriptors(_: object = Depends(get_admin_user)):
+    return {"built": build_missing_descriptors()}
+
+
+@router.post("/exports/{dataset}")
+def write_columnar_export(
+    dataset: str,
+    export_format: str = Query(default="parquet", alias="format"),
+    partition_by: str | None = None,
+    _: object = Depends(get_admin_user)
+):
+    if dataset not in EXPORT_TABLES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown export dataset")
+    if export_format not in COLUMNAR_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported export format")
+    try:
+        return export_columnar(dataset, export_format, partition_by)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+@router.get("/profiles")
+def get_profiles(_: object = Depends(get_admin_user)):
+    return {"items": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str, _: object = Depends(get_admin_user)):
+    path = resolve_profile(name)
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    media_type = "application/octet-stream" if path.suffix == ".pstats" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.name)
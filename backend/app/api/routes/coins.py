@@ -1,21 +1,39 @@
 import json
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.config import get_settings
 from app.models import MuseumCoin, OnlineCoin
 from app.services.coins import (
+    get_coins_by_ids,
     get_museum_coin,
     list_museum_coins,
     upsert_museum_coin,
     upsert_online_coin
 )
+from app.services.facets import facet_condition
+from app.services.images import schedule_image_fetch
+from app.services.matcher import match_listings
+from app.services.measurements import tolerance_condition
 
 
 router = APIRouter(prefix="/api", tags=["coins"])
 
+COIN_FIELDS = (
+    "coin_id", "mint", "authority", "date_range", "denomination", "metal", "weight", "diameter", "die_axis",
+    "obverse_description", "reverse_description", "obverse_inscription", "reverse_inscription", "monograms",
+    "reference_list", "catalog_number", "source_database", "provenance_text", "previous_owners", "auction_history",
+    "estimate_value", "sale_price", "obverse_image_url", "reverse_image_url", "lot_description_raw",
+    "lot_description_EN", "created_at", "updated_at", "source_type",
+)
+ONLINE_COIN_FIELDS = (
+    "id", "museumCoinId", "similarityScore", "listingReference", "saleDate", "estimate_value", "sale_price",
+    "listing_url", "metadata", "fetchedAt", "sourceName", "clusterId", "mint", "authority", "denomination", "metal",
+)
+
 
 def serialize_coin(coin: MuseumCoin) -> dict:
     data = {
@@ -96,6 +114,7 @@ def serialize_online_coin(coin: OnlineCoin) -> dict:
         "metadata": metadata,
         "fetchedAt": coin.fetched_at.isoformat(),
         "sourceName": coin.source_name,
+        "clusterId": coin.cluster_id,
         "mint": coin.mint,
         "authority": coin.authority,
         "denomination": coin.denomination,
@@ -103,20 +122,88 @@ def serialize_online_coin(coin: OnlineCoin) -> dict:
     }
 
 
+def _batch_ids(ids: list[str], already: int = 0) -> list[str]:
+    """Requested ids in order without duplicates; each ``ids`` value may also be a comma-separated list."""
+    keys = list(dict.fromkeys(part.strip() for value in ids for part in value.split(",") if part.strip()))
+    limit = get_settings().batch_lookup_max_ids
+    if already + len(keys) > limit:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {limit} ids per request")
+    return keys
+
+
+def _batch_fields(fields: Optional[str], allowed: tuple[str, ...]) -> list[str] | None:
+    if not fields:
+        return None
+    selected = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return selected
+
+
+def _batch_lookup(db: Session, model, ids: list[str], serializer, fields: list[str] | None) -> dict:
+    coins = get_coins_by_ids(db, model, ids)
+    items = {}
+    for key in ids:
+        if key in coins:
+            data = serializer(coins[key])
+            items[key] = data if fields is None else {name: data[name] for name in fields}
+    return {"items": items, "missing": [key for key in ids if key not in coins]}
+
+
+@router.get("/coins/batch")
+def batch_coins(
+    museum_ids: list[str] = Query(default=[]),
+    online_ids: list[str] = Query(default=[]),
+    museum_fields: Optional[str] = Query(default=None),
+    online_fields: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    # Museum coins and listings together, so a comparison view needs one round-trip.
+    museum_keys = _batch_ids(museum_ids)
+    online_keys = _batch_ids(online_ids, len(museum_keys))
+    museum = _batch_lookup(db, MuseumCoin, museum_keys, serialize_coin, _batch_fields(museum_fields, COIN_FIELDS))
+    online = _batch_lookup(
+        db, OnlineCoin, online_keys, serialize_online_coin, _batch_fields(online_fields, ONLINE_COIN_FIELDS)
+    )
+    return {
+        "museumCoins": museum["items"],
+        "onlineCoins": online["items"],
+        "missing": {"museumCoins": museum["missing"], "onlineCoins": online["missing"]},
+    }
+
+
 @router.get("/museum-coins")
 def list_coins(
     mint: Optional[str] = Query(default=None),
     authority: Optional[str] = Query(default=None),
     search: Optional[str] = Query(default=None),
+    facet: list[int] = Query(default=[]),
     limit: int = Query(default=100, le=200),
     offset: int = Query(default=0),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    coins = list_museum_coins(db, mint=mint, authority=authority, search=search, limit=limit, offset=offset)
+    try:
+        coins = list_museum_coins(
+            db, mint=mint, authority=authority, search=search, limit=limit, offset=offset, facet_ids=facet
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     return [serialize_coin(coin) for coin in coins]
 
 
+@router.get("/museum-coins/batch")
+def batch_museum_coins(
+    ids: list[str] = Query(...),
+    fields: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    return _batch_lookup(db, MuseumCoin, _batch_ids(ids), serialize_coin, _batch_fields(fields, COIN_FIELDS))
+
+
 @router.get("/museum-coins/{coin_id}")
 def coin_detail(coin_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     coin = get_museum_coin(db, coin_id)
@@ -125,23 +212,49 @@ def coin_detail(coin_id: str, db: Session = Depends(get_db), current_user=Depend
     return serialize_coin(coin)
 
 
+@router.get("/online-coins/batch")
+def batch_online_coins(
+    ids: list[str] = Query(...),
+    fields: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    return _batch_lookup(
+        db, OnlineCoin, _batch_ids(ids), serialize_online_coin, _batch_fields(fields, ONLINE_COIN_FIELDS)
+    )
+
+
 @router.get("/online-coins")
 def list_online_coins(
     mint: Optional[str] = Query(default=None),
     denomination: Optional[str] = Query(default=None),
     metal: Optional[str] = Query(default=None),
+    weight: Optional[float] = Query(default=None),
+    weight_tolerance: Optional[float] = Query(default=None, ge=0),
+    diameter: Optional[float] = Query(default=None),
+    diameter_tolerance: Optional[float] = Query(default=None, ge=0),
+    facet: list[int] = Query(default=[]),
     limit: int = Query(default=100, le=200),
     offset: int = Query(default=0),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
     query = db.query(OnlineCoin)
+    try:
+        faceted = facet_condition(db, OnlineCoin, facet)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if faceted is not None:
+        query = query.filter(faceted)
     if mint:
         query = query.filter(OnlineCoin.mint.ilike(f'%{mint}%'))
     if denomination:
         query = query.filter(OnlineCoin.denomination.ilike(f'%{denomination}%'))
     if metal:
         query = query.filter(OnlineCoin.metal.ilike(f'%{metal}%'))
+    measured = tolerance_condition(OnlineCoin, weight, diameter, weight_tolerance, diameter_tolerance)
+    if measured is not None:
+        query = query.filter(measured)
     coins = query.order_by(OnlineCoin.fetched_at.desc()).offset(offset).limit(limit).all()
     return [serialize_online_coin(coin) for coin in coins]
 
@@ -149,6 +262,7 @@ def list_online_coins(
 @router.post("/museum-coins")
 def create_museum_coins(
     payload: dict | list[dict],
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
@@ -160,22 +274,29 @@ def create_museum_coins(
             created.append(serialize_coin(coin))
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    schedule_image_fetch(background_tasks)
     return {"items": created, "count": len(created)}
 
 
 @router.post("/online-coins")
 def create_online_coins(
     payload: dict | list[dict],
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
     data = payload if isinstance(payload, list) else [payload]
-    created = []
+    coins = []
     for item in data:
         try:
-            coin = upsert_online_coin(db, item)
-            created.append(serialize_online_coin(coin))
+            coins.append(upsert_online_coin(db, item))
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Cluster assignment happens at flush time.
+    db.flush()
+    if get_settings().match_on_ingest:
+        match_listings(db, coins)
+    created = [serialize_online_coin(coin) for coin in coins]
+    schedule_image_fetch(background_tasks)
     return {"items": created, "count": len(created)}
 
@@ -0,0 +1,39 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import EVENTS_TICKET_PURPOSE, get_current_user, get_stream_user
+from app.services.auth import issue_stream_ticket
+from app.services.events import broker
+
+
+router = APIRouter(prefix="/api", tags=["events"])
+
+
+@router.post("/events/ticket")
+def create_events_ticket(user=Depends(get_current_user)):
+    ticket, expires_at = issue_stream_ticket(user, EVENTS_TICKET_PURPOSE)
+    return {"ticket": ticket, "expiresAt": expires_at.isoformat()}
+
+
+@router.get("/events")
+def stream_events(
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event_id: Optional[int] = Query(None, ge=0),
+    _: object = Depends(get_stream_user)
+):
+    # EventSource resends the last id it saw as a header when it reconnects; the query parameter covers first loads.
+    resume_from = last_event_id
+    if last_event_id_header and last_event_id_header.isdigit():
+        resume_from = int(last_event_id_header)
+    return StreamingResponse(
+        broker.stream(resume_from),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Compressed streams would be buffered by the gzip middleware until enough bytes accumulate.
+            "Content-Encoding": "identity",
+            "X-Accel-Buffering": "no",
+        }
+    )
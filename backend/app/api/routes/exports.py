@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user
+from app.services.exports import EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    export_format: str = Query(default="ndjson", alias="format"),
+    current_user=Depends(get_current_user)
+):
+    if dataset not in EXPORT_TABLES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown export dataset")
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported export format")
+    filename = f"{dataset}.{export_format}"
+    return StreamingResponse(
+        stream_export(dataset, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
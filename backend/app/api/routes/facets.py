@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.services.facets import list_facets
+
+
+router = APIRouter(prefix="/api", tags=["facets"])
+
+
+@router.get("/facets")
+def facets(
+    attribute: Optional[str] = Query(default=None),
+    source: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, le=1000),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    try:
+        return list_facets(db, attribute=attribute, source=source, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
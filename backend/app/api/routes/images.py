@@ -0,0 +1,55 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.config import get_settings
+from app.models import ImageAsset
+from app.services.images import (
+    STORED,
+    THUMBNAIL_MEDIA_TYPE,
+    is_image_hash,
+    original_path,
+    thumbnail_path
+)
+
+
+router = APIRouter(prefix="/api/images", tags=["images"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# Image routes are public so plain <img> tags can use them; content hashes are not guessable.
+@router.get("/resolve")
+def resolve_image(url: str, size: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
+    asset = db.query(ImageAsset).filter(ImageAsset.source_url == url).first()
+    if not asset:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not registered")
+    headers = {"Cache-Control": "public, max-age=300"}
+    if asset.status != STORED:
+        # Not fetched (yet): fall back to the remote copy so the frontend still shows something.
+        return RedirectResponse(asset.source_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
+    target = f"/api/images/{asset.sha256}" + (f"?size={size}" if size else "")
+    return RedirectResponse(target, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
+
+
+@router.get("/{sha256}")
+def get_image(sha256: str, size: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
+    if not is_image_hash(sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    if size is None:
+        path = original_path(sha256)
+        asset = db.query(ImageAsset).filter(ImageAsset.sha256 == sha256).first()
+        media_type = asset.content_type if asset and asset.content_type else "application/octet-stream"
+    else:
+        if size not in get_settings().image_thumbnail_sizes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported thumbnail size")
+        path = thumbnail_path(sha256, size)
+        media_type = THUMBNAIL_MEDIA_TYPE
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    # FileResponse answers Range requests itself; the explicit encoding keeps GZipMiddleware from re-compressing.
+    headers = {"Cache-Control": IMMUTABLE, "Content-Encoding": "identity"}
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.deps import get_current_user
+from app.config import get_settings
+from app.services.images import schedule_image_fetch
+from app.services.imports import IMPORT_MODELS, ImportSummary, import_batch, parse_ndjson_line
+
+
+router = APIRouter(prefix="/api/import", tags=["import"])
+
+
+@router.post("/{dataset}")
+async def import_dataset(
+    dataset: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user=Depends(get_current_user)
+):
+    if dataset not in IMPORT_MODELS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown import dataset")
+
+    batch_size = get_settings().import_batch_size
+    summary = ImportSummary()
+    batch: list[tuple[int, dict]] = []
+    line_number = 0
+    remainder = b""
+
+    async def handle_line(raw: bytes) -> None:
+        nonlocal batch
+        try:
+            payload = parse_ndjson_line(raw)
+        except (UnicodeDecodeError, ValueError) as exc:
+            summary.record_error(line_number, str(exc))
+            return
+        if payload is None:
+            return
+        batch.append((line_number, payload))
+        if len(batch) >= batch_size:
+            await run_in_threadpool(import_batch, dataset, batch, summary)
+            batch = []
+
+    async for chunk in request.stream():
+        remainder += chunk
+        *lines, remainder = remainder.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            await handle_line(raw)
+    if remainder:
+        line_number += 1
+        await handle_line(remainder)
+    if batch:
+        await run_in_threadpool(import_batch, dataset, batch, summary)
+
+    schedule_image_fetch(background_tasks)
+    return summary.as_dict()
@@ -1,13 +1,23 @@
+import asyncio
 import json
-from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from PIL import Image
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
 
 from app.api.deps import get_current_user, get_db
-from app.models import SearchJob
-from app.schemas import SearchJobStatusResponse, TextSearchRequest
-from app.services.search import ensure_candidate_links, run_search
+from app.api.uploads import parse_image_form
+from app.config import get_settings
+from app.models import MuseumCoin, SearchJob
+from app.schemas import ImageSearchForm, SearchJobStatusResponse, TextSearchRequest
+from app.services.descriptors import DESCRIPTOR_IMAGE_SIZE, extract_descriptors
+from app.services.images import decode_downscaled, upload_decode_pool
+from app.services.rerank import descriptor_pool, face_descriptors, rerank_candidates
+from app.services.search import SEARCH_PAGE_SIZE, ensure_candidate_links, job_results, record_search_results, run_search
 
 
 router = APIRouter(prefix="/api", tags=["search"])
@@ -31,26 +41,79 @@ def serialize_candidate(candidate) -> dict:
         "listing_url": candidate.listing_url,
         "metadata": metadata,
         "sourceName": candidate.source_name,
+        "clusterId": candidate.cluster_id,
     }
 
 
+async def _upload_descriptors(face: str, upload: UploadFile):
+    loop = asyncio.get_running_loop()
+    try:
+        image = await loop.run_in_executor(upload_decode_pool(), decode_downscaled, upload.file, DESCRIPTOR_IMAGE_SIZE)
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unreadable {face} image") from exc
+    future = descriptor_pool().submit(extract_descriptors, image, get_settings().image_descriptor_keypoints)
+    return face, await asyncio.wrap_future(future)
+
+
 @router.post("/search/image")
 async def search_image(
-    museum_coin_id: Optional[str] = Form(default=None),
-    min_score: float = Form(default=0.0),
-    obverse: UploadFile | None = File(default=None),
-    reverse: UploadFile | None = File(default=None),
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    job, results = run_search(db, "image", museum_coin_id, None, min_score=min_score, user_id=current_user.id)
-    ensure_candidate_links(db, results)
-    return [serialize_candidate(item) for item in results]
+    # The form is parsed by hand so uploads are size-capped and sniffed while they stream in.
+    form = await parse_image_form(request)
+    try:
+        try:
+            params = ImageSearchForm.model_validate(
+                {key: value for key, value in form.multi_items() if isinstance(value, str) and value != ""}
+            )
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors()) from exc
+        uploads = [
+            (face, upload) for face in ("obverse", "reverse")
+            if isinstance(upload := form.get(face), UploadFile) and upload.size
+        ]
+        # Both faces are decoded and described concurrently, off the event loop.
+        decoded = await asyncio.gather(*(_upload_descriptors(face, upload) for face, upload in uploads))
+    finally:
+        await form.close()
+
+    query_faces = {face: descriptors for face, descriptors in decoded if len(descriptors)}
+    if not query_faces and params.museum_coin_id:
+        # Without uploads, the museum coin's own stored images are the query.
+        museum_coin = db.get(MuseumCoin, params.museum_coin_id)
+        if museum_coin:
+            query_faces = face_descriptors(db, [museum_coin], key=lambda coin: coin.coin_id).get(params.museum_coin_id, {})
+    job, results = run_search(
+        db,
+        "image",
+        params.museum_coin_id,
+        None,
+        min_score=params.min_score,
+        user_id=current_user.id,
+        date_from=params.date_from,
+        date_to=params.date_to,
+        weight=params.weight,
+        diameter=params.diameter,
+        weight_tolerance=params.weight_tolerance,
+        diameter_tolerance=params.diameter_tolerance
+    )
+    image_scores = {}
+    if query_faces:
+        results, image_scores = await run_in_threadpool(rerank_candidates, db, query_faces, results)
+    page = results[:SEARCH_PAGE_SIZE]
+    ensure_candidate_links(db, job, page)
+    record_search_results(db, job, results, image_scores)
+    response.headers["X-Search-Job-Id"] = job.id
+    return [{**serialize_candidate(item), "imageScore": image_scores.get(item.id)} for item in page]
 
 
 @router.post("/search/text")
 def search_text(
     payload: TextSearchRequest,
+    response: Response,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
@@ -60,16 +123,43 @@ def search_text(
         payload.museum_coin_id,
         payload.query,
         min_score=payload.min_score,
-        user_id=current_user.id
+        user_id=current_user.id,
+        date_from=payload.date_from,
+        date_to=payload.date_to,
+        weight=payload.weight,
+        diameter=payload.diameter,
+        weight_tolerance=payload.weight_tolerance,
+        diameter_tolerance=payload.diameter_tolerance
     )
-    ensure_candidate_links(db, results)
-    return [serialize_candidate(item) for item in results]
+    page = results[:SEARCH_PAGE_SIZE]
+    ensure_candidate_links(db, job, page)
+    record_search_results(db, job, results)
+    response.headers["X-Search-Job-Id"] = job.id
+    return [serialize_candidate(item) for item in page]
 
 
 @router.get("/search/jobs/{job_id}", response_model=SearchJobStatusResponse)
-def get_job(job_id: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_job(
+    job_id: str,
+    limit: int = Query(default=SEARCH_PAGE_SIZE, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
     job = db.query(SearchJob).filter(SearchJob.id == job_id).first()
     if not job:
         return SearchJobStatusResponse(job_id=job_id, status="unknown")
-    return SearchJobStatusResponse(job_id=job.id, status=job.status, completed_at=job.completed_at, summary=job.result_summary)
+    # Stored results are served as ranked at search time; the listings themselves are read fresh.
+    total, rows = job_results(db, job.id, limit, offset)
+    return SearchJobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        completed_at=job.completed_at,
+        summary=job.result_summary,
+        total=total,
+        items=[
+            {**serialize_candidate(candidate), "rank": result.rank, "similarityScore": result.score, "imageScore": result.image_score}
+            for result, candidate in rows
+        ]
+    )
 
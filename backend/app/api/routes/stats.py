@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.services.stats import get_dashboard_stats
+
+
+router = APIRouter(prefix="/api", tags=["stats"])
+
+
+@router.get("/stats")
+def dashboard_stats(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return get_dashboard_stats(db)
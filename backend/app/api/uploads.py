@@ -0,0 +1,77 @@
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import FormData, Headers
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.config import get_settings
+from app.services.images import SNIFF_BYTES, sniff_image_format
+
+
+class UploadTooLarge(MultiPartException):
+    pass
+
+
+class UnsupportedImageFormat(MultiPartException):
+    pass
+
+
+class ImageUploadParser(MultiPartParser):
+    """Starlette's multipart parser with a per-file size cap and format sniffing as the first bytes arrive.
+
+    Files are still spooled to a temporary file once they pass ``spool_bytes``; an oversized or non-image
+    upload is rejected mid-stream instead of after the whole body has been written to disk.
+    """
+
+    def __init__(self, headers: Headers, stream, *, max_file_bytes: int, spool_bytes: int, max_files: int = 2):
+        super().__init__(headers, stream, max_files=max_files, max_fields=20)
+        self.max_file_size = spool_bytes
+        self.max_file_bytes = max_file_bytes
+        self._received: dict[int, int] = {}
+        self._heads: dict[int, bytes] = {}
+
+    def _check_head(self, part_key: int, name: str) -> None:
+        if sniff_image_format(self._heads[part_key]) is None:
+            raise UnsupportedImageFormat(f"{name}: unsupported image format; upload JPEG, PNG, WebP, GIF or TIFF")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self._current_part
+        if part.file is not None:
+            key = id(part)
+            received = self._received.get(key, 0) + end - start
+            if received > self.max_file_bytes:
+                raise UploadTooLarge(f"{part.field_name}: file exceeds {self.max_file_bytes} bytes")
+            self._received[key] = received
+            head = self._heads.get(key, b"")
+            if len(head) < SNIFF_BYTES:
+                self._heads[key] = head + data[start:min(end, start + SNIFF_BYTES - len(head))]
+                if len(self._heads[key]) >= SNIFF_BYTES:
+                    self._check_head(key, part.field_name)
+        super().on_part_data(data, start, end)
+
+    def on_part_end(self) -> None:
+        part = self._current_part
+        key = id(part)
+        # Files shorter than the sniff window (but not empty ones, which mean "no file") are checked here.
+        if part.file is not None and 0 < len(self._heads.get(key, b"")) < SNIFF_BYTES:
+            self._check_head(key, part.field_name)
+        super().on_part_end()
+
+
+async def parse_image_form(request: Request) -> FormData:
+    """Read a multipart image form within the configured upload limits, mapping violations to HTTP errors."""
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return await request.form()
+    settings = get_settings()
+    parser = ImageUploadParser(
+        request.headers,
+        request.stream(),
+        max_file_bytes=settings.image_upload_max_bytes,
+        spool_bytes=settings.image_upload_spool_bytes
+    )
+    try:
+        return await parser.parse()
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=exc.message) from exc
+    except UnsupportedImageFormat as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=exc.message) from exc
+    except MultiPartException as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.message) from exc
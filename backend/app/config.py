@@ -17,6 +17,60 @@ class Settings(BaseSettings):
     ]
     museum_source_url: str | None = None
     online_source_url: str | None = None
+    batch_lookup_max_ids: int = 200
+    export_batch_size: int = 1000
+    export_dir: str = "./exports"
+    export_row_group_size: int = 100_000
+    gzip_minimum_size: int = 1024
+    import_batch_size: int = 500
+    import_max_reported_errors: int = 100
+    stats_recent_days: int = 30
+    stats_top_n: int = 5
+    metrics_enabled: bool = True
+    slow_query_ms: float = 250.0
+    admin_emails: list[str] = []
+    admin_allow_all_users: bool = False
+    profiling_enabled: bool = False
+    profile_dir: str = "./profiles"
+    profile_sample_interval_ms: float = 5.0
+    auto_create_schema: bool = False
+    warm_up_on_startup: bool = True
+    match_scoring_preset: str = "balanced"
+    match_feature_weights: dict[str, float] = {}
+    match_top_k: int = 20
+    match_min_score: float = 0.3
+    match_on_ingest: bool = True
+    catalog_snapshots_enabled: bool = True
+    catalog_snapshot_dir: str = "./catalog_snapshots"
+    catalog_snapshot_keep: int = 3
+    events_poll_interval: float = 1.0
+    events_retention_hours: int = 24
+    events_replay_limit: int = 1000
+    events_client_queue: int = 256
+    events_heartbeat_seconds: float = 15.0
+    events_ticket_seconds: int = 60
+    search_result_limit: int = 500
+    legend_min_similarity: float = 0.3
+    image_store_dir: str = "./image_store"
+    image_thumbnail_sizes: list[int] = [128, 256, 512]
+    image_fetch_on_ingest: bool = True
+    image_fetch_concurrency: int = 8
+    image_fetch_timeout: float = 15.0
+    image_max_bytes: int = 20 * 1024 * 1024
+    image_thumbnail_workers: int | None = None
+    image_descriptor_keypoints: int = 500
+    image_rerank_candidates: int = 20
+    image_rerank_budget_ms: float = 750.0
+    image_rerank_weight: float = 0.3
+    image_rerank_workers: int | None = None
+    image_min_inliers: int = 10
+    image_upload_max_bytes: int = 15 * 1024 * 1024
+    image_upload_spool_bytes: int = 1024 * 1024
+    image_upload_decode_workers: int = 4
+    dedup_similarity_threshold: float = 0.7
+    match_date_slack_years: int = 25
+    match_weight_tolerance: float = 1.5
+    match_diameter_tolerance: float = 3.0
 
     model_config = SettingsConfigDict(
         env_prefix="coinmatch_",
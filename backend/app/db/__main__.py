@@ -0,0 +1,27 @@
+import argparse
+import sys
+
+from app.db.migrate import current_revision, describe_difference, schema_differences, upgrade_schema
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.db", description="Database schema management.")
+    parser.add_argument(
+        "command",
+        choices=["upgrade", "create", "check"],
+        help="upgrade (or create): apply pending migrations; check: only compare the schema with the models",
+    )
+    args = parser.parse_args()
+    if args.command in ("upgrade", "create"):
+        upgrade_schema()
+    differences = schema_differences()
+    if differences:
+        print(f"Schema at revision {current_revision()} differs from the models:", file=sys.stderr)
+        for difference in differences:
+            print(f"  {describe_difference(difference)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Schema is up to date (revision {current_revision()}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Alembic helpers shared by ``python -m app.db``, the seed script, the dev lifespan and the revisions."""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import sqlalchemy as sa
+from alembic import command, op
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import get_engine
+import app.models  # noqa: F401  (registers tables on Base.metadata)
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+# Revision matching the schema ``create_all`` produced before migrations were introduced.
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def current_revision() -> str | None:
+    with get_engine().connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_schema(revision: str = "head") -> None:
+    """Bring the database to ``revision``, adopting databases that predate migrations first."""
+    with get_engine().connect() as connection:
+        tables = set(sa.inspect(connection).get_table_names())
+    config = alembic_config()
+    if "alembic_version" not in tables and "users" in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, revision)
+
+
+def schema_differences() -> list:
+    """Differences between the models and the live schema, in Alembic's autogenerate format."""
+    with get_engine().connect() as connection:
+        return compare_metadata(MigrationContext.configure(connection), Base.metadata)
+
+
+def _describe(item) -> str:
+    if isinstance(item, sa.ForeignKeyConstraint):
+        return f"{item.table.name}({', '.join(item.column_keys)}) -> {item.referred_table.name}"
+    if isinstance(item, sa.Column):
+        return f"{item.table.name}.{item.name}"
+    if isinstance(item, (sa.Table, sa.Index)):
+        return item.name
+    return str(item)
+
+
+def describe_difference(difference) -> str:
+    if isinstance(difference, list):  # column modifications come grouped per column
+        return "; ".join(describe_difference(item) for item in difference)
+    kind, *details = difference
+    if kind.startswith("modify_"):
+        _, table, column = details[:3]
+        return f"{kind} {table}.{column}"
+    return f"{kind} " + " ".join(_describe(item) for item in details if item is not None and not isinstance(item, str))
+
+
+# Helpers for revisions. Revisions are written defensively so they can run against databases that
+# ``create_all`` already brought partly (or fully) up to date.
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(info["name"] == column for info in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def has_index(table: str, name: str) -> bool:
+    return any(info["name"] == name for info in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def create_index(name: str, table: str, columns: list[str], unique: bool = False) -> None:
+    if not has_index(table, name):
+        op.create_index(name, table, columns, unique=unique)
+
+
+@contextmanager
+def data_session() -> Iterator[Session]:
+    """ORM session on the migration's connection for data backfills.
+
+    Work is flushed into Alembic's transaction, which commits it with the revision; the session never commits.
+    """
+    session = Session(bind=op.get_bind(), autoflush=False)
+    try:
+        yield session
+        session.flush()
+    finally:
+        session.close()
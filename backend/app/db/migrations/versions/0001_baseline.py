@@ -0,0 +1,153 @@
+"""Baseline schema: users, sessions, coins, matches and search jobs.
+
+Databases created with ``create_all`` before migrations existed are stamped at this revision by
+``app.db.migrate.upgrade_schema`` instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _coin_columns() -> list[sa.Column]:
+    return [
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column("diameter", sa.Float(), nullable=True),
+        sa.Column("die_axis", sa.String(length=32), nullable=True),
+        sa.Column("obverse_inscription", sa.Text(), nullable=True),
+        sa.Column("reverse_inscription", sa.Text(), nullable=True),
+        sa.Column("monograms", sa.Text(), nullable=True),
+        sa.Column("reference_list", sa.Text(), nullable=True),
+        sa.Column("catalog_number", sa.String(length=255), nullable=True),
+        sa.Column("source_database", sa.String(length=255), nullable=True),
+        sa.Column("provenance_text", sa.Text(), nullable=True),
+        sa.Column("previous_owners", sa.Text(), nullable=True),
+        sa.Column("auction_history", sa.Text(), nullable=True),
+        sa.Column("estimate_value", sa.String(length=255), nullable=True),
+        sa.Column("sale_price", sa.String(length=255), nullable=True),
+        sa.Column("obverse_image_key", sa.String(length=255), nullable=True),
+        sa.Column("reverse_image_key", sa.String(length=255), nullable=True),
+        sa.Column("lot_description_raw", sa.Text(), nullable=True),
+        sa.Column("lot_description_en", sa.Text(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "session_tokens",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "museum_coins",
+        sa.Column("coin_id", sa.String(length=64), nullable=False),
+        sa.Column("mint", sa.String(length=255), nullable=False),
+        sa.Column("authority", sa.String(length=255), nullable=False),
+        sa.Column("date_range", sa.String(length=255), nullable=False),
+        sa.Column("denomination", sa.String(length=255), nullable=False),
+        sa.Column("metal", sa.String(length=255), nullable=False),
+        sa.Column("obverse_description", sa.Text(), nullable=False),
+        sa.Column("reverse_description", sa.Text(), nullable=False),
+        *_coin_columns(),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("source_type", sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint("coin_id"),
+    )
+
+    op.create_table(
+        "online_coins",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("museum_coin_id", sa.String(length=64), nullable=True),
+        sa.Column("similarity_score", sa.Float(), nullable=False),
+        sa.Column("listing_reference", sa.String(length=255), nullable=False),
+        sa.Column("sale_date", sa.String(length=64), nullable=True),
+        sa.Column("listing_url", sa.String(length=512), nullable=True),
+        sa.Column("metadata_json", sa.Text(), nullable=True),
+        sa.Column("mint", sa.String(length=255), nullable=True),
+        sa.Column("authority", sa.String(length=255), nullable=True),
+        sa.Column("date_range", sa.String(length=255), nullable=True),
+        sa.Column("denomination", sa.String(length=255), nullable=True),
+        sa.Column("metal", sa.String(length=255), nullable=True),
+        sa.Column("obverse_description", sa.Text(), nullable=True),
+        sa.Column("reverse_description", sa.Text(), nullable=True),
+        *_coin_columns(),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.Column("source_name", sa.String(length=128), nullable=True),
+        sa.ForeignKeyConstraint(["museum_coin_id"], ["museum_coins.coin_id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "matches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("museum_coin_id", sa.String(length=64), nullable=False),
+        sa.Column("candidate_id", sa.String(length=64), nullable=True),
+        sa.Column("similarity_score", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("source", sa.String(length=255), nullable=True),
+        sa.Column("saved_at", sa.DateTime(), nullable=False),
+        sa.Column("decided_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["museum_coin_id"], ["museum_coins.coin_id"]),
+        sa.ForeignKeyConstraint(["candidate_id"], ["online_coins.id"]),
+        sa.ForeignKeyConstraint(["decided_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_matches_id", "matches", ["id"])
+    op.create_index("uq_match_pair", "matches", ["museum_coin_id", "candidate_id"], unique=True)
+
+    op.create_table(
+        "search_jobs",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("job_type", sa.String(length=16), nullable=False),
+        sa.Column("museum_coin_id", sa.String(length=64), nullable=True),
+        sa.Column("query_text", sa.Text(), nullable=True),
+        sa.Column("obverse_key", sa.String(length=255), nullable=True),
+        sa.Column("reverse_key", sa.String(length=255), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("result_summary", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("search_jobs")
+    op.drop_index("uq_match_pair", table_name="matches")
+    op.drop_index("ix_matches_id", table_name="matches")
+    op.drop_table("matches")
+    op.drop_table("online_coins")
+    op.drop_table("museum_coins")
+    op.drop_table("session_tokens")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,156 @@
+"""Side tables and indexes added since the baseline.
+
+Dashboard counters, the reference and legend indexes (backfilled from existing coins), the weight and
+diameter indexes, image assets, stored search results, the event log and ``updated_at`` on listings.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import create_index, data_session, has_column, has_index, has_table
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _coin_owner_columns() -> list[sa.Column]:
+    return [
+        sa.Column("museum_coin_id", sa.String(length=64), nullable=True),
+        sa.Column("online_coin_id", sa.String(length=64), nullable=True),
+        sa.ForeignKeyConstraint(["museum_coin_id"], ["museum_coins.coin_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["online_coin_id"], ["online_coins.id"], ondelete="CASCADE"),
+    ]
+
+
+def upgrade() -> None:
+    if not has_table("stat_counters"):
+        op.create_table(
+            "stat_counters",
+            sa.Column("name", sa.String(length=191), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+    if not has_column("online_coins", "updated_at"):
+        with op.batch_alter_table("online_coins") as batch:
+            batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        online_coins = sa.table("online_coins", sa.column("updated_at"), sa.column("fetched_at"))
+        op.execute(online_coins.update().values(updated_at=online_coins.c.fetched_at))
+        with op.batch_alter_table("online_coins") as batch:
+            batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+    create_index("ix_museum_coins_updated_at", "museum_coins", ["updated_at"])
+    create_index("ix_online_coins_updated_at", "online_coins", ["updated_at"])
+
+    if has_index("online_coins", "ix_online_coins_measurements"):
+        op.drop_index("ix_online_coins_measurements", table_name="online_coins")
+    create_index("ix_online_coins_weight", "online_coins", ["weight"])
+    create_index("ix_online_coins_diameter", "online_coins", ["diameter"])
+
+    backfill_references = not has_table("coin_references")
+    if backfill_references:
+        op.create_table(
+            "coin_references",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("ref_key", sa.String(length=191), nullable=False),
+            sa.Column("corpus", sa.String(length=128), nullable=False),
+            sa.Column("volume", sa.String(length=32), nullable=False),
+            sa.Column("number", sa.String(length=32), nullable=False),
+            *_coin_owner_columns(),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_coin_references_key_museum", "coin_references", ["ref_key", "museum_coin_id"])
+    create_index("ix_coin_references_key_online", "coin_references", ["ref_key", "online_coin_id"])
+    create_index("ix_coin_references_museum_coin_id", "coin_references", ["museum_coin_id"])
+    create_index("ix_coin_references_online_coin_id", "coin_references", ["online_coin_id"])
+
+    backfill_legends = not has_table("legend_trigrams")
+    if backfill_legends:
+        op.create_table(
+            "legend_trigrams",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("trigram", sa.String(length=3), nullable=False),
+            *_coin_owner_columns(),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_legend_trigrams_trigram_museum", "legend_trigrams", ["trigram", "museum_coin_id"])
+    create_index("ix_legend_trigrams_trigram_online", "legend_trigrams", ["trigram", "online_coin_id"])
+    create_index("ix_legend_trigrams_museum_coin_id", "legend_trigrams", ["museum_coin_id"])
+    create_index("ix_legend_trigrams_online_coin_id", "legend_trigrams", ["online_coin_id"])
+
+    if not has_table("image_assets"):
+        op.create_table(
+            "image_assets",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("source_url", sa.String(length=512), nullable=False),
+            sa.Column("sha256", sa.String(length=64), nullable=True),
+            sa.Column("content_type", sa.String(length=64), nullable=True),
+            sa.Column("width", sa.Integer(), nullable=True),
+            sa.Column("height", sa.Integer(), nullable=True),
+            sa.Column("byte_size", sa.Integer(), nullable=True),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("fetched_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_image_assets_source_url", "image_assets", ["source_url"], unique=True)
+    create_index("ix_image_assets_sha256", "image_assets", ["sha256"])
+    create_index("ix_image_assets_status", "image_assets", ["status"])
+
+    if not has_table("search_job_results"):
+        op.create_table(
+            "search_job_results",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("job_id", sa.String(length=64), nullable=False),
+            sa.Column("rank", sa.Integer(), nullable=False),
+            sa.Column("candidate_id", sa.String(length=64), nullable=False),
+            sa.Column("score", sa.Float(), nullable=True),
+            sa.Column("image_score", sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(["job_id"], ["search_jobs.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["candidate_id"], ["online_coins.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    create_index("ix_search_job_results_job_rank", "search_job_results", ["job_id", "rank"], unique=True)
+    create_index("ix_search_job_results_candidate_id", "search_job_results", ["candidate_id"])
+
+    if not has_table("events"):
+        op.create_table(
+            "events",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("event_type", sa.String(length=32), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sqlite_autoincrement=True,
+        )
+    create_index("ix_events_created_at", "events", ["created_at"])
+
+    if backfill_references or backfill_legends:
+        from app.services.inscriptions import rebuild_legend_index
+        from app.services.references import rebuild_reference_index
+
+        with data_session() as session:
+            if backfill_references:
+                rebuild_reference_index(session)
+            if backfill_legends:
+                rebuild_legend_index(session)
+
+
+def downgrade() -> None:
+    op.drop_table("events")
+    op.drop_table("search_job_results")
+    op.drop_table("image_assets")
+    op.drop_table("legend_trigrams")
+    op.drop_table("coin_references")
+    op.drop_index("ix_online_coins_diameter", table_name="online_coins")
+    op.drop_index("ix_online_coins_weight", table_name="online_coins")
+    op.drop_index("ix_online_coins_updated_at", table_name="online_coins")
+    op.drop_index("ix_museum_coins_updated_at", table_name="museum_coins")
+    with op.batch_alter_table("online_coins") as batch:
+        batch.drop_column("updated_at")
+    op.drop_table("stat_counters")
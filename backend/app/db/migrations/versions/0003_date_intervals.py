@@ -0,0 +1,41 @@
+"""Signed-year date intervals on coins and listings, parsed from ``date_range``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import create_index, data_session, has_column
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLES = ("museum_coins", "online_coins")
+
+
+def upgrade() -> None:
+    backfill = False
+    for table in TABLES:
+        if not has_column(table, "date_earliest"):
+            op.add_column(table, sa.Column("date_earliest", sa.Integer(), nullable=True))
+            op.add_column(table, sa.Column("date_latest", sa.Integer(), nullable=True))
+            backfill = True
+        create_index(f"ix_{table}_dates", table, ["date_earliest", "date_latest"])
+    if backfill:
+        from app.services.dates import rebuild_date_index
+
+        with data_session() as session:
+            rebuild_date_index(session)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_dates", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("date_latest")
+            batch.drop_column("date_earliest")
@@ -0,0 +1,43 @@
+"""Mark matches proposed by the matcher, so match runs only replace their own undecided rows.
+
+Existing rows are marked when they look matcher-made: still Pending, with no decision and no notes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import has_column
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if has_column("matches", "created_by_matcher"):
+        return
+    op.add_column(
+        "matches", sa.Column("created_by_matcher", sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    matches = sa.table(
+        "matches",
+        sa.column("created_by_matcher", sa.Boolean()),
+        sa.column("status"),
+        sa.column("decided_by"),
+        sa.column("notes"),
+    )
+    op.execute(
+        matches.update()
+        .where(matches.c.status == "Pending", matches.c.decided_by.is_(None), matches.c.notes.is_(None))
+        .values(created_by_matcher=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("matches") as batch:
+        batch.drop_column("created_by_matcher")
@@ -0,0 +1,48 @@
+"""Near-duplicate listing clusters: MinHash LSH band keys and ``online_coins.cluster_id``.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import create_index, data_session, has_column, has_table
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    backfill = False
+    if not has_table("listing_bands"):
+        op.create_table(
+            "listing_bands",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("band_key", sa.String(length=32), nullable=False),
+            sa.Column("online_coin_id", sa.String(length=64), nullable=False),
+            sa.ForeignKeyConstraint(["online_coin_id"], ["online_coins.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        backfill = True
+    create_index("ix_listing_bands_band_key", "listing_bands", ["band_key"])
+    create_index("ix_listing_bands_online_coin_id", "listing_bands", ["online_coin_id"])
+    if not has_column("online_coins", "cluster_id"):
+        op.add_column("online_coins", sa.Column("cluster_id", sa.String(length=64), nullable=True))
+        backfill = True
+    create_index("ix_online_coins_cluster_id", "online_coins", ["cluster_id"])
+    if backfill:
+        from app.services.dedup import rebuild_listing_clusters
+
+        with data_session() as session:
+            rebuild_listing_clusters(session)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_online_coins_cluster_id", table_name="online_coins")
+    with op.batch_alter_table("online_coins") as batch:
+        batch.drop_column("cluster_id")
+    op.drop_table("listing_bands")
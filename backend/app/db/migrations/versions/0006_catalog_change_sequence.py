@@ -0,0 +1,50 @@
+"""Commit-ordered catalog change sequences for incremental snapshot refreshes.
+
+Existing rows all get sequence 1 and the table sequences start there, so the first refresh after upgrading
+loads each table once and later commits are picked up incrementally.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import create_index, has_column, has_table
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ("museum_coins", "online_coins")
+
+
+def upgrade() -> None:
+    if not has_table("catalog_sequences"):
+        op.create_table(
+            "catalog_sequences",
+            sa.Column("name", sa.String(length=64), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+    sequences = sa.table("catalog_sequences", sa.column("name", sa.String()), sa.column("value", sa.Integer()))
+    for table in TABLES:
+        if not has_column(table, "change_seq"):
+            op.add_column(table, sa.Column("change_seq", sa.Integer(), nullable=False, server_default="0"))
+            # A plain Core UPDATE, so updated_at keeps its value: stamping is not an edit of the coin.
+            coins = sa.table(table, sa.column("change_seq", sa.Integer()))
+            op.execute(coins.update().values(change_seq=1))
+        create_index(f"ix_{table}_change_seq", table, ["change_seq"])
+        bind = op.get_bind()
+        if bind.execute(sa.select(sequences.c.name).where(sequences.c.name == table)).first() is None:
+            op.execute(sequences.insert().values(name=table, value=1))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_change_seq", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("change_seq")
+    op.drop_table("catalog_sequences")
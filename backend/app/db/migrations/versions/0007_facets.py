@@ -0,0 +1,64 @@
+"""Normalized facet values with counts, and the coins' facet id columns.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrate import create_index, data_session, has_column, has_table
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+TABLES = ("museum_coins", "online_coins")
+COLUMNS = ("mint_facet_id", "authority_facet_id", "denomination_facet_id", "metal_facet_id")
+
+
+def upgrade() -> None:
+    backfill = False
+    if not has_table("facet_values"):
+        op.create_table(
+            "facet_values",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("attribute", sa.String(length=32), nullable=False),
+            sa.Column("value_key", sa.String(length=191), nullable=False),
+            sa.Column("label", sa.String(length=255), nullable=False),
+            sa.Column("museum_count", sa.Integer(), nullable=False),
+            sa.Column("online_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        backfill = True
+    create_index("uq_facet_values_attribute_key", "facet_values", ["attribute", "value_key"], unique=True)
+    for table in TABLES:
+        missing = [column for column in COLUMNS if not has_column(table, column)]
+        if missing:
+            # SQLite cannot add foreign keys in place; batch mode rebuilds the table there. The constraints get
+            # the names PostgreSQL gives the models' unnamed ones.
+            with op.batch_alter_table(table) as batch:
+                for column in missing:
+                    batch.add_column(sa.Column(column, sa.Integer(), nullable=True))
+                    batch.create_foreign_key(f"{table}_{column}_fkey", "facet_values", [column], ["id"])
+            backfill = True
+        for column in COLUMNS:
+            create_index(f"ix_{table}_{column}", table, [column])
+    if backfill:
+        from app.services.facets import rebuild_facets
+
+        with data_session() as session:
+            rebuild_facets(session)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for column in COLUMNS:
+            op.drop_index(f"ix_{table}_{column}", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            for column in COLUMNS:
+                batch.drop_column(column)
+    op.drop_index("uq_facet_values_attribute_key", table_name="facet_values")
+    op.drop_table("facet_values")
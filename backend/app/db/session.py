@@ -1,22 +1,25 @@
 from contextlib import contextmanager
+from functools import lru_cache
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
 
 
-settings = get_settings()
-
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-)
+@lru_cache
+def get_engine() -> Engine:
+    database_url = get_settings().database_url
+    return create_engine(
+        database_url,
+        connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    )
 
 
 @contextmanager
 def session_scope() -> Session:
-    session = Session(bind=engine, expire_on_commit=False)
+    session = Session(bind=get_engine(), expire_on_commit=False)
     try:
         yield session
         session.commit()
@@ -25,4 +28,3 @@ def session_scope() -> Session:
         raise
     finally:
         session.close()
-
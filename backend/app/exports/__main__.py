@@ -0,0 +1,29 @@
+import argparse
+
+from app.services.columnar import COLUMNAR_FORMATS, PARTITION_KEYS, export_columnar
+from app.services.exports import EXPORT_TABLES
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.exports", description="Write tables as columnar files for analytics.")
+    parser.add_argument("datasets", nargs="*", help=f"tables to export: {', '.join(EXPORT_TABLES)} (default: all)")
+    parser.add_argument("--format", dest="export_format", choices=sorted(COLUMNAR_FORMATS), default="parquet")
+    parser.add_argument("--partition-by", choices=PARTITION_KEYS, help="split online-coins and matches into one directory per value")
+    parser.add_argument("--output", help="output directory (default: COINMATCH_EXPORT_DIR)")
+    args = parser.parse_args()
+    unknown = sorted(set(args.datasets) - set(EXPORT_TABLES))
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    for dataset in args.datasets or list(EXPORT_TABLES):
+        partition_by = args.partition_by if dataset != "museum-coins" else None
+        result = export_columnar(dataset, args.export_format, partition_by, args.output)
+        print(f"Wrote {result['rows']} {dataset} row(s) to {result['path']} ({len(result['files'])} file(s), {result['bytes']} bytes, {result['seconds']}s).")
+
+
+if __name__ == "__main__":
+    main()
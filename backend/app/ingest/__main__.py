@@ -1,16 +1,46 @@
+import argparse
+from contextlib import nullcontext
+
+from app.config import get_settings
 from app.db.session import session_scope
+from app.services.events import SYNC_FINISHED, stage_event
+from app.services.images import fetch_pending_images
 from app.services.ingest import fetch_museum_coins, fetch_online_coins, upsert_museum_coins, upsert_online_coins
+from app.services.matcher import generate_matches
+from app.services.profiling import cprofile_to_file
 
 
-def main() -> None:
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description="Sync remote coin datasets.")
+    parser.add_argument("--match", action="store_true", help="run the matcher after syncing")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile .pstats file for this run")
+    return parser.parse_args()
+
+
+def run(match: bool) -> None:
     museum_data = fetch_museum_coins()
     online_data = fetch_online_coins()
     with session_scope() as session:
         museum_count = upsert_museum_coins(session, museum_data)
         online_count = upsert_online_coins(session, online_data)
         print(f"Synced {museum_count} museum coin(s) and {online_count} online coin(s).")
+        if match:
+            updated = generate_matches(session)
+            print(f"Updated {updated} match record(s).")
+        stage_event(session, SYNC_FINISHED, {"museumUpdated": museum_count, "onlineUpdated": online_count})
+    if get_settings().image_fetch_on_ingest:
+        images = fetch_pending_images()
+        print(f"Stored {images['stored']} image(s), {images['failed']} failed.")
+
+
+def main() -> None:
+    args = parse_args()
+    label = "ingest-match" if args.match else "ingest"
+    with cprofile_to_file(label) if args.profile else nullcontext() as profile_path:
+        run(args.match)
+    if profile_path:
+        print(f"Profile written to {profile_path}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,34 +1,75 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.api.routes import admin, auth, coins, matches, search
+from app.api.middleware import profile_request, record_request_metrics
+from app.api.routes import admin, auth, coins, events, exports, facets, images, imports, matches, search, stats
 from app.config import get_settings
-from app.db.base import Base
-from app.db.session import engine
+from app.db.session import get_engine
+from app.services.metrics import install_sql_instrumentation, render_metrics
+from app.services.warmup import run_warmers
+
+
+logger = logging.getLogger("app.startup")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    if settings.auto_create_schema:
+        # Imported here so the common path does not pay for loading Alembic.
+        from app.db.migrate import upgrade_schema
+
+        await run_in_threadpool(upgrade_schema)
+    if settings.warm_up_on_startup:
+        timings = await run_in_threadpool(run_warmers)
+        logger.info("Warm-up finished: %s", ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items()))
+    yield
+    get_engine().dispose()
 
 
-settings = get_settings()
+def create_app() -> FastAPI:
+    settings = get_settings()
+    app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
-Base.metadata.create_all(bind=engine)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"]
+    )
+    app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+    app.middleware("http")(record_request_metrics)
+    app.middleware("http")(profile_request)
+    install_sql_instrumentation()
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+    app.include_router(auth.router)
+    app.include_router(coins.router)
+    app.include_router(search.router)
+    app.include_router(matches.router)
+    app.include_router(admin.router)
+    app.include_router(exports.router)
+    app.include_router(imports.router)
+    app.include_router(stats.router)
+    app.include_router(images.router)
+    app.include_router(events.router)
+    app.include_router(facets.router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
+    @app.get("/health")
+    def healthcheck():
+        return {"status": "ok"}
 
-app.include_router(auth.router)
-app.include_router(coins.router)
-app.include_router(search.router)
-app.include_router(matches.router)
-app.include_router(admin.router)
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
+    return app
 
-@app.get("/health")
-def healthcheck():
-    return {"status": "ok"}
 
+app = create_app()
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timedelta
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, Index
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, Index, false
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -33,11 +33,14 @@ class SessionToken(Base):
 
 class MuseumCoin(Base):
     __tablename__ = "museum_coins"
+    __table_args__ = (Index("ix_museum_coins_dates", "date_earliest", "date_latest"),)
 
     coin_id: Mapped[str] = mapped_column(String(64), primary_key=True)
     mint: Mapped[str] = mapped_column(String(255))
     authority: Mapped[str] = mapped_column(String(255))
     date_range: Mapped[str] = mapped_column(String(255))
+    date_earliest: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    date_latest: Mapped[int | None] = mapped_column(Integer, nullable=True)
     denomination: Mapped[str] = mapped_column(String(255))
     metal: Mapped[str] = mapped_column(String(255))
     weight: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -61,8 +64,14 @@ class MuseumCoin(Base):
     lot_description_raw: Mapped[str | None] = mapped_column(Text, nullable=True)
     lot_description_en: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Catalog change sequence, assigned in commit order; see app.services.catalog.
+    change_seq: Mapped[int] = mapped_column(Integer, default=0, index=True)
     source_type: Mapped[str] = mapped_column(String(64), default="museum")
+    mint_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    authority_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    denomination_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    metal_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
 
     candidates: Mapped[list["OnlineCoin"]] = relationship("OnlineCoin", back_populates="museum_coin")
     matches: Mapped[list["MatchRecord"]] = relationship("MatchRecord", back_populates="museum_coin")
@@ -70,6 +79,11 @@ class MuseumCoin(Base):
 
 class OnlineCoin(Base):
     __tablename__ = "online_coins"
+    __table_args__ = (
+        Index("ix_online_coins_dates", "date_earliest", "date_latest"),
+        Index("ix_online_coins_weight", "weight"),
+        Index("ix_online_coins_diameter", "diameter"),
+    )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     museum_coin_id: Mapped[str | None] = mapped_column(ForeignKey("museum_coins.coin_id", ondelete="SET NULL"), nullable=True)
@@ -83,6 +97,8 @@ class OnlineCoin(Base):
     mint: Mapped[str | None] = mapped_column(String(255), nullable=True)
     authority: Mapped[str | None] = mapped_column(String(255), nullable=True)
     date_range: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    date_earliest: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    date_latest: Mapped[int | None] = mapped_column(Integer, nullable=True)
     denomination: Mapped[str | None] = mapped_column(String(255), nullable=True)
     metal: Mapped[str | None] = mapped_column(String(255), nullable=True)
     weight: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -104,7 +120,15 @@ class OnlineCoin(Base):
     lot_description_raw: Mapped[str | None] = mapped_column(Text, nullable=True)
     lot_description_en: Mapped[str | None] = mapped_column(Text, nullable=True)
     fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Catalog change sequence, assigned in commit order; see app.services.catalog.
+    change_seq: Mapped[int] = mapped_column(Integer, default=0, index=True)
     source_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    cluster_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    mint_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    authority_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    denomination_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
+    metal_facet_id: Mapped[int | None] = mapped_column(ForeignKey("facet_values.id"), nullable=True, index=True)
 
     museum_coin: Mapped[MuseumCoin | None] = relationship("MuseumCoin", back_populates="candidates")
     matches: Mapped[list["MatchRecord"]] = relationship("MatchRecord", back_populates="online_coin")
@@ -125,6 +149,8 @@ class MatchRecord(Base):
     source: Mapped[str | None] = mapped_column(String(255), nullable=True)
     saved_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     decided_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # Proposed by a match run and not touched by a curator since; only these may be dropped by a later run.
+    created_by_matcher: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
 
     museum_coin: Mapped[MuseumCoin] = relationship("MuseumCoin", back_populates="matches")
     online_coin: Mapped[OnlineCoin | None] = relationship("OnlineCoin", back_populates="matches")
@@ -148,3 +174,125 @@ class SearchJob(Base):
 
     created_by_user: Mapped[User | None] = relationship("User")
 
+
+class SearchJobResult(Base):
+    __tablename__ = "search_job_results"
+    __table_args__ = (
+        Index("ix_search_job_results_job_rank", "job_id", "rank", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[str] = mapped_column(ForeignKey("search_jobs.id", ondelete="CASCADE"))
+    rank: Mapped[int] = mapped_column(Integer)
+    candidate_id: Mapped[str] = mapped_column(ForeignKey("online_coins.id", ondelete="CASCADE"), index=True)
+    score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    image_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    candidate: Mapped[OnlineCoin] = relationship("OnlineCoin")
+
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    name: Mapped[str] = mapped_column(String(191), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class CatalogSequence(Base):
+    __tablename__ = "catalog_sequences"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class FacetValue(Base):
+    __tablename__ = "facet_values"
+    __table_args__ = (
+        Index("uq_facet_values_attribute_key", "attribute", "value_key", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    attribute: Mapped[str] = mapped_column(String(32))  # mint | authority | denomination | metal
+    value_key: Mapped[str] = mapped_column(String(191))
+    label: Mapped[str] = mapped_column(String(255))
+    museum_count: Mapped[int] = mapped_column(Integer, default=0)
+    online_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class CoinReference(Base):
+    __tablename__ = "coin_references"
+    __table_args__ = (
+        Index("ix_coin_references_key_museum", "ref_key", "museum_coin_id"),
+        Index("ix_coin_references_key_online", "ref_key", "online_coin_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ref_key: Mapped[str] = mapped_column(String(191))
+    corpus: Mapped[str] = mapped_column(String(128))
+    volume: Mapped[str] = mapped_column(String(32), default="")
+    number: Mapped[str] = mapped_column(String(32))
+    museum_coin_id: Mapped[str | None] = mapped_column(
+        ForeignKey("museum_coins.coin_id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    online_coin_id: Mapped[str | None] = mapped_column(
+        ForeignKey("online_coins.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+
+    museum_coin: Mapped[MuseumCoin | None] = relationship("MuseumCoin")
+    online_coin: Mapped[OnlineCoin | None] = relationship("OnlineCoin")
+
+
+class LegendTrigram(Base):
+    __tablename__ = "legend_trigrams"
+    __table_args__ = (
+        Index("ix_legend_trigrams_trigram_museum", "trigram", "museum_coin_id"),
+        Index("ix_legend_trigrams_trigram_online", "trigram", "online_coin_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    trigram: Mapped[str] = mapped_column(String(3))
+    museum_coin_id: Mapped[str | None] = mapped_column(
+        ForeignKey("museum_coins.coin_id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    online_coin_id: Mapped[str | None] = mapped_column(
+        ForeignKey("online_coins.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+
+    museum_coin: Mapped[MuseumCoin | None] = relationship("MuseumCoin")
+    online_coin: Mapped[OnlineCoin | None] = relationship("OnlineCoin")
+
+
+class ListingBand(Base):
+    __tablename__ = "listing_bands"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    band_key: Mapped[str] = mapped_column(String(32), index=True)
+    online_coin_id: Mapped[str] = mapped_column(ForeignKey("online_coins.id", ondelete="CASCADE"), index=True)
+
+    online_coin: Mapped[OnlineCoin] = relationship("OnlineCoin")
+
+
+class ImageAsset(Base):
+    __tablename__ = "image_assets"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source_url: Mapped[str] = mapped_column(String(512), unique=True, index=True)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    content_type: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    byte_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="pending", index=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    fetched_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class Event(Base):
+    __tablename__ = "events"
+    # AUTOINCREMENT keeps SQLite from reusing the ids of pruned events, which clients resume from.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(32))
+    payload: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
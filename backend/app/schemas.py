@@ -99,12 +99,31 @@ class SearchJobStatusResponse(BaseModel):
     status: str
     completed_at: Optional[datetime] = None
     summary: Optional[str] = None
+    total: int = 0
+    items: list[dict] = []
 
 
 class TextSearchRequest(BaseModel):
     query: str
     museum_coin_id: Optional[str] = None
     min_score: float = 0.0
+    date_from: Optional[int] = None
+    date_to: Optional[int] = None
+    weight: Optional[float] = None
+    weight_tolerance: Optional[float] = Field(None, ge=0)
+    diameter: Optional[float] = None
+    diameter_tolerance: Optional[float] = Field(None, ge=0)
+
+
+class ImageSearchForm(BaseModel):
+    museum_coin_id: Optional[str] = None
+    min_score: float = 0.0
+    date_from: Optional[int] = None
+    date_to: Optional[int] = None
+    weight: Optional[float] = None
+    weight_tolerance: Optional[float] = Field(None, ge=0)
+    diameter: Optional[float] = None
+    diameter_tolerance: Optional[float] = Field(None, ge=0)
 
 
 UserLoginResponse.model_rebuild()
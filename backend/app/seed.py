@@ -1,9 +1,11 @@
 import json
 
-from app.db.base import Base
-from app.db.session import engine, session_scope
+from app.db.migrate import upgrade_schema
+from app.db.session import session_scope
 from app.models import MatchRecord, MuseumCoin, OnlineCoin, User
 from app.services.auth import hash_password
+from app.services.dates import date_bounds
+from app.services.stats import rebuild_stats
 
 
 def seed_users():
@@ -112,7 +114,9 @@ def seed_coins():
         for coin_data in coins:
             if session.query(MuseumCoin).filter(MuseumCoin.coin_id == coin_data["coin_id"]).first():
                 continue
-            session.add(MuseumCoin(**coin_data))
+            coin = MuseumCoin(**coin_data)
+            coin.date_earliest, coin.date_latest = date_bounds(coin.date_range)
+            session.add(coin)
 
 
 def seed_candidates():
@@ -195,7 +199,9 @@ def seed_candidates():
         for candidate_data in candidates:
             if session.query(OnlineCoin).filter(OnlineCoin.id == candidate_data["id"]).first():
                 continue
-            session.add(OnlineCoin(**candidate_data))
+            candidate = OnlineCoin(**candidate_data)
+            candidate.date_earliest, candidate.date_latest = date_bounds(candidate.date_range)
+            session.add(candidate)
 
 
 def seed_matches():
@@ -231,11 +237,13 @@ def seed_matches():
 
 
 def main():
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     seed_users()
     seed_coins()
     seed_candidates()
     seed_matches()
+    with session_scope() as session:
+        rebuild_stats(session)
     print("Seed data loaded.")
 
 
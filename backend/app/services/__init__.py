@@ -1,2 +1,2 @@
-
-
+# Imported for their Session event listeners, which must be registered before any session flushes.
+from app.services import catalog, dedup, facets, images, inscriptions, references, stats  # noqa: F401
@@ -1,4 +1,7 @@
 from datetime import datetime, timedelta
+import hashlib
+import hmac
+import time
 import uuid
 
 from passlib.hash import pbkdf2_sha256
@@ -8,9 +11,6 @@ from app.config import get_settings
 from app.models import SessionToken, User
 
 
-settings = get_settings()
-
-
 def hash_password(password: str) -> str:
     return pbkdf2_sha256.hash(password)
 
@@ -29,13 +29,46 @@ def authenticate_user(db: Session, email: str, password: str) -> tuple[User, Ses
         id=uuid.uuid4().hex,
         user_id=user.id,
         created_at=datetime.utcnow(),
-        expires_at=datetime.utcnow() + timedelta(minutes=settings.token_expiry_minutes)
+        expires_at=datetime.utcnow() + timedelta(minutes=get_settings().token_expiry_minutes)
     )
     db.add(token)
     db.flush()
     return user, token
 
 
+def is_admin(user: User) -> bool:
+    settings = get_settings()
+    admin_emails = settings.admin_emails
+    if not admin_emails:
+        return settings.admin_allow_all_users
+    return user.email.lower() in {email.lower() for email in admin_emails}
+
+
+def _ticket_signature(payload: str) -> str:
+    return hmac.new(get_settings().secret_key.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def issue_stream_ticket(user: User, purpose: str) -> tuple[str, datetime]:
+    """Short-lived signed ticket letting ``user`` open one kind of stream, for clients that cannot send headers.
+
+    It stands in for the session token in URLs, which end up in logs and history: it expires after
+    ``events_ticket_seconds`` and is accepted for ``purpose`` only.
+    """
+    expires = int(time.time()) + get_settings().events_ticket_seconds
+    payload = f"{purpose}.{user.id}.{expires}"
+    return f"{payload}.{_ticket_signature(payload)}", datetime.utcfromtimestamp(expires)
+
+
+def get_user_by_ticket(db: Session, ticket: str, purpose: str) -> User | None:
+    payload, _, signature = ticket.rpartition(".")
+    if not hmac.compare_digest(signature, _ticket_signature(payload)):
+        return None
+    ticket_purpose, user_id, expires = (payload.split(".") + ["", "", ""])[:3]
+    if ticket_purpose != purpose or not user_id.isdigit() or not expires.isdigit() or int(expires) < time.time():
+        return None
+    return db.get(User, int(user_id))
+
+
 def get_user_by_token(db: Session, token: str) -> User | None:
     session = (
         db.query(SessionToken)
@@ -0,0 +1,611 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import CatalogSequence, MuseumCoin, OnlineCoin
+from app.services.snapshots import Snapshot, SnapshotError, latest_version, open_snapshot, write_snapshot
+from app.services.warmup import register_warmer
+
+
+logger = logging.getLogger("app.catalog")
+
+
+CATEGORICAL_COLUMNS = ("mint", "authority", "denomination", "metal", "die_axis")
+FLOAT_COLUMNS = ("weight", "diameter", "date_earliest", "date_latest")
+INTEGER_COLUMNS = frozenset({"date_earliest", "date_latest"})
+TEXT_COLUMNS = (
+    "obverse_inscription",
+    "reverse_inscription",
+    "obverse_description",
+    "reverse_description",
+    "reference_list",
+    "obverse_image_key",
+    "reverse_image_key",
+)
+# Refreshes append changed rows and retire the old copies; past this share of dead rows the snapshot is reloaded.
+COMPACT_RATIO = 0.25
+LOAD_BATCH_SIZE = 5000
+# Keys per IN (...) list when loading or stamping specific rows.
+KEY_BATCH_SIZE = 500
+
+
+class PackedStrings:
+    """Strings stored back to back in one UTF-8 buffer; row ``i`` is ``buffer[offsets[i]:offsets[i + 1]]``."""
+
+    __slots__ = ("buffer", "offsets", "nulls")
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, nulls: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def pack(cls, values: Sequence[str | None]) -> PackedStrings:
+        encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, nulls)
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def __getitem__(self, index: int) -> str | None:
+        if self.nulls[index]:
+            return None
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def concat(self, other: PackedStrings) -> PackedStrings:
+        return PackedStrings(
+            np.concatenate([self.buffer, other.buffer]),
+            np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]),
+            np.concatenate([self.nulls, other.nulls]),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + self.offsets.nbytes + self.nulls.nbytes
+
+    def arrays(self, prefix: str) -> dict[str, np.ndarray]:
+        return {f"{prefix}.buffer": self.buffer, f"{prefix}.offsets": self.offsets, f"{prefix}.nulls": self.nulls}
+
+    @classmethod
+    def from_arrays(cls, snapshot: Snapshot, prefix: str) -> PackedStrings:
+        return cls(snapshot[f"{prefix}.buffer"], snapshot[f"{prefix}.offsets"], snapshot[f"{prefix}.nulls"])
+
+
+class CodedStrings:
+    """Low-cardinality strings interned into a vocabulary and stored as int32 codes; -1 is None."""
+
+    __slots__ = ("vocabulary", "codes")
+
+    def __init__(self, vocabulary: list[str], codes: np.ndarray):
+        self.vocabulary = vocabulary
+        self.codes = codes
+
+    @classmethod
+    def encode(cls, values: Sequence[str | None], vocabulary: Sequence[str] = ()) -> CodedStrings:
+        vocabulary = list(vocabulary)
+        lookup = {value: code for code, value in enumerate(vocabulary)}
+        codes = np.empty(len(values), dtype=np.int32)
+        for row, value in enumerate(values):
+            if value is None:
+                codes[row] = -1
+                continue
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(vocabulary)
+                vocabulary.append(value)
+            codes[row] = code
+        return cls(vocabulary, codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str | None:
+        code = self.codes[index]
+        return None if code < 0 else self.vocabulary[code]
+
+    def concat(self, values: Sequence[str | None]) -> CodedStrings:
+        extra = CodedStrings.encode(values, self.vocabulary)
+        return CodedStrings(extra.vocabulary, np.concatenate([self.codes, extra.codes]))
+
+    def matching(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Rows whose value satisfies ``predicate``, evaluated once per distinct value."""
+        table = np.fromiter((predicate(value) for value in self.vocabulary), dtype=bool, count=len(self.vocabulary))
+        # Code -1 indexes the trailing False, so None never matches.
+        return np.append(table, False)[self.codes]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(value) for value in self.vocabulary)
+
+
+@dataclass(frozen=True)
+class CatalogSpec:
+    model: type
+    key: str
+    text_columns: tuple[str, ...]
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (self.key, "change_seq", *CATEGORICAL_COLUMNS, *FLOAT_COLUMNS, *self.text_columns)
+
+    @property
+    def tracked(self) -> tuple[str, ...]:
+        """Columns whose changes move a row to a new change sequence."""
+        return tuple(column for column in self.columns if column != "change_seq")
+
+    @property
+    def name(self) -> str:
+        return self.model.__tablename__
+
+
+SPECS = {
+    MuseumCoin: CatalogSpec(MuseumCoin, "coin_id", TEXT_COLUMNS),
+    OnlineCoin: CatalogSpec(OnlineCoin, "id", (*TEXT_COLUMNS, "listing_reference", "cluster_id")),
+}
+
+
+class CatalogRow:
+    """Read-only view of one snapshot row; reads like the ORM object for the fields the matcher uses."""
+
+    __slots__ = ("snapshot", "index")
+
+    def __init__(self, snapshot: CatalogSnapshot, index: int):
+        self.snapshot = snapshot
+        self.index = index
+
+    def __getattr__(self, name: str):
+        return self.snapshot.value(name, self.index)
+
+    def __repr__(self) -> str:
+        return f"<CatalogRow {self.snapshot.spec.model.__name__} {self.snapshot.keys[self.index]}>"
+
+
+def _watermark(session: Session, spec: CatalogSpec) -> tuple[int, int]:
+    model = spec.model
+    count, sequence = session.query(func.count(getattr(model, spec.key)), func.max(model.change_seq)).one()
+    return count, sequence or 0
+
+
+class CatalogSnapshot:
+    """Matching-relevant columns of one coin table as NumPy arrays and packed strings instead of ORM objects.
+
+    Snapshots are immutable: ``refreshed`` returns a new snapshot, so readers holding the old one are unaffected.
+    The watermark is the table's row count and highest ``change_seq``; sequences are handed out in commit order,
+    so every row committed after a snapshot was taken carries a higher one.
+    """
+
+    def __init__(
+        self,
+        spec: CatalogSpec,
+        keys: PackedStrings,
+        sequence: np.ndarray,
+        categorical: dict[str, CodedStrings],
+        floats: dict[str, np.ndarray],
+        text: dict[str, PackedStrings],
+        alive: np.ndarray,
+        watermark: tuple = (0, 0),
+        version: int = 0,
+        mapped: bool = False
+    ):
+        self.spec = spec
+        self.keys = keys
+        self.sequence = sequence
+        self.categorical = categorical
+        self.floats = floats
+        self.text = text
+        self.alive = alive
+        self.watermark = watermark
+        # Newest published version this snapshot is at least as fresh as; ``mapped`` if it is that file unchanged.
+        self.version = version
+        self.mapped = mapped
+        self._positions: dict[str, int] | None = None
+        self._order: np.ndarray | None = None
+
+    @classmethod
+    def load(
+        cls,
+        session: Session,
+        spec: CatalogSpec,
+        since: int | None = None,
+        version: int = 0,
+        keys: Iterable[str] | None = None
+    ) -> CatalogSnapshot:
+        """Load the table, only rows stamped after ``since``, or only the rows of ``keys`` (which keeps no watermark)."""
+        model = spec.model
+        key_column = getattr(model, spec.key)
+        watermark = _watermark(session, spec) if keys is None else (0, 0)
+        query = session.query(*(getattr(model, column) for column in spec.columns))
+        if since is not None:
+            query = query.filter(model.change_seq > since)
+        if keys is None:
+            rows = query.order_by(key_column).yield_per(LOAD_BATCH_SIZE)
+        else:
+            keys = sorted(keys)
+            rows = chain.from_iterable(
+                query.filter(key_column.in_(keys[start:start + KEY_BATCH_SIZE])).order_by(key_column)
+                for start in range(0, len(keys), KEY_BATCH_SIZE)
+            )
+        columns: list[list] = [[] for _ in spec.columns]
+        for row in rows:
+            for values, value in zip(columns, row):
+                values.append(value)
+        data = dict(zip(spec.columns, columns))
+        return cls(
+            spec,
+            keys=PackedStrings.pack(data[spec.key]),
+            sequence=np.array([value or 0 for value in data["change_seq"]], dtype=np.int64),
+            categorical={name: CodedStrings.encode(data[name]) for name in CATEGORICAL_COLUMNS},
+            floats={
+                name: np.array([np.nan if value is None else value for value in data[name]], dtype=np.float64)
+                for name in FLOAT_COLUMNS
+            },
+            text={name: PackedStrings.pack(data[name]) for name in spec.text_columns},
+            alive=np.ones(len(data[spec.key]), dtype=bool),
+            watermark=watermark,
+            version=version,
+        )
+
+    @classmethod
+    def from_snapshot(cls, spec: CatalogSpec, snapshot: Snapshot) -> CatalogSnapshot:
+        """Wrap a mapped snapshot file; every array stays a read-only view of the shared mapping."""
+        meta = snapshot.meta
+        if meta.get("columns") != list(spec.columns):
+            raise SnapshotError(f"{snapshot.path} was written for different columns")
+        return cls(
+            spec,
+            keys=PackedStrings.from_arrays(snapshot, "keys"),
+            sequence=snapshot["sequence"],
+            categorical={
+                name: CodedStrings(
+                    list(PackedStrings.from_arrays(snapshot, f"{name}.vocabulary")), snapshot[f"{name}.codes"]
+                )
+                for name in CATEGORICAL_COLUMNS
+            },
+            floats={name: snapshot[name] for name in FLOAT_COLUMNS},
+            text={name: PackedStrings.from_arrays(snapshot, name) for name in spec.text_columns},
+            alive=snapshot["alive"],
+            watermark=tuple(meta["watermark"]),
+            version=snapshot.version,
+            mapped=True,
+        )
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict]:
+        arrays = {"sequence": self.sequence, "alive": self.alive, **self.keys.arrays("keys")}
+        for name, column in self.categorical.items():
+            arrays[f"{name}.codes"] = column.codes
+            arrays.update(PackedStrings.pack(column.vocabulary).arrays(f"{name}.vocabulary"))
+        arrays.update(self.floats)
+        for name, column in self.text.items():
+            arrays.update(column.arrays(name))
+        meta = {"columns": list(self.spec.columns), "watermark": list(self.watermark)}
+        return arrays, meta
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def live_count(self) -> int:
+        return int(self.alive.sum())
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.keys.nbytes + self.sequence.nbytes + self.alive.nbytes
+            + sum(column.nbytes for column in self.categorical.values())
+            + sum(column.nbytes for column in self.floats.values())
+            + sum(column.nbytes for column in self.text.values())
+        )
+
+    def value(self, name: str, index: int):
+        if name in self.categorical:
+            return self.categorical[name][index]
+        if name in self.floats:
+            value = self.floats[name][index]
+            if np.isnan(value):
+                return None
+            return int(value) if name in INTEGER_COLUMNS else float(value)
+        if name in self.text:
+            return self.text[name][index]
+        if name == self.spec.key:
+            return self.keys[index]
+        raise AttributeError(name)
+
+    def positions(self) -> dict[str, int]:
+        """Row index of every live key."""
+        if self._positions is None:
+            self._positions = {self.keys[index]: int(index) for index in np.flatnonzero(self.alive)}
+        return self._positions
+
+    def key_order(self) -> np.ndarray:
+        """Live row indices sorted by key, matching ``ORDER BY`` on the primary key."""
+        if self._order is None:
+            live = np.flatnonzero(self.alive)
+            keys = np.array([self.keys[index] for index in live], dtype=object)
+            self._order = live[np.argsort(keys, kind="stable")]
+        return self._order
+
+    def row(self, index: int) -> CatalogRow:
+        return CatalogRow(self, index)
+
+    def rows(self, indices: Iterable[int] | None = None) -> Iterator[CatalogRow]:
+        for index in (np.flatnonzero(self.alive) if indices is None else indices):
+            yield CatalogRow(self, int(index))
+
+    def contains(self, name: str, needle: str) -> np.ndarray:
+        """Case-insensitive substring match on a categorical column, like ``ILIKE '%needle%'``."""
+        needle = needle.lower()
+        return self.categorical[name].matching(lambda value: needle in value.lower())
+
+    def overlapping(self, earliest: int | None, latest: int | None, slack: int = 0) -> np.ndarray:
+        """Same rule as ``dates.overlap_condition``: undated rows always pass."""
+        starts, ends = self.floats["date_earliest"], self.floats["date_latest"]
+        overlaps = np.ones(len(self), dtype=bool)
+        if latest is not None:
+            overlaps &= starts <= latest + slack
+        if earliest is not None:
+            overlaps &= ends >= earliest - slack
+        return np.isnan(starts) | overlaps
+
+    def within_tolerance(self, name: str, value: float | None, tolerance: float) -> np.ndarray:
+        """Rows within ± tolerance of ``value``; unmeasured rows pass, as in the matcher prefilter."""
+        measured = self.floats[name]
+        if value is None:
+            return np.ones(len(self), dtype=bool)
+        return np.isnan(measured) | (np.abs(measured - value) <= tolerance)
+
+    def refreshed(self, session: Session) -> CatalogSnapshot:
+        """Apply rows added or updated since this snapshot's watermark; reload fully after deletions."""
+        watermark = _watermark(session, self.spec)
+        if watermark == self.watermark:
+            return self
+        changed = CatalogSnapshot.load(session, self.spec, since=self.watermark[1])
+        positions = self.positions()
+        fresh, retired = [], []
+        for index in range(len(changed)):
+            current = positions.get(changed.keys[index])
+            if current is None:
+                fresh.append(index)
+            elif self.sequence[current] != changed.sequence[index]:
+                fresh.append(index)
+                retired.append(current)
+        alive = self.alive.copy()
+        alive[retired] = False
+        merged = self._extended(changed, np.array(fresh, dtype=np.intp), alive, watermark)
+        if merged.live_count != watermark[0] or (len(merged) - merged.live_count) > COMPACT_RATIO * len(merged):
+            return CatalogSnapshot.load(session, self.spec, version=self.version)
+        return merged
+
+    def overlaid(self, session: Session, keys: Iterable[str]) -> CatalogSnapshot:
+        """This snapshot with ``keys`` replaced by their rows as ``session`` sees them; keys it cannot see are retired."""
+        keys = set(keys)
+        changed = CatalogSnapshot.load(session, self.spec, keys=keys)
+        positions = self.positions()
+        alive = self.alive.copy()
+        alive[[positions[key] for key in keys if key in positions]] = False
+        return self._extended(changed, np.arange(len(changed)), alive, self.watermark)
+
+    def _extended(self, other: CatalogSnapshot, indices: np.ndarray, alive: np.ndarray, watermark: tuple) -> CatalogSnapshot:
+        if not len(indices):
+            return CatalogSnapshot(
+                self.spec, self.keys, self.sequence, self.categorical, self.floats, self.text, alive, watermark, self.version
+            )
+
+        def strings(column: PackedStrings) -> PackedStrings:
+            return PackedStrings.pack([column[index] for index in indices])
+
+        return CatalogSnapshot(
+            self.spec,
+            keys=self.keys.concat(strings(other.keys)),
+            sequence=np.concatenate([self.sequence, other.sequence[indices]]),
+            categorical={
+                name: column.concat([other.categorical[name][index] for index in indices])
+                for name, column in self.categorical.items()
+            },
+            floats={name: np.concatenate([column, other.floats[name][indices]]) for name, column in self.floats.items()},
+            text={name: column.concat(strings(other.text[name])) for name, column in self.text.items()},
+            alive=np.concatenate([alive, np.ones(len(indices), dtype=bool)]),
+            watermark=watermark,
+            version=self.version,
+        )
+
+
+_catalogs: dict[type, CatalogSnapshot] = {}
+_catalog_lock = threading.Lock()
+_unreadable: set[Path] = set()
+_publisher: ThreadPoolExecutor | None = None
+_pending: set[type] = set()
+_publish_lock = threading.Lock()
+_CHANGED_KEY = "catalog_changed_models"
+
+
+def snapshot_root() -> Path:
+    return Path(get_settings().catalog_snapshot_dir).resolve()
+
+
+def _newer_published(spec: CatalogSpec, version: int) -> CatalogSnapshot | None:
+    """The newest published snapshot of a table, mapped, if it is newer than ``version``."""
+    latest = latest_version(snapshot_root(), spec.name)
+    if latest is None or latest[0] <= version or latest[1] in _unreadable:
+        return None
+    try:
+        return CatalogSnapshot.from_snapshot(spec, open_snapshot(latest[1], latest[0]))
+    except (OSError, SnapshotError, KeyError, ValueError) as exc:
+        _unreadable.add(latest[1])
+        logger.warning("Ignoring catalog snapshot %s: %s", latest[1], exc)
+        return None
+
+
+def get_catalog(model: type) -> CatalogSnapshot:
+    """Current snapshot of a coin table, refreshed from the change-sequence watermark on each call.
+
+    The snapshot is shared by the whole process, so it is refreshed in a session of its own and only ever
+    reflects committed rows; a caller's pending changes, which may still roll back, never reach it.
+
+    When snapshots are enabled, a newer published version is mapped first (a hot swap: callers holding the
+    previous snapshot keep using it), so workers share its pages and only replay rows changed since then.
+    """
+    spec = SPECS[model]
+    with _catalog_lock, session_scope() as session:
+        current = _catalogs.get(model)
+        if get_settings().catalog_snapshots_enabled:
+            current = _newer_published(spec, current.version if current is not None else 0) or current
+        current = current.refreshed(session) if current is not None else CatalogSnapshot.load(session, spec)
+        _catalogs[model] = current
+        return current
+
+
+def uncommitted_changes(session: Session, model: type) -> set[str] | None:
+    """Keys of ``model`` rows the session changed but has not committed; None if the whole table may have changed."""
+    session.flush()
+    return session.info.get(_CHANGED_KEY, {}).get(model, set())
+
+
+def session_catalog(session: Session, model: type) -> CatalogSnapshot:
+    """The shared snapshot with the session's uncommitted changes to ``model`` laid over it.
+
+    A caller that writes coins and then matches in the same transaction (a sync followed by a match run) sees
+    its own rows without committing first. The overlay belongs to the caller: it is neither cached nor published.
+    """
+    changed = uncommitted_changes(session, model)
+    if changed is None:
+        return CatalogSnapshot.load(session, SPECS[model])
+    snapshot = get_catalog(model)
+    return snapshot.overlaid(session, changed) if changed else snapshot
+
+
+def publish_catalog(model: type) -> int | None:
+    """Write the table's current snapshot as a new version; returns None if the newest version is already current."""
+    snapshot = get_catalog(model)
+    if snapshot.mapped:
+        return None
+    arrays, meta = snapshot.to_arrays()
+    settings = get_settings()
+    return write_snapshot(snapshot_root(), snapshot.spec.name, arrays, meta, keep=settings.catalog_snapshot_keep)
+
+
+def _publish_pending(models: set[type]) -> None:
+    with _publish_lock:
+        _pending.difference_update(models)
+    try:
+        for model in models:
+            publish_catalog(model)
+    except Exception:
+        logger.exception("Publishing catalog snapshots failed")
+
+
+def schedule_publish(models: Iterable[type]) -> None:
+    """Publish snapshots of ``models`` on a background thread; requests queued behind a pending one coalesce."""
+    global _publisher
+    with _publish_lock:
+        fresh = set(models) - _pending
+        _pending.update(fresh)
+        if not fresh:
+            return
+        if _publisher is None:
+            _publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-publish")
+    _publisher.submit(_publish_pending, fresh)
+
+
+def mark_catalog_changed(session: Session, model: type, keys: Iterable[str] | None = None) -> None:
+    """Record rows changed outside the unit of work (a bulk UPDATE) so the commit stamps them and publishes.
+
+    Without ``keys`` every row of the table is stamped, for statements that may have touched any of them.
+    """
+    changed = session.info.setdefault(_CHANGED_KEY, {})
+    if keys is None:
+        changed[model] = None
+    elif changed.setdefault(model, set()) is not None:
+        changed[model].update(keys)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_changes(session: Session, flush_context) -> None:
+    # Tracked after the flush so changes other before_flush listeners make (cluster ids) are seen as well.
+    for instance in chain(session.new, session.dirty, session.deleted):
+        spec = SPECS.get(type(instance))
+        if spec is None:
+            continue
+        state = inspect(instance)
+        if instance in session.deleted:
+            # Deleted keys stamp nothing; they are tracked so session overlays retire them. Shared snapshots see
+            # deletions as a lower row count and reload.
+            mark_catalog_changed(session, spec.model, (getattr(instance, spec.key),))
+        elif state.pending or any(state.attrs[column].history.has_changes() for column in spec.tracked):
+            mark_catalog_changed(session, spec.model, (getattr(instance, spec.key),))
+
+
+def _next_sequence(session: Session, name: str) -> int:
+    result = session.execute(
+        update(CatalogSequence).where(CatalogSequence.name == name).values(value=CatalogSequence.value + 1)
+    )
+    if not result.rowcount:
+        try:
+            with session.begin_nested():
+                session.execute(insert(CatalogSequence).values(name=name, value=1))
+        except IntegrityError:
+            # Another writer created the sequence first.
+            session.execute(
+                update(CatalogSequence).where(CatalogSequence.name == name).values(value=CatalogSequence.value + 1)
+            )
+    return session.scalar(select(CatalogSequence.value).where(CatalogSequence.name == name))
+
+
+@event.listens_for(Session, "before_commit")
+def _stamp_catalog_changes(session: Session) -> None:
+    """Give the rows this transaction changed the table's next change sequence, as the last write before commit.
+
+    The sequence row stays locked until the commit, so transactions take sequences in the order they commit and
+    a snapshot refreshed from ``change_seq > watermark`` cannot miss a row committed later with a lower one.
+    """
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    changed = session.info.get(_CHANGED_KEY)
+    if not changed:
+        return
+    for model, keys in sorted(changed.items(), key=lambda item: SPECS[item[0]].name):
+        if keys is not None and not keys:
+            continue
+        spec = SPECS[model]
+        table = model.__table__
+        # Setting updated_at to itself keeps its onupdate default from firing: restamping is not an edit.
+        stamp = update(table).values(change_seq=_next_sequence(session, spec.name), updated_at=table.c.updated_at)
+        if keys is None:
+            session.execute(stamp)
+            continue
+        keys = sorted(keys)
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            session.execute(stamp.where(table.c[spec.key].in_(keys[start:start + KEY_BATCH_SIZE])))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed and get_settings().catalog_snapshots_enabled:
+        schedule_publish(changed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_catalog_changes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
+
+
+register_warmer("museum-catalog", lambda session: get_catalog(MuseumCoin))
+register_warmer("online-catalog", lambda session: get_catalog(OnlineCoin))
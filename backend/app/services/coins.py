@@ -5,6 +5,9 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from app.models import MuseumCoin, OnlineCoin
+from app.services.dates import date_bounds
+from app.services.facets import facet_condition
+from app.services.stats import MUSEUM_COINS, ONLINE_COINS, stage_counter
 from datetime import datetime
 
 
@@ -14,9 +17,13 @@ def list_museum_coins(
     authority: Optional[str] = None,
     search: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    facet_ids: Sequence[int] = ()
 ) -> Sequence[MuseumCoin]:
     query = db.query(MuseumCoin)
+    faceted = facet_condition(db, MuseumCoin, facet_ids)
+    if faceted is not None:
+        query = query.filter(faceted)
     if mint:
         query = query.filter(MuseumCoin.mint.ilike(f"%{mint}%"))
     if authority:
@@ -36,21 +43,52 @@ def get_museum_coin(db: Session, coin_id: str) -> MuseumCoin | None:
     return db.query(MuseumCoin).filter(MuseumCoin.coin_id == coin_id).first()
 
 
-def upsert_museum_coin(db: Session, payload: dict) -> MuseumCoin:
+def get_coins_by_ids(db: Session, model: type[MuseumCoin] | type[OnlineCoin], ids: Sequence[str]) -> dict[str, MuseumCoin | OnlineCoin]:
+    """Coins keyed by id, fetched with a single ``IN`` query; ids that do not exist are simply absent."""
+    key = MuseumCoin.coin_id if model is MuseumCoin else OnlineCoin.id
+    if not ids:
+        return {}
+    return {getattr(coin, key.key): coin for coin in db.query(model).filter(key.in_(ids))}
+
+
+def payload_coin_id(payload: dict) -> str:
     coin_id = str(payload.get("coin_id") or payload.get("id") or "")
     if not coin_id:
         raise ValueError("coin_id is required")
+    return coin_id
+
+
+def _optional_float(payload: dict, key: str) -> float | None:
+    value = payload.get(key)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{key} must be numeric") from exc
+
+
+def upsert_museum_coin(db: Session, payload: dict) -> MuseumCoin:
+    coin_id = payload_coin_id(payload)
     coin = get_museum_coin(db, coin_id)
     if not coin:
         coin = MuseumCoin(coin_id=coin_id)
         db.add(coin)
+        stage_counter(db, MUSEUM_COINS)
+    return apply_museum_coin_fields(coin, payload)
+
+
+def apply_museum_coin_fields(coin: MuseumCoin, payload: dict) -> MuseumCoin:
+    weight = _optional_float(payload, "weight")
+    diameter = _optional_float(payload, "diameter")
     coin.mint = payload.get("mint") or coin.mint or ""
     coin.authority = payload.get("authority") or coin.authority or ""
     coin.date_range = payload.get("date_range") or coin.date_range or ""
+    coin.date_earliest, coin.date_latest = date_bounds(coin.date_range)
     coin.denomination = payload.get("denomination") or coin.denomination or ""
     coin.metal = payload.get("metal") or coin.metal or ""
-    coin.weight = payload.get("weight")
-    coin.diameter = payload.get("diameter")
+    coin.weight = weight
+    coin.diameter = diameter
     coin.die_axis = payload.get("die_axis")
     coin.obverse_description = payload.get("obverse_description") or coin.obverse_description or ""
     coin.reverse_description = payload.get("reverse_description") or coin.reverse_description or ""
@@ -78,15 +116,22 @@ def upsert_museum_coin(db: Session, payload: dict) -> MuseumCoin:
 
 
 def upsert_online_coin(db: Session, payload: dict) -> OnlineCoin:
-    coin_id = str(payload.get("coin_id") or payload.get("id") or "")
-    if not coin_id:
-        raise ValueError("coin_id is required")
+    coin_id = payload_coin_id(payload)
     coin = db.query(OnlineCoin).filter(OnlineCoin.id == coin_id).first()
     if not coin:
         coin = OnlineCoin(id=coin_id)
         db.add(coin)
+        stage_counter(db, ONLINE_COINS)
+    return apply_online_coin_fields(coin, payload)
+
+
+def apply_online_coin_fields(coin: OnlineCoin, payload: dict) -> OnlineCoin:
+    coin_id = coin.id
+    weight = _optional_float(payload, "weight")
+    diameter = _optional_float(payload, "diameter")
+    similarity_score = float(payload.get("similarity_score") or payload.get("score") or coin.similarity_score or 0.0)
     coin.museum_coin_id = payload.get("museum_coin_id")
-    coin.similarity_score = float(payload.get("similarity_score") or payload.get("score") or coin.similarity_score or 0.0)
+    coin.similarity_score = similarity_score
     coin.listing_reference = payload.get("listing_reference") or payload.get("title") or coin_id
     coin.sale_date = payload.get("sale_date")
     coin.estimate_value = payload.get("estimate_value")
@@ -96,10 +141,11 @@ def upsert_online_coin(db: Session, payload: dict) -> OnlineCoin:
     coin.mint = payload.get("mint")
     coin.authority = payload.get("authority")
     coin.date_range = payload.get("date_range")
+    coin.date_earliest, coin.date_latest = date_bounds(coin.date_range)
     coin.denomination = payload.get("denomination")
     coin.metal = payload.get("metal")
-    coin.weight = payload.get("weight")
-    coin.diameter = payload.get("diameter")
+    coin.weight = weight
+    coin.diameter = diameter
     coin.die_axis = payload.get("die_axis")
     coin.obverse_description = payload.get("obverse_description")
     coin.reverse_description = payload.get("reverse_description")
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column, Table, select
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import MatchRecord, OnlineCoin
+from app.services.exports import EXPORT_TABLES
+
+
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+PARTITION_KEYS = ("source_name", "sale_year")
+# Same placeholder pyarrow and Hive use, so partitioned datasets read back with ``partitioning="hive"``.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+COMPRESSION = "zstd"
+
+_ARROW_TYPES = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_(), datetime: pa.timestamp("us")}
+_YEAR = re.compile(r"(?<!\d)(\d{4})(?!\d)")
+
+
+def arrow_schema(table: Table) -> pa.Schema:
+    return pa.schema([pa.field(column.name, _arrow_type(column), nullable=column.nullable) for column in table.columns])
+
+
+def _arrow_type(column: Column) -> pa.DataType:
+    return _ARROW_TYPES[column.type.python_type]
+
+
+def sale_year(sale_date: str | None) -> int | None:
+    """Year of a free-text sale date such as ``2024-01-15`` or ``15 Jan 2024``."""
+    match = _YEAR.search(sale_date or "")
+    return int(match.group(1)) if match else None
+
+
+def _partition_column(dataset: str, partition_by: str):
+    """Listing column a dataset is partitioned on; matches take it from their candidate listing."""
+    if dataset not in ("online-coins", "matches"):
+        raise ValueError(f"'{dataset}' cannot be partitioned; only online-coins and matches can")
+    if partition_by not in PARTITION_KEYS:
+        raise ValueError(f"Unsupported partition key '{partition_by}'")
+    return OnlineCoin.source_name if partition_by == "source_name" else OnlineCoin.sale_date
+
+
+def _partition_value(partition_by: str, value) -> str:
+    if partition_by == "sale_year":
+        value = sale_year(value)
+    return NULL_PARTITION if value in (None, "") else quote(str(value), safe="")
+
+
+class _PartitionedWriter:
+    """One open Parquet or Arrow IPC writer per partition directory, fed buffered record batches."""
+
+    def __init__(self, root: Path, schema: pa.Schema, export_format: str, partition_by: str | None, row_group_size: int):
+        self.root = root
+        self.schema = schema
+        self.export_format = export_format
+        self.partition_by = partition_by
+        self.row_group_size = row_group_size
+        self.writers: dict[str, object] = {}
+        self.rows: dict[str, int] = {}
+        self.pending: dict[str, list[tuple]] = {}
+        self.pending_rows = 0
+
+    def _path(self, partition: str | None) -> Path:
+        directory = self.root if partition is None else self.root / f"{self.partition_by}={partition}"
+        return directory / f"part-0{COLUMNAR_FORMATS[self.export_format]}"
+
+    def _writer(self, partition: str | None):
+        writer = self.writers.get(partition)
+        if writer is None:
+            path = self._path(partition)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.export_format == "parquet":
+                writer = pq.ParquetWriter(path, self.schema, compression=COMPRESSION)
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+                writer = pa.ipc.new_file(pa.OSFile(str(path), "wb"), self.schema, options=options)
+            self.writers[partition] = writer
+        return writer
+
+    def add(self, partition: str | None, rows: list[tuple]) -> None:
+        self.pending.setdefault(partition, []).extend(rows)
+        self.pending_rows += len(rows)
+        # Buffering across fetch batches keeps row groups large; the cap bounds memory however many partitions.
+        if self.pending_rows >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for partition, rows in self.pending.items():
+            columns = zip(*rows)
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema
+            )
+            writer = self._writer(partition)
+            if self.export_format == "parquet":
+                writer.write_batch(batch, row_group_size=self.row_group_size)
+            else:
+                writer.write_batch(batch)
+            self.rows[partition] = self.rows.get(partition, 0) + len(rows)
+        self.pending.clear()
+        self.pending_rows = 0
+
+    def close(self) -> list[dict]:
+        self.flush()
+        if not self.writers and self.partition_by is None:
+            # An empty table still gets a file, so readers find its schema.
+            self._writer(None)
+            self.rows[None] = 0
+        for writer in self.writers.values():
+            writer.close()
+        return [
+            {"path": str(self._path(partition).relative_to(self.root)), "rows": rows}
+            for partition, rows in sorted(self.rows.items(), key=lambda item: item[0] or "")
+        ]
+
+
+def export_columnar(
+    dataset: str,
+    export_format: str = "parquet",
+    partition_by: str | None = None,
+    output_dir: str | Path | None = None,
+    batch_size: int | None = None
+) -> dict:
+    """Write one table as compressed Parquet or Arrow IPC files under ``<output_dir>/<dataset>``.
+
+    Rows stream from a server-side cursor in ``batch_size`` chunks and are written out in row groups of
+    ``COINMATCH_EXPORT_ROW_GROUP_SIZE``, so memory stays bounded however large the table is. The files are
+    written into a temporary directory that replaces the previous export only once complete.
+    """
+    table = EXPORT_TABLES.get(dataset)
+    if table is None:
+        raise ValueError(f"Unknown export dataset '{dataset}'")
+    if export_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}'")
+    settings = get_settings()
+    batch_size = batch_size or settings.export_batch_size
+    output = Path(output_dir or settings.export_dir).resolve()
+    statement = select(*table.columns)
+    if partition_by:
+        key = _partition_column(dataset, partition_by)
+        statement = statement.add_columns(key)
+        if table is MatchRecord.__table__:
+            statement = statement.outerjoin(OnlineCoin, OnlineCoin.id == MatchRecord.candidate_id)
+    statement = statement.order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+
+    start = time.perf_counter()
+    output.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=output, prefix=f".tmp-{dataset}-"))
+    try:
+        writer = _PartitionedWriter(staging, arrow_schema(table), export_format, partition_by, settings.export_row_group_size)
+        try:
+            with session_scope() as session:
+                for rows in session.execute(statement).partitions():
+                    if not partition_by:
+                        writer.add(None, [tuple(row) for row in rows])
+                        continue
+                    grouped: dict[str, list[tuple]] = {}
+                    for row in rows:
+                        grouped.setdefault(_partition_value(partition_by, row[-1]), []).append(tuple(row[:-1]))
+                    for partition, members in grouped.items():
+                        writer.add(partition, members)
+        finally:
+            files = writer.close()
+        target = output / dataset
+        if target.exists():
+            retired = output / f".old-{dataset}-{time.time_ns()}"
+            target.rename(retired)
+            staging.rename(target)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            staging.rename(target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return {
+        "dataset": dataset,
+        "format": export_format,
+        "partitionBy": partition_by,
+        "path": str(target),
+        "rows": sum(item["rows"] for item in files),
+        "bytes": sum((target / item["path"]).stat().st_size for item in files),
+        "files": files,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
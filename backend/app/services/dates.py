@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import NamedTuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only
+
+from app.models import MuseumCoin, OnlineCoin
+
+
+CIRCA_MARGIN = 10
+UNCERTAIN_MARGIN = 25
+OPEN_ENDED_SPAN = 50
+
+_TOKEN = re.compile(
+    r"(?P<era>\b(?:bce|bc|b\.c\.e?\.?|ce|ad|a\.d\.)(?![a-z]))"
+    r"|(?P<qualifier>\b(?:early|late|mid|middle|(?:first|1st) half|(?:second|2nd) half)\b)"
+    r"|(?P<ordinal>\b\d{1,2}(?:st|nd|rd|th)\b)"
+    r"|(?P<year>\b\d{1,4}\b)"
+    r"|(?P<open>\b(?:after|before|from|until)\b)"
+)
+_CIRCA = re.compile(r"\b(?:circa|ca\.?|c\.|c)\s*(?=\d)")
+_CENTURY = re.compile(r"centur|\bcent\b|\d(?:st|nd|rd|th)\s*c\b")
+# Fractions of a century for each qualifier, in chronological order.
+_QUALIFIERS = {
+    "early": (0.0, 1 / 3),
+    "mid": (1 / 3, 2 / 3),
+    "middle": (1 / 3, 2 / 3),
+    "late": (2 / 3, 1.0),
+    "first half": (0.0, 0.5),
+    "1st half": (0.0, 0.5),
+    "second half": (0.5, 1.0),
+    "2nd half": (0.5, 1.0),
+}
+
+
+class DateInterval(NamedTuple):
+    """Signed-year interval (BC years negative) with a symmetric uncertainty margin."""
+
+    start: int
+    end: int
+    margin: int = 0
+
+    @property
+    def earliest(self) -> int:
+        return self.start - self.margin
+
+    @property
+    def latest(self) -> int:
+        return self.end + self.margin
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return re.sub(r"[‐-―−]|\bto\b", "-", folded)
+
+
+def _century(number: int, bc: bool, qualifier: str | None) -> tuple[int, int]:
+    if bc:
+        start, end = -number * 100, -(number - 1) * 100 - 1
+    else:
+        start, end = (number - 1) * 100 + 1, number * 100
+    if qualifier:
+        low, high = _QUALIFIERS[qualifier]
+        span = end - start
+        start, end = start + round(span * low), start + round(span * high)
+    return start, end
+
+
+def parse_date_range(text: str | None) -> DateInterval | None:
+    if not text:
+        return None
+    folded = _fold(text)
+    margin = CIRCA_MARGIN if _CIRCA.search(folded) else 0
+    if "?" in folded or "uncertain" in folded:
+        margin = max(margin, UNCERTAIN_MARGIN)
+    centuries = bool(_CENTURY.search(folded))
+
+    tokens: list[tuple[str, str]] = [
+        (match.lastgroup, match.group(match.lastgroup)) for match in _TOKEN.finditer(folded)
+    ]
+    # Each number takes an era written right after it ("272 BC"), or right before it ("AD 117");
+    # the rest inherit the next explicit era, else the previous one ("281-272 BC", "AD 117-138").
+    numbers: list[dict] = []
+    qualifier = None
+    open_word = None
+    for index, (kind, value) in enumerate(tokens):
+        if kind == "qualifier":
+            qualifier = value
+        elif kind == "open":
+            open_word = value
+        elif kind in ("ordinal", "year"):
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            preceding = tokens[index - 1] if index else None
+            era = None
+            if following and following[0] == "era":
+                era = following[1]
+            elif preceding and preceding[0] == "era" and preceding[1].startswith(("ad", "a.d", "ce")):
+                era = preceding[1]
+            numbers.append({
+                "value": int(re.match(r"\d+", value).group()),
+                "century": kind == "ordinal" or centuries,
+                "era": era,
+                "qualifier": qualifier,
+                "open": open_word,
+            })
+            qualifier = None
+            open_word = None
+    if not numbers:
+        return None
+    for index, number in enumerate(numbers):
+        if number["era"] is None:
+            later = next((item["era"] for item in numbers[index + 1:] if item["era"]), None)
+            earlier = next((item["era"] for item in reversed(numbers[:index]) if item["era"]), None)
+            number["era"] = later or earlier or "ad"
+
+    starts: list[int] = []
+    ends: list[int] = []
+    for number in numbers:
+        bc = number["era"].startswith("b")
+        value = number["value"]
+        if number["century"]:
+            if not 1 <= value <= 21:
+                continue
+            start, end = _century(value, bc, number["qualifier"])
+        else:
+            if not 1 <= value <= 2100:
+                continue
+            start = end = -value if bc else value
+        if number["open"] in ("after", "from") and len(numbers) == 1:
+            end = start + OPEN_ENDED_SPAN
+        elif number["open"] in ("before", "until") and len(numbers) == 1:
+            start = end - OPEN_ENDED_SPAN
+        starts.append(start)
+        ends.append(end)
+    if not starts:
+        return None
+    return DateInterval(start=min(starts), end=max(ends), margin=margin)
+
+
+def date_bounds(text: str | None) -> tuple[int | None, int | None]:
+    interval = parse_date_range(text)
+    if interval is None:
+        return None, None
+    return interval.earliest, interval.latest
+
+
+def overlap_condition(model, earliest: int | None, latest: int | None, slack: int = 0):
+    """Rows whose date interval overlaps [earliest, latest]; rows without a parsed date always pass."""
+    conditions = []
+    if latest is not None:
+        conditions.append(model.date_earliest <= latest + slack)
+    if earliest is not None:
+        conditions.append(model.date_latest >= earliest - slack)
+    if not conditions:
+        return None
+    return or_(model.date_earliest.is_(None), and_(*conditions))
+
+
+def rebuild_date_index(session: Session) -> int:
+    parsed = 0
+    for model in (MuseumCoin, OnlineCoin):
+        for coin in session.query(model).options(load_only(model.date_range)).yield_per(1000):
+            coin.date_earliest, coin.date_latest = date_bounds(coin.date_range)
+            parsed += coin.date_earliest is not None
+    session.flush()
+    return parsed
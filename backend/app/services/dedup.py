@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.orm import Session, load_only
+
+from app.config import get_settings
+from app.models import ListingBand, OnlineCoin
+from app.services.catalog import mark_catalog_changed
+from app.services.references import reference_keys
+
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+MIN_SHINGLES = 4
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_WORD = re.compile(r"\w+", re.UNICODE)
+_DEDUP_FIELDS = ("lot_description_en", "lot_description_raw", "reference_list", "weight", "diameter", "die_axis")
+
+
+def _words(text: str | None) -> list[str]:
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return _WORD.findall(folded)
+
+
+def listing_shingles(coin: OnlineCoin) -> set[str]:
+    """Word 3-shingles of the lot descriptions plus catalogue references and exact measurements.
+
+    Measurements are what a relisted coin keeps verbatim across houses, so they weigh in alongside the text.
+    """
+    shingles: set[str] = set()
+    for text in (coin.lot_description_en, coin.lot_description_raw):
+        words = _words(text)
+        shingles.update(" ".join(words[index:index + 3]) for index in range(max(len(words) - 2, 0)))
+    shingles.update(f"ref:{key}" for key in reference_keys(coin.reference_list))
+    if coin.weight is not None:
+        shingles.add(f"weight:{coin.weight:.2f}")
+    if coin.diameter is not None:
+        shingles.add(f"diameter:{coin.diameter:.1f}")
+    if coin.die_axis:
+        shingles.add(f"axis:{coin.die_axis.strip().lower()}")
+    return shingles
+
+
+def minhash_signature(shingles: set[str]) -> np.ndarray:
+    hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list[str]:
+    return [
+        f"{band}:{zlib.crc32(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()):08x}"
+        for band in range(BANDS)
+    ]
+
+
+def estimated_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    return float(np.mean(first == second))
+
+
+def listing_signature(coin: OnlineCoin) -> np.ndarray | None:
+    shingles = listing_shingles(coin)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    return minhash_signature(shingles)
+
+
+def _assign_clusters(session: Session, coins: list[OnlineCoin]) -> None:
+    threshold = get_settings().dedup_similarity_threshold
+    signatures = {coin.id: listing_signature(coin) for coin in coins}
+    keys = {coin.id: band_keys(signature) for coin in coins if (signature := signatures[coin.id]) is not None}
+    ids = [coin.id for coin in coins]
+    session.execute(delete(ListingBand).where(ListingBand.online_coin_id.in_(ids)))
+
+    all_keys = {key for coin_keys in keys.values() for key in coin_keys}
+    indexed: dict[str, set[str]] = {}
+    if all_keys:
+        for key, online_id in session.query(ListingBand.band_key, ListingBand.online_coin_id).filter(
+            ListingBand.band_key.in_(all_keys)
+        ):
+            indexed.setdefault(key, set()).add(online_id)
+    stored: dict[str, OnlineCoin] = {}
+    batch = {coin.id: coin for coin in coins}
+    for coin in coins:
+        signature = signatures[coin.id]
+        if signature is None:
+            coin.cluster_id = None
+            continue
+        candidates = set().union(*(indexed.get(key, set()) for key in keys[coin.id])) - {coin.id}
+        best: tuple[float, OnlineCoin] | None = None
+        for candidate_id in sorted(candidates):
+            candidate = batch.get(candidate_id) or stored.get(candidate_id) or session.get(OnlineCoin, candidate_id)
+            if candidate is None:
+                continue
+            stored[candidate_id] = candidate
+            other = signatures.get(candidate_id)
+            if other is None and candidate_id not in batch:
+                other = listing_signature(candidate)
+            if other is None:
+                continue
+            similarity = estimated_similarity(signature, other)
+            if similarity >= threshold and (best is None or similarity > best[0]):
+                best = (similarity, candidate)
+        coin.cluster_id = (best[1].cluster_id or best[1].id) if best else coin.id
+        session.add_all(ListingBand(band_key=key, online_coin=coin) for key in keys[coin.id])
+        # Later listings in the same flush can join this one's cluster.
+        for key in keys[coin.id]:
+            indexed.setdefault(key, set()).add(coin.id)
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_listing_clusters(session: Session, flush_context, instances) -> None:
+    changed = []
+    for coin in list(session.new) + list(session.dirty):
+        if not isinstance(coin, OnlineCoin):
+            continue
+        state = inspect(coin)
+        if state.pending or any(getattr(state.attrs, name).history.has_changes() for name in _DEDUP_FIELDS):
+            changed.append(coin)
+    if changed:
+        with session.no_autoflush:
+            _assign_clusters(session, changed)
+
+
+def rebuild_listing_clusters(session: Session, batch_size: int = 500) -> int:
+    session.execute(delete(ListingBand))
+    session.query(OnlineCoin).update({OnlineCoin.cluster_id: None}, synchronize_session=False)
+    mark_catalog_changed(session, OnlineCoin)
+    session.expire_all()
+    coins = (
+        session.query(OnlineCoin)
+        .options(load_only(*(getattr(OnlineCoin, name) for name in _DEDUP_FIELDS), OnlineCoin.cluster_id))
+        .order_by(OnlineCoin.fetched_at, OnlineCoin.id)
+        .all()
+    )
+    for start in range(0, len(coins), batch_size):
+        _assign_clusters(session, coins[start:start + batch_size])
+        session.flush()
+    return session.query(OnlineCoin.cluster_id).filter(OnlineCoin.cluster_id.isnot(None)).distinct().count()
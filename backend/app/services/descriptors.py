@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import io
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageOps
+
+
+DESCRIPTOR_IMAGE_SIZE = 512
+DESCRIPTOR_BYTES = 32
+PATCH_RADIUS = 15
+BORDER = PATCH_RADIUS + 1
+PYRAMID_SCALES = (1.0, 0.75, 0.5625)
+HARRIS_K = 0.04
+NMS_RADIUS = 3
+MAX_HAMMING_DISTANCE = 64
+RATIO_TEST = 0.8
+RANSAC_HYPOTHESES = 256
+INLIER_TOLERANCE = 8.0
+
+# One keypoint: its position in the DESCRIPTOR_IMAGE_SIZE frame plus 256 packed binary tests, 40 bytes in all.
+DESCRIPTOR_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("bits", "u1", (DESCRIPTOR_BYTES,))])
+
+_rng = np.random.default_rng(20240702)
+# BRIEF test pairs drawn once from an isotropic Gaussian and kept inside the patch disk, so every process
+# (and every stored index file) uses the same tests and they stay in bounds after rotation.
+_PATTERN = _rng.normal(0.0, PATCH_RADIUS / 2.5, size=(DESCRIPTOR_BYTES * 8, 2, 2))
+_PATTERN *= np.minimum(1.0, PATCH_RADIUS / np.maximum(np.linalg.norm(_PATTERN, axis=-1, keepdims=True), 1e-9))
+_DISK_Y, _DISK_X = (
+    axis.ravel() for axis in np.mgrid[-PATCH_RADIUS:PATCH_RADIUS + 1, -PATCH_RADIUS:PATCH_RADIUS + 1]
+)
+_DISK = _DISK_X ** 2 + _DISK_Y ** 2 <= PATCH_RADIUS ** 2
+_DISK_Y, _DISK_X = _DISK_Y[_DISK], _DISK_X[_DISK]
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _box_mean(values: np.ndarray, radius: int) -> np.ndarray:
+    size = 2 * radius + 1
+    summed = np.cumsum(np.cumsum(np.pad(values, radius, mode="edge"), axis=0), axis=1)
+    summed = np.pad(summed, ((1, 0), (1, 0)))
+    return (summed[size:, size:] - summed[:-size, size:] - summed[size:, :-size] + summed[:-size, :-size]) / (size * size)
+
+
+def _local_max(values: np.ndarray, radius: int) -> np.ndarray:
+    padded = np.pad(values, radius, mode="constant", constant_values=-np.inf)
+    rows = sliding_window_view(padded, 2 * radius + 1, axis=0).max(axis=-1)
+    return sliding_window_view(rows, 2 * radius + 1, axis=1).max(axis=-1)
+
+
+def _level_features(level: np.ndarray, limit: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Harris corners of one pyramid level with their intensity-centroid angle and steered BRIEF bits."""
+    height, width = level.shape
+    if limit <= 0 or min(height, width) <= 2 * BORDER:
+        return np.empty(0), np.empty(0), np.empty((0, DESCRIPTOR_BYTES), dtype=np.uint8)
+    smoothed = _box_mean(level, 1)
+    grad_y, grad_x = np.gradient(smoothed)
+    xx = _box_mean(grad_x * grad_x, 2)
+    yy = _box_mean(grad_y * grad_y, 2)
+    xy = _box_mean(grad_x * grad_y, 2)
+    response = xx * yy - xy * xy - HARRIS_K * (xx + yy) ** 2
+    response[:BORDER] = response[-BORDER:] = 0
+    response[:, :BORDER] = response[:, -BORDER:] = 0
+    peaks = (response == _local_max(response, NMS_RADIUS)) & (response > 0.01 * response.max())
+    ys, xs = np.nonzero(peaks)
+    strongest = np.argsort(-response[ys, xs], kind="stable")[:limit]
+    ys, xs = ys[strongest], xs[strongest]
+
+    patches = smoothed[ys[:, None] + _DISK_Y, xs[:, None] + _DISK_X]
+    angles = np.arctan2(patches @ _DISK_Y, patches @ _DISK_X)
+    cos, sin = np.cos(angles)[:, None, None], np.sin(angles)[:, None, None]
+    test_x = np.rint(xs[:, None, None] + cos * _PATTERN[..., 0] - sin * _PATTERN[..., 1]).astype(np.intp)
+    test_y = np.rint(ys[:, None, None] + sin * _PATTERN[..., 0] + cos * _PATTERN[..., 1]).astype(np.intp)
+    blurred = _box_mean(level, 2)
+    samples = blurred[test_y, test_x]
+    return xs, ys, np.packbits(samples[..., 0] < samples[..., 1], axis=1)
+
+
+def extract_descriptors(image: Image.Image, max_keypoints: int = 500) -> np.ndarray:
+    """ORB-style keypoints of an image fitted into a DESCRIPTOR_IMAGE_SIZE square.
+
+    Harris corners are found on a three-level pyramid, oriented by their intensity centroid and described
+    by 256 rotated binary intensity tests, so a coin photographed at another angle or scale still matches.
+    """
+    gray = ImageOps.contain(image.convert("L"), (DESCRIPTOR_IMAGE_SIZE, DESCRIPTOR_IMAGE_SIZE))
+    weights = np.array([scale * scale for scale in PYRAMID_SCALES])
+    quotas = np.floor(max_keypoints * weights / weights.sum()).astype(int)
+    parts = []
+    for scale, quota in zip(PYRAMID_SCALES, quotas):
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        level = gray if scale == 1.0 else gray.resize(size, Image.Resampling.BILINEAR)
+        xs, ys, bits = _level_features(np.asarray(level, dtype=np.float64), int(quota))
+        features = np.empty(len(xs), dtype=DESCRIPTOR_DTYPE)
+        features["x"] = xs / scale
+        features["y"] = ys / scale
+        features["bits"] = bits
+        parts.append(features)
+    return np.concatenate(parts)
+
+
+def hamming_distances(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    left = np.ascontiguousarray(first).view(np.uint64)
+    right = np.ascontiguousarray(second).view(np.uint64)
+    xor = left[:, None, :] ^ right[None, :, :]
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=2, dtype=np.int32)
+    return _POPCOUNT[xor.view(np.uint8)].sum(axis=2, dtype=np.int32)
+
+
+def match_descriptors(query: np.ndarray, train: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Point pairs of mutual nearest neighbours that also pass the ratio test."""
+    if len(query) < 2 or len(train) < 2:
+        return np.empty((0, 2)), np.empty((0, 2))
+    distances = hamming_distances(query["bits"], train["bits"])
+    rows = np.arange(len(query))
+    nearest = distances.argmin(axis=1)
+    mutual = distances.argmin(axis=0)[nearest] == rows
+    best = distances[rows, nearest]
+    distances[rows, nearest] = np.iinfo(np.int32).max
+    keep = mutual & (best <= MAX_HAMMING_DISTANCE) & (best < RATIO_TEST * distances.min(axis=1))
+    source = np.stack([query["x"][keep], query["y"][keep]], axis=1).astype(np.float64)
+    target = np.stack([train["x"][nearest[keep]], train["y"][nearest[keep]]], axis=1).astype(np.float64)
+    return source, target
+
+
+def count_inliers(query: np.ndarray, train: np.ndarray) -> int:
+    """Matches consistent with one rotation + scale + translation, found by RANSAC over point pairs."""
+    source, target = match_descriptors(query, train)
+    count = len(source)
+    if count < 3:
+        return 0
+    # Points as complex numbers: a similarity transform is target = a * source + b, fixed by two matches.
+    source = source[:, 0] + 1j * source[:, 1]
+    target = target[:, 0] + 1j * target[:, 1]
+    rng = np.random.default_rng(count)
+    first = rng.integers(0, count, RANSAC_HYPOTHESES)
+    second = rng.integers(0, count, RANSAC_HYPOTHESES)
+    span = source[second] - source[first]
+    valid = np.abs(span) > 1.0
+    a = (target[second][valid] - target[first][valid]) / span[valid]
+    b = target[first][valid] - a * source[first][valid]
+    plausible = (np.abs(a) > 0.5) & (np.abs(a) < 2.0)
+    if not plausible.any():
+        return 0
+    a, b = a[plausible], b[plausible]
+    errors = np.abs(a[:, None] * source[None, :] + b[:, None] - target[None, :])
+    return int((errors <= INLIER_TOLERANCE).sum(axis=1).max())
+
+
+def pack_descriptors(features: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, features, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def unpack_descriptors(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data), allow_pickle=False)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import Event
+from app.services.metrics import EVENT_CLIENTS_DROPPED, EVENTS_DELIVERED
+
+
+MATCH_CREATED = "match-created"
+DECISION_LOGGED = "decision-logged"
+SYNC_FINISHED = "sync-finished"
+RESYNC = "resync"
+
+POLL_BATCH_SIZE = 500
+# Ids skipped by the cursor may belong to transactions that commit late; they are re-polled for this long.
+GAP_TIMEOUT_SECONDS = 30.0
+MAX_TRACKED_GAPS = 1000
+PRUNE_INTERVAL_SECONDS = 600.0
+RECONNECT_MS = 3000
+
+logger = logging.getLogger(__name__)
+
+
+def stage_event(session: Session, event_type: str, payload: dict) -> None:
+    """Queue an event in the caller's transaction, so it is published only if that transaction commits."""
+    session.add(Event(event_type=event_type, payload=json.dumps(payload, separators=(",", ":"), default=str)))
+
+
+def format_frame(event_id: int, event_type: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+def _latest_event_id() -> int:
+    with session_scope() as session:
+        return session.scalar(select(func.max(Event.id))) or 0
+
+
+def _fetch_events(cursor: int, gaps: list[int], prune: bool) -> list[tuple[int, str, str]]:
+    with session_scope() as session:
+        condition = Event.id > cursor
+        if gaps:
+            condition = or_(condition, Event.id.in_(gaps))
+        rows = session.execute(
+            select(Event.id, Event.event_type, Event.payload).where(condition).order_by(Event.id).limit(POLL_BATCH_SIZE)
+        ).all()
+        if prune:
+            cutoff = datetime.utcnow() - timedelta(hours=get_settings().events_retention_hours)
+            session.execute(delete(Event).where(Event.created_at < cutoff))
+    return [tuple(row) for row in rows]
+
+
+def _replay_events(after: int, until: int, limit: int) -> list[tuple[int, str, str]] | None:
+    """Events a reconnecting client missed, or None if they were pruned or are too many to replay."""
+    with session_scope() as session:
+        oldest = session.scalar(select(func.min(Event.id)))
+        if oldest is not None and after + 1 < oldest:
+            return None
+        rows = session.execute(
+            select(Event.id, Event.event_type, Event.payload)
+            .where(Event.id > after, Event.id <= until)
+            .order_by(Event.id)
+            .limit(limit + 1)
+        ).all()
+    if len(rows) > limit:
+        return None
+    return [tuple(row) for row in rows]
+
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue[tuple[int, str] | None] = asyncio.Queue(size)
+
+    def offer(self, event_id: int, frame: str) -> bool:
+        try:
+            self.queue.put_nowait((event_id, frame))
+            return True
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; it reconnects with Last-Event-ID and replays from the table.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class EventBroker:
+    """Per-process fan-out of committed events to every connected stream.
+
+    A single poller reads new rows from the events table and formats each one once; clients only receive the
+    shared frame on a bounded in-memory queue, so the database sees one query per poll interval however many
+    curators are connected. The poller runs only while at least one client is subscribed.
+    """
+
+    def __init__(self):
+        self.subscribers: set[_Subscriber] = set()
+        self.cursor: int | None = None
+        self.gaps: dict[int, float] = {}
+        self._task: asyncio.Task | None = None
+        self._pruned_at = 0.0
+
+    async def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        if self.cursor is None:
+            self.cursor = await run_in_threadpool(_latest_event_id)
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        settings = get_settings()
+        while self.subscribers:
+            try:
+                await self._poll_once()
+            except Exception:
+                logger.exception("Polling the events table failed")
+            await asyncio.sleep(settings.events_poll_interval)
+        # The next subscriber starts from the newest event instead of everything published while nobody listened.
+        self.cursor = None
+        self.gaps.clear()
+
+    async def _poll_once(self) -> None:
+        now = time.monotonic()
+        prune = now - self._pruned_at >= PRUNE_INTERVAL_SECONDS
+        if prune:
+            self._pruned_at = now
+        self.gaps = {event_id: deadline for event_id, deadline in self.gaps.items() if deadline > now}
+        rows = await run_in_threadpool(_fetch_events, self.cursor, list(self.gaps), prune)
+        for event_id, event_type, payload in rows:
+            if event_id > self.cursor:
+                for missing in range(self.cursor + 1, min(event_id, self.cursor + 1 + MAX_TRACKED_GAPS)):
+                    self.gaps[missing] = now + GAP_TIMEOUT_SECONDS
+                self.cursor = event_id
+            self.gaps.pop(event_id, None)
+            self.publish(event_id, event_type, payload)
+        if len(self.gaps) > MAX_TRACKED_GAPS:
+            for event_id in sorted(self.gaps)[:len(self.gaps) - MAX_TRACKED_GAPS]:
+                del self.gaps[event_id]
+
+    def publish(self, event_id: int, event_type: str, payload: str) -> None:
+        frame = format_frame(event_id, event_type, payload)
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            if subscriber.offer(event_id, frame):
+                delivered += 1
+            else:
+                self.subscribers.discard(subscriber)
+                EVENT_CLIENTS_DROPPED.inc()
+        EVENTS_DELIVERED.inc(delivered, event=event_type)
+
+    async def stream(self, last_event_id: int | None = None) -> AsyncIterator[str]:
+        """SSE frames for one client: the events it missed since ``last_event_id``, then live ones."""
+        settings = get_settings()
+        subscriber = _Subscriber(settings.events_client_queue)
+        # Subscribing before reading the cursor means nothing committed in between can be missed.
+        self.subscribers.add(subscriber)
+        try:
+            await self._start()
+            yield f"retry: {RECONNECT_MS}\n\n"
+            replayed: set[int] = set()
+            cursor = self.cursor
+            if last_event_id is not None and last_event_id < cursor:
+                rows = await run_in_threadpool(_replay_events, last_event_id, cursor, settings.events_replay_limit)
+                if rows is None:
+                    yield format_frame(cursor, RESYNC, json.dumps({"lastEventId": cursor}))
+                else:
+                    for event_id, event_type, payload in rows:
+                        replayed.add(event_id)
+                        yield format_frame(event_id, event_type, payload)
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), settings.events_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle connection.
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event_id, frame = item
+                if event_id in replayed:
+                    continue
+                yield frame
+        finally:
+            self.subscribers.discard(subscriber)
+
+
+broker = EventBroker()
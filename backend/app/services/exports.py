@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import Table, select
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import MatchRecord, MuseumCoin, OnlineCoin
+
+
+EXPORT_TABLES: dict[str, Table] = {
+    "museum-coins": MuseumCoin.__table__,
+    "online-coins": OnlineCoin.__table__,
+    "matches": MatchRecord.__table__,
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_table_rows(table: Table, batch_size: int | None = None) -> Iterator[dict]:
+    batch_size = batch_size or get_settings().export_batch_size
+    primary_key = list(table.primary_key.columns)
+    statement = select(table).order_by(*primary_key).execution_options(yield_per=batch_size)
+    with session_scope() as session:
+        for row in session.execute(statement).mappings():
+            yield dict(row)
+
+
+def stream_ndjson(table: Table, batch_size: int | None = None) -> Iterator[bytes]:
+    batch_size = batch_size or get_settings().export_batch_size
+    chunk: list[str] = []
+    for row in iter_table_rows(table, batch_size):
+        chunk.append(json.dumps(row, default=_json_default, ensure_ascii=False))
+        if len(chunk) >= batch_size:
+            yield ("\n".join(chunk) + "\n").encode("utf-8")
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode("utf-8")
+
+
+def stream_csv(table: Table, batch_size: int | None = None) -> Iterator[bytes]:
+    batch_size = batch_size or get_settings().export_batch_size
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(table.columns.keys())
+    pending = 0
+    for row in iter_table_rows(table, batch_size):
+        writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value for value in row.values()
+        )
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def stream_export(dataset: str, export_format: str) -> Iterator[bytes]:
+    table = EXPORT_TABLES.get(dataset)
+    if table is None:
+        raise ValueError(f"Unknown export dataset '{dataset}'")
+    if export_format == "ndjson":
+        return stream_ndjson(table)
+    if export_format == "csv":
+        return stream_csv(table)
+    raise ValueError(f"Unsupported export format '{export_format}'")
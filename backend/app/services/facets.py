@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import unicodedata
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import and_, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session, load_only
+
+from app.models import FacetValue, MuseumCoin, OnlineCoin
+
+
+FACET_ATTRIBUTES = ("mint", "authority", "denomination", "metal")
+MAX_KEY_LENGTH = 191
+
+_PENDING_KEY = "pending_facet_deltas"
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def facet_key(value: str | None) -> str | None:
+    """Normalized facet value: accents and case folded, whitespace collapsed; None for blank values."""
+    key = " ".join(_fold(value or "").split())[:MAX_KEY_LENGTH]
+    return key or None
+
+
+def facet_column(model: type[MuseumCoin] | type[OnlineCoin], attribute: str):
+    return getattr(model, f"{attribute}_facet_id")
+
+
+def _count_column(coin: MuseumCoin | OnlineCoin) -> str:
+    return "museum_count" if isinstance(coin, MuseumCoin) else "online_count"
+
+
+def _insert_missing(session: Session):
+    """INSERT of facet values that skips ones another writer created first, where the backend supports it."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        # No portable upsert: a concurrent insert of the same value fails the flush with IntegrityError.
+        return insert(FacetValue)
+    return dialect_insert(FacetValue).on_conflict_do_nothing(index_elements=["attribute", "value_key"])
+
+
+def _facet_ids(session: Session, values: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    values = set(values)
+    return {
+        (attribute, key): facet_id
+        for facet_id, attribute, key in session.execute(
+            select(FacetValue.id, FacetValue.attribute, FacetValue.value_key)
+            .where(FacetValue.value_key.in_({key for _, key in values}))
+        )
+        if (attribute, key) in values
+    }
+
+
+def resolve_facets(session: Session, values: dict[tuple[str, str], str]) -> dict[tuple[str, str], int]:
+    """Ids of the ``(attribute, key)`` facet values, creating missing ones with the given display label.
+
+    Runs from ``before_flush``, possibly before the transaction has written anything, so it avoids savepoints:
+    pysqlite would make one the outermost transaction and commit the new values when releasing it.
+    """
+    if not values:
+        return {}
+    ids = _facet_ids(session, values)
+    missing = [(attribute, key) for attribute, key in values if (attribute, key) not in ids]
+    if missing:
+        session.execute(_insert_missing(session), [
+            {"attribute": attribute, "value_key": key, "label": values[(attribute, key)][:255],
+             "museum_count": 0, "online_count": 0}
+            for attribute, key in missing
+        ])
+        ids.update(_facet_ids(session, missing))
+    return ids
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_facets(session: Session, flush_context, instances) -> None:
+    changed: list[tuple[MuseumCoin | OnlineCoin, str]] = []
+    wanted: dict[tuple[str, str], str] = {}
+    deltas = session.info.setdefault(_PENDING_KEY, Counter())
+    for coin in list(session.new) + list(session.dirty):
+        if not isinstance(coin, (MuseumCoin, OnlineCoin)):
+            continue
+        state = inspect(coin)
+        for attribute in FACET_ATTRIBUTES:
+            if not state.pending and not state.attrs[attribute].history.has_changes():
+                continue
+            changed.append((coin, attribute))
+            value = getattr(coin, attribute)
+            key = facet_key(value)
+            if key is not None:
+                wanted.setdefault((attribute, key), value.strip())
+    for coin in session.deleted:
+        if isinstance(coin, (MuseumCoin, OnlineCoin)):
+            for attribute in FACET_ATTRIBUTES:
+                old = getattr(coin, f"{attribute}_facet_id")
+                if old is not None:
+                    deltas[(old, _count_column(coin))] -= 1
+    if not changed:
+        return
+    ids = resolve_facets(session, wanted)
+    for coin, attribute in changed:
+        column = f"{attribute}_facet_id"
+        old = getattr(coin, column)
+        key = facet_key(getattr(coin, attribute))
+        new = ids[(attribute, key)] if key is not None else None
+        if old == new:
+            continue
+        if old is not None:
+            deltas[(old, _count_column(coin))] -= 1
+        if new is not None:
+            deltas[(new, _count_column(coin))] += 1
+        setattr(coin, column, new)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_facet_counts(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    # Commit flushes only after before_commit, so pending changes are flushed here to stage their counts too.
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # A fixed update order keeps concurrent ingests from deadlocking on the same facet rows.
+    for (facet_id, column), delta in sorted(pending.items()):
+        if delta:
+            counter = getattr(FacetValue, column)
+            session.execute(update(FacetValue).where(FacetValue.id == facet_id).values({column: counter + delta}))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_facet_counts(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def rebuild_facets(session: Session, batch_size: int = 1000) -> int:
+    """Reassign every coin's facet ids and recount all values; returns the number of distinct values in use."""
+    for model in (MuseumCoin, OnlineCoin):
+        coins = session.query(model).options(load_only(
+            *(getattr(model, attribute) for attribute in FACET_ATTRIBUTES),
+            *(facet_column(model, attribute) for attribute in FACET_ATTRIBUTES),
+        )).yield_per(batch_size)
+        batch: list[MuseumCoin | OnlineCoin] = []
+        for coin in coins:
+            batch.append(coin)
+            if len(batch) >= batch_size:
+                _assign_facets(session, batch)
+                batch = []
+        _assign_facets(session, batch)
+    session.flush()
+    session.info.pop(_PENDING_KEY, None)
+
+    counts: dict[int, dict[str, int]] = {}
+    for model, column in ((MuseumCoin, "museum_count"), (OnlineCoin, "online_count")):
+        for attribute in FACET_ATTRIBUTES:
+            facet = facet_column(model, attribute)
+            for facet_id, count in session.execute(
+                select(facet, func.count()).where(facet.isnot(None)).group_by(facet)
+            ):
+                counts.setdefault(facet_id, {"museum_count": 0, "online_count": 0})[column] = count
+    session.execute(update(FacetValue).values(museum_count=0, online_count=0))
+    if counts:
+        session.execute(update(FacetValue), [{"id": facet_id, **values} for facet_id, values in counts.items()])
+    return len(counts)
+
+
+def _assign_facets(session: Session, coins: list[MuseumCoin | OnlineCoin]) -> None:
+    wanted = {
+        (attribute, key): getattr(coin, attribute).strip()
+        for coin in coins
+        for attribute in FACET_ATTRIBUTES
+        if (key := facet_key(getattr(coin, attribute))) is not None
+    }
+    ids = resolve_facets(session, wanted)
+    for coin in coins:
+        for attribute in FACET_ATTRIBUTES:
+            key = facet_key(getattr(coin, attribute))
+            new = ids[(attribute, key)] if key is not None else None
+            if getattr(coin, f"{attribute}_facet_id") != new:
+                setattr(coin, f"{attribute}_facet_id", new)
+
+
+def list_facets(session: Session, attribute: str | None = None, source: str | None = None, limit: int = 100) -> dict:
+    """Facet values per attribute with their counts, most common first; values no coin uses are left out."""
+    if attribute is not None and attribute not in FACET_ATTRIBUTES:
+        raise ValueError(f"Unknown facet attribute '{attribute}'")
+    if source not in (None, "museum", "online"):
+        raise ValueError(f"Unknown facet source '{source}'")
+    attributes = [attribute] if attribute else list(FACET_ATTRIBUTES)
+    if source == "museum":
+        count = FacetValue.museum_count
+    elif source == "online":
+        count = FacetValue.online_count
+    else:
+        count = FacetValue.museum_count + FacetValue.online_count
+    facets = {}
+    for name in attributes:
+        rows = session.execute(
+            select(FacetValue)
+            .where(FacetValue.attribute == name, count > 0)
+            .order_by(count.desc(), FacetValue.label)
+            .limit(limit)
+        ).scalars()
+        facets[name] = [
+            {"id": row.id, "value": row.label, "museumCount": row.museum_count, "onlineCount": row.online_count}
+            for row in rows
+        ]
+    return facets
+
+
+def facet_condition(session: Session, model: type[MuseumCoin] | type[OnlineCoin], facet_ids: Iterable[int]):
+    """Filter for coins having every requested attribute: ids of one attribute are OR-ed, attributes AND-ed."""
+    facet_ids = set(facet_ids)
+    if not facet_ids:
+        return None
+    by_attribute: dict[str, list[int]] = {}
+    for facet_id, attribute in session.execute(
+        select(FacetValue.id, FacetValue.attribute).where(FacetValue.id.in_(facet_ids))
+    ):
+        by_attribute.setdefault(attribute, []).append(facet_id)
+    unknown = facet_ids - {facet_id for ids in by_attribute.values() for facet_id in ids}
+    if unknown:
+        raise ValueError(f"Unknown facet id(s): {', '.join(str(facet_id) for facet_id in sorted(unknown))}")
+    return and_(*(facet_column(model, attribute).in_(ids) for attribute, ids in by_attribute.items()))
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import requests
+from PIL import Image, ImageOps
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import ImageAsset, MuseumCoin, OnlineCoin
+from app.services.descriptors import DESCRIPTOR_IMAGE_SIZE, extract_descriptors, pack_descriptors, unpack_descriptors
+
+
+logger = logging.getLogger("app.images")
+
+PENDING = "pending"
+STORED = "stored"
+FAILED = "failed"
+THUMBNAIL_FORMAT = "webp"
+THUMBNAIL_MEDIA_TYPE = "image/webp"
+
+SNIFF_BYTES = 12
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_IMAGE_FIELDS = ("obverse_image_key", "reverse_image_key")
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"II*\x00", "TIFF"),
+    (b"MM\x00*", "TIFF"),
+)
+
+_decode_executor: ThreadPoolExecutor | None = None
+_decode_executor_lock = threading.Lock()
+
+
+def image_store_root() -> Path:
+    return Path(get_settings().image_store_dir).resolve()
+
+
+def is_image_hash(value: str) -> bool:
+    return bool(_SHA256.match(value))
+
+
+def original_path(sha256: str, root: Path | None = None) -> Path:
+    return (root or image_store_root()) / "original" / sha256[:2] / sha256
+
+
+def thumbnail_path(sha256: str, size: int, root: Path | None = None) -> Path:
+    return (root or image_store_root()) / "thumbs" / str(size) / sha256[:2] / f"{sha256}.{THUMBNAIL_FORMAT}"
+
+
+def descriptor_path(sha256: str, root: Path | None = None) -> Path:
+    return (root or image_store_root()) / "descriptors" / sha256[:2] / f"{sha256}.npy"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def store_original(data: bytes, root: Path | None = None) -> str:
+    """Store bytes under their SHA-256; identical images fetched from different URLs share one file."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = original_path(sha256, root)
+    if not path.exists():
+        _write_atomic(path, data)
+    return sha256
+
+
+def process_original(sha256: str, root: str, sizes: tuple[int, ...], max_keypoints: int) -> tuple[int, int, str]:
+    """Decode one stored original and write its missing thumbnails and keypoint descriptors; runs in a worker process."""
+    base = Path(root)
+    with Image.open(original_path(sha256, base)) as image:
+        media_type = Image.MIME.get(image.format or "", "application/octet-stream")
+        width, height = image.size
+        largest = max(*sizes, DESCRIPTOR_IMAGE_SIZE)
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale, which is much cheaper than decoding full size and shrinking.
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in sorted(sizes, reverse=True):
+            path = thumbnail_path(sha256, size, base)
+            if path.exists():
+                continue
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            os.close(handle)
+            try:
+                thumbnail.save(temp_name, format=THUMBNAIL_FORMAT, quality=80, method=4)
+                os.replace(temp_name, path)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        path = descriptor_path(sha256, base)
+        if not path.exists():
+            _write_atomic(path, pack_descriptors(extract_descriptors(image, max_keypoints)))
+    return width, height, media_type
+
+
+@lru_cache(maxsize=1024)
+def _read_descriptors(path: Path) -> np.ndarray:
+    return unpack_descriptors(path.read_bytes())
+
+
+def load_descriptors(sha256: str, root: Path | None = None) -> np.ndarray | None:
+    """Stored keypoint descriptors of an image; files never change for a given hash, so they are cached."""
+    path = descriptor_path(sha256, root)
+    if not path.exists():
+        return None
+    return _read_descriptors(path)
+
+
+def sniff_image_format(head: bytes) -> str | None:
+    """Image format named by the leading magic bytes, or None for anything Pillow should not be asked to decode."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, name in _SIGNATURES:
+        if head.startswith(signature):
+            return name
+    return None
+
+
+def upload_decode_pool() -> ThreadPoolExecutor:
+    """Bounded pool for decoding uploads; Pillow releases the GIL while decoding, so threads suffice."""
+    global _decode_executor
+    with _decode_executor_lock:
+        if _decode_executor is None:
+            _decode_executor = ThreadPoolExecutor(
+                max_workers=get_settings().image_upload_decode_workers, thread_name_prefix="image-decode"
+            )
+        return _decode_executor
+
+
+def decode_downscaled(file: BinaryIO, size: int) -> Image.Image:
+    """Decode an image file to at most ``size`` pixels a side without materializing it at full resolution."""
+    file.seek(0)
+    with Image.open(file) as image:
+        # JPEG decodes straight to 1/2, 1/4 or 1/8 scale; other formats are shrunk with reduce() before resampling.
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        return ImageOps.exif_transpose(image).convert("L")
+
+
+def _download(url: str) -> tuple[bytes, str | None]:
+    settings = get_settings()
+    with requests.get(url, timeout=settings.image_fetch_timeout, stream=True) as response:
+        response.raise_for_status()
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(64 * 1024):
+            total += len(chunk)
+            if total > settings.image_max_bytes:
+                raise ValueError(f"Image exceeds {settings.image_max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks), response.headers.get("Content-Type")
+
+
+def _image_urls(coin: MuseumCoin | OnlineCoin) -> list[str]:
+    return [
+        url for url in (getattr(coin, name) for name in _IMAGE_FIELDS)
+        if url and url.startswith(("http://", "https://"))
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _register_coin_images(session: Session, flush_context, instances) -> None:
+    urls: set[str] = set()
+    for coin in list(session.new) + list(session.dirty):
+        if not isinstance(coin, (MuseumCoin, OnlineCoin)):
+            continue
+        state = inspect(coin)
+        if state.pending or any(getattr(state.attrs, name).history.has_changes() for name in _IMAGE_FIELDS):
+            urls.update(_image_urls(coin))
+    urls -= {asset.source_url for asset in session.new if isinstance(asset, ImageAsset)}
+    if not urls:
+        return
+    with session.no_autoflush:
+        known = {url for (url,) in session.query(ImageAsset.source_url).filter(ImageAsset.source_url.in_(urls))}
+    session.add_all(ImageAsset(source_url=url, status=PENDING) for url in sorted(urls - known))
+
+
+def register_existing_images(session: Session) -> int:
+    urls: set[str] = set()
+    for model in (MuseumCoin, OnlineCoin):
+        for coin in session.query(model).yield_per(1000):
+            urls.update(_image_urls(coin))
+    known = {url for (url,) in session.query(ImageAsset.source_url)}
+    new = sorted(urls - known)
+    session.add_all(ImageAsset(source_url=url, status=PENDING) for url in new)
+    session.flush()
+    return len(new)
+
+
+def fetch_pending_images(limit: int | None = None, retry_failed: bool = False) -> dict[str, int]:
+    """Download pending images concurrently, store them by content hash and build thumbnails in a process pool."""
+    settings = get_settings()
+    root = image_store_root()
+    sizes = tuple(settings.image_thumbnail_sizes)
+    statuses = [PENDING, FAILED] if retry_failed else [PENDING]
+    with session_scope() as session:
+        query = session.query(ImageAsset.id, ImageAsset.source_url).filter(ImageAsset.status.in_(statuses))
+        pending = query.order_by(ImageAsset.id).limit(limit).all() if limit else query.order_by(ImageAsset.id).all()
+    summary = {"stored": 0, "failed": 0}
+    if not pending:
+        return summary
+
+    downloaded: dict[int, str] = {}
+    failures: dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=settings.image_fetch_concurrency) as fetchers:
+        futures = {asset_id: fetchers.submit(_download, url) for asset_id, url in pending}
+        for asset_id, future in futures.items():
+            try:
+                data, _ = future.result()
+                downloaded[asset_id] = store_original(data, root)
+            except (requests.RequestException, ValueError, OSError) as exc:
+                failures[asset_id] = str(exc)[:500]
+
+    details: dict[str, tuple[int, int, str]] = {}
+    with ProcessPoolExecutor(max_workers=settings.image_thumbnail_workers) as workers:
+        futures = {
+            sha256: workers.submit(process_original, sha256, str(root), sizes, settings.image_descriptor_keypoints)
+            for sha256 in set(downloaded.values())
+        }
+        for sha256, future in futures.items():
+            try:
+                details[sha256] = future.result()
+            except Exception as exc:  # Pillow raises a variety of errors for corrupt or unsupported files.
+                logger.warning("Could not decode image %s: %s", sha256, exc)
+                original_path(sha256, root).unlink(missing_ok=True)
+                for asset_id, digest in downloaded.items():
+                    if digest == sha256:
+                        failures[asset_id] = f"Unreadable image: {exc}"[:500]
+
+    with session_scope() as session:
+        for asset in session.query(ImageAsset).filter(ImageAsset.id.in_([asset_id for asset_id, _ in pending])):
+            asset.fetched_at = datetime.utcnow()
+            if asset.id in failures:
+                asset.status = FAILED
+                asset.error = failures[asset.id]
+                summary["failed"] += 1
+                continue
+            sha256 = downloaded[asset.id]
+            asset.sha256 = sha256
+            asset.width, asset.height, asset.content_type = details[sha256]
+            asset.byte_size = original_path(sha256, root).stat().st_size
+            asset.status = STORED
+            asset.error = None
+            summary["stored"] += 1
+    return summary
+
+
+def build_missing_descriptors() -> int:
+    """Extract descriptors (and any missing thumbnails) for stored images that predate them."""
+    settings = get_settings()
+    root = image_store_root()
+    sizes = tuple(settings.image_thumbnail_sizes)
+    with session_scope() as session:
+        hashes = [sha256 for (sha256,) in session.query(ImageAsset.sha256).filter(ImageAsset.status == STORED).distinct()]
+    missing = [sha256 for sha256 in hashes if not descriptor_path(sha256, root).exists()]
+    if not missing:
+        return 0
+    built = 0
+    with ProcessPoolExecutor(max_workers=settings.image_thumbnail_workers) as workers:
+        futures = [workers.submit(process_original, sha256, str(root), sizes, settings.image_descriptor_keypoints) for sha256 in missing]
+        for sha256, future in zip(missing, futures):
+            try:
+                future.result()
+                built += 1
+            except Exception as exc:  # Pillow raises a variety of errors for corrupt or unsupported files.
+                logger.warning("Could not extract descriptors for %s: %s", sha256, exc)
+    return built
+
+
+def schedule_image_fetch(background_tasks) -> None:
+    if get_settings().image_fetch_on_ingest:
+        background_tasks.add_task(fetch_pending_images)
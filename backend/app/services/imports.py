@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.session import session_scope
+from app.models import MuseumCoin, OnlineCoin
+from app.services.coins import apply_museum_coin_fields, apply_online_coin_fields, payload_coin_id
+from app.services.matcher import match_listings
+from app.services.metrics import INGEST_RECORDS
+from app.services.stats import MUSEUM_COINS, ONLINE_COINS, stage_counter
+
+
+IMPORT_MODELS = {
+    "museum-coins": MuseumCoin,
+    "online-coins": OnlineCoin,
+}
+
+_APPLY_FIELDS: dict[type, Callable] = {
+    MuseumCoin: apply_museum_coin_fields,
+    OnlineCoin: apply_online_coin_fields,
+}
+
+
+@dataclass
+class ImportSummary:
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def record_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < get_settings().import_max_reported_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def parse_ndjson_line(raw: bytes) -> dict | None:
+    text = raw.decode("utf-8").strip()
+    if not text:
+        return None
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid JSON: {exc.msg}") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("Each line must be a JSON object")
+    return payload
+
+
+def _primary_key(model: type):
+    return MuseumCoin.coin_id if model is MuseumCoin else OnlineCoin.id
+
+
+def _upsert_rows(session: Session, model: type, rows: Sequence[tuple[int, dict]]) -> tuple[int, int, list[tuple[int, str]]]:
+    apply_fields = _APPLY_FIELDS[model]
+    keyed: list[tuple[int, str, dict]] = []
+    errors: list[tuple[int, str]] = []
+    for line, payload in rows:
+        try:
+            keyed.append((line, payload_coin_id(payload), payload))
+        except ValueError as exc:
+            errors.append((line, str(exc)))
+
+    pk = _primary_key(model)
+    ids = {coin_id for _, coin_id, _ in keyed}
+    existing = {getattr(coin, pk.key): coin for coin in session.query(model).filter(pk.in_(ids))} if ids else {}
+
+    inserted = updated = 0
+    for line, coin_id, payload in keyed:
+        coin = existing.get(coin_id)
+        try:
+            if coin is None:
+                coin = apply_fields(model(**{pk.key: coin_id}), payload)
+                session.add(coin)
+                existing[coin_id] = coin
+                inserted += 1
+            else:
+                apply_fields(coin, payload)
+                updated += 1
+        except (TypeError, ValueError) as exc:
+            errors.append((line, str(exc)))
+    stage_counter(session, MUSEUM_COINS if model is MuseumCoin else ONLINE_COINS, inserted)
+    session.flush()
+    if model is OnlineCoin and get_settings().match_on_ingest:
+        match_listings(session, [existing[coin_id] for coin_id in sorted(ids) if coin_id in existing])
+    return inserted, updated, errors
+
+
+def import_batch(dataset: str, rows: Sequence[tuple[int, dict]], summary: ImportSummary) -> None:
+    model = IMPORT_MODELS[dataset]
+    try:
+        with session_scope() as session:
+            inserted, updated, errors = _upsert_rows(session, model, rows)
+    except SQLAlchemyError:
+        # A constraint failed somewhere in the batch; retry row by row to pin it down.
+        inserted = updated = 0
+        errors = []
+        for line, payload in rows:
+            try:
+                with session_scope() as session:
+                    row_inserted, row_updated, row_errors = _upsert_rows(session, model, [(line, payload)])
+            except SQLAlchemyError as exc:
+                errors.append((line, f"Database error: {getattr(exc, 'orig', None) or exc}"))
+                continue
+            inserted += row_inserted
+            updated += row_updated
+            errors.extend(row_errors)
+    summary.inserted += inserted
+    summary.updated += updated
+    INGEST_RECORDS.inc(inserted + updated, dataset=dataset)
+    for line, message in sorted(errors):
+        summary.record_error(line, message)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Iterable, List, Mapping, Sequence
@@ -11,9 +12,8 @@ from sqlalchemy.orm import Session
 from app.config import get_settings
 from app.models import MuseumCoin, OnlineCoin
 from app.services.coins import upsert_museum_coin, upsert_online_coin
-
-
-settings = get_settings()
+from app.services.matcher import match_listings
+from app.services.metrics import INGEST_RECORDS, INGEST_SECONDS
 
 
 @dataclass
@@ -36,7 +36,7 @@ def _load_remote_json(url: str) -> Sequence[Mapping[str, object]]:
 
 
 def fetch_museum_coins() -> List[FetchedCoin]:
-    url = settings.museum_source_url
+    url = get_settings().museum_source_url
     if not url:
         return []
     records = _load_remote_json(url)
@@ -44,7 +44,7 @@ def fetch_museum_coins() -> List[FetchedCoin]:
 
 
 def fetch_online_coins() -> List[FetchedCoin]:
-    url = settings.online_source_url
+    url = get_settings().online_source_url
     if not url:
         return []
     records = _load_remote_json(url)
@@ -52,6 +52,7 @@ def fetch_online_coins() -> List[FetchedCoin]:
 
 
 def upsert_museum_coins(session: Session, coins: Iterable[FetchedCoin]) -> int:
+    start = time.perf_counter()
     count = 0
     for fetched in coins:
         payload = dict(fetched.data)
@@ -61,18 +62,26 @@ def upsert_museum_coins(session: Session, coins: Iterable[FetchedCoin]) -> int:
         coin = upsert_museum_coin(session, payload)
         coin.updated_at = datetime.utcnow()
         count += 1
+    INGEST_RECORDS.inc(count, dataset="museum-coins")
+    INGEST_SECONDS.observe(time.perf_counter() - start, dataset="museum-coins")
     return count
 
 
 def upsert_online_coins(session: Session, coins: Iterable[FetchedCoin]) -> int:
+    start = time.perf_counter()
     count = 0
+    listings: list[OnlineCoin] = []
     for fetched in coins:
         payload = dict(fetched.data)
         coin_id = str(payload.get("coin_id") or payload.get("id") or "")
         if not coin_id:
             continue
         payload.setdefault("source_name", fetched.source)
-        upsert_online_coin(session, payload)
+        listings.append(upsert_online_coin(session, payload))
         count += 1
+    if get_settings().match_on_ingest:
+        match_listings(session, listings)
+    INGEST_RECORDS.inc(count, dataset="online-coins")
+    INGEST_SECONDS.observe(time.perf_counter() - start, dataset="online-coins")
     return count
 
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import unicodedata
+
+from sqlalchemy import delete, event, func, inspect
+from sqlalchemy.orm import Session, load_only
+
+from app.config import get_settings
+from app.models import LegendTrigram, MuseumCoin, OnlineCoin
+
+
+_GREEK_TO_LATIN = {
+    "α": "a", "β": "b", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "e", "θ": "th",
+    "ι": "i", "κ": "k", "λ": "l", "μ": "m", "ν": "n", "ξ": "x", "ο": "o", "π": "p",
+    "ρ": "r", "σ": "s", "ς": "s", "ϲ": "s", "τ": "t", "υ": "u", "φ": "ph", "χ": "kh",
+    "ψ": "ps", "ω": "o", "ϝ": "u", "ϙ": "q", "ϻ": "s",
+}
+# Latin capitals typed in place of their Greek look-alikes inside an otherwise Greek word.
+_LOOKALIKES = {
+    "a": "α", "b": "β", "e": "ε", "h": "η", "i": "ι", "k": "κ", "m": "μ", "n": "ν",
+    "o": "ο", "p": "ρ", "t": "τ", "x": "χ", "y": "υ", "z": "ζ", "c": "ϲ",
+}
+# Transliteration variants folded onto one spelling, applied to both scripts after transliteration.
+_LATIN_FOLDS = (("ch", "kh"), ("c", "k"), ("w", "o"), ("f", "ph"), ("y", "u"), ("j", "i"), ("v", "u"))
+
+
+def _is_greek(char: str) -> bool:
+    return "Ͱ" <= char <= "Ͽ" or "ἀ" <= char <= "῿"
+
+
+def _fold_word(word: str) -> str:
+    if any(_is_greek(char) for char in word):
+        word = "".join(_LOOKALIKES.get(char, char) for char in word)
+        word = "".join(_GREEK_TO_LATIN.get(char, char) for char in word)
+    word = "".join(char for char in word if "a" <= char <= "z")
+    for source, target in _LATIN_FOLDS:
+        word = word.replace(source, target)
+    return word
+
+
+def normalize_legend(*legends: str | None) -> str:
+    words = []
+    for legend in legends:
+        if not legend:
+            continue
+        decomposed = unicodedata.normalize("NFD", legend)
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+        cleaned = "".join(char if char.isalpha() else " " for char in stripped)
+        words.extend(folded for folded in (_fold_word(word) for word in cleaned.split()) if folded)
+    return " ".join(words)
+
+
+def legend_trigrams(*legends: str | None) -> set[str]:
+    trigrams = set()
+    for word in normalize_legend(*legends).split():
+        padded = f"  {word} "
+        trigrams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return trigrams
+
+
+def legend_similarity(first: set[str], second: set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def _trigram_rows(coin: MuseumCoin | OnlineCoin) -> list[LegendTrigram]:
+    owner = {"museum_coin": coin} if isinstance(coin, MuseumCoin) else {"online_coin": coin}
+    return [
+        LegendTrigram(trigram=trigram, **owner)
+        for trigram in legend_trigrams(coin.obverse_inscription, coin.reverse_inscription)
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_legend_index(session: Session, flush_context, instances) -> None:
+    stale_museum: list[str] = []
+    stale_online: list[str] = []
+    for coin in list(session.new) + list(session.dirty):
+        if not isinstance(coin, (MuseumCoin, OnlineCoin)):
+            continue
+        state = inspect(coin)
+        changed = (
+            state.attrs.obverse_inscription.history.has_changes()
+            or state.attrs.reverse_inscription.history.has_changes()
+        )
+        if not state.pending and not changed:
+            continue
+        if not state.pending:
+            if isinstance(coin, MuseumCoin):
+                stale_museum.append(coin.coin_id)
+            else:
+                stale_online.append(coin.id)
+        session.add_all(_trigram_rows(coin))
+    if stale_museum:
+        session.execute(delete(LegendTrigram).where(LegendTrigram.museum_coin_id.in_(stale_museum)))
+    if stale_online:
+        session.execute(delete(LegendTrigram).where(LegendTrigram.online_coin_id.in_(stale_online)))
+
+
+def rebuild_legend_index(session: Session) -> int:
+    session.execute(delete(LegendTrigram))
+    created = 0
+    for model in (MuseumCoin, OnlineCoin):
+        query = (
+            session.query(model)
+            .options(load_only(model.obverse_inscription, model.reverse_inscription))
+            .filter(model.obverse_inscription.isnot(None) | model.reverse_inscription.isnot(None))
+        )
+        for coin in query.yield_per(1000):
+            rows = _trigram_rows(coin)
+            session.add_all(rows)
+            created += len(rows)
+    session.flush()
+    return created
+
+
+def search_online_legends(session: Session, text: str, limit: int = 20) -> dict[str, float]:
+    query_trigrams = legend_trigrams(text)
+    if not query_trigrams:
+        return {}
+    min_similarity = get_settings().legend_min_similarity
+    # Shared-trigram counts come straight off the trigram index; only the best few are scored exactly.
+    shared_rows = (
+        session.query(LegendTrigram.online_coin_id, func.count(LegendTrigram.id).label("shared"))
+        .filter(LegendTrigram.trigram.in_(query_trigrams), LegendTrigram.online_coin_id.isnot(None))
+        .group_by(LegendTrigram.online_coin_id)
+        .order_by(func.count(LegendTrigram.id).desc())
+        .limit(limit * 5)
+        .all()
+    )
+    if not shared_rows:
+        return {}
+    shared = dict(shared_rows)
+    totals = dict(
+        session.query(LegendTrigram.online_coin_id, func.count(LegendTrigram.id))
+        .filter(LegendTrigram.online_coin_id.in_(list(shared)))
+        .group_by(LegendTrigram.online_coin_id)
+    )
+    scores = {
+        online_id: count / (len(query_trigrams) + totals[online_id] - count)
+        for online_id, count in shared.items()
+    }
+    ranked = sorted(
+        ((online_id, score) for online_id, score in scores.items() if score >= min_similarity),
+        key=lambda item: item[1],
+        reverse=True
+    )
+    return dict(ranked[:limit])
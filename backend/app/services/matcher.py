@@ -1,70 +1,333 @@
 from __future__ import annotations
 
+import heapq
+import threading
+import time
 from datetime import datetime
-from typing import Iterable, List
+from itertools import chain
+from operator import attrgetter
+from typing import Iterable, Iterator
 
+import numpy as np
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.models import MatchRecord, MuseumCoin, OnlineCoin
+from app.services.catalog import (
+    CatalogRow,
+    CatalogSnapshot,
+    CodedStrings,
+    get_catalog,
+    session_catalog,
+    uncommitted_changes
+)
+from app.services.events import MATCH_CREATED, stage_event
+from app.services.metrics import INGEST_MATCH_SECONDS, MATCH_RUN_SECONDS, MATCH_RUN_UPDATES
+from app.services.references import reference_keys, shared_reference_candidates
+from app.services.rerank import boost_ranked_matches
+from app.services.scoring import FeatureEncoder, ScoringWeights, get_scoring_weights, score_block, score_upper_bounds
+from app.services.stats import stage_counter, status_counter
+from app.services.warmup import register_warmer
 
 
-def _prefilter_candidates(session: Session, museum_coin: MuseumCoin) -> List[OnlineCoin]:
-    query = session.query(OnlineCoin)
-    if museum_coin.mint:
-        query = query.filter(OnlineCoin.mint.ilike(f'%{museum_coin.mint}%'))
-    if museum_coin.denomination:
-        query = query.filter(OnlineCoin.denomination.ilike(f'%{museum_coin.denomination}%'))
-    if museum_coin.metal:
-        query = query.filter(OnlineCoin.metal.ilike(f'%{museum_coin.metal}%'))
-    if museum_coin.authority:
-        query = query.filter(OnlineCoin.authority.ilike(f'%{museum_coin.authority}%'))
-    return query.order_by(OnlineCoin.fetched_at.desc()).limit(200).all()
-
-
-def _compute_score(museum_coin: MuseumCoin, online_coin: OnlineCoin) -> float:
-    overlap = 0.0
-    if museum_coin.mint and online_coin.mint and museum_coin.mint.lower() == online_coin.mint.lower():
-        overlap += 0.35
-    if museum_coin.authority and online_coin.authority and museum_coin.authority.lower() == online_coin.authority.lower():
-        overlap += 0.3
-    if museum_coin.denomination and online_coin.denomination and museum_coin.denomination.lower() == online_coin.denomination.lower():
-        overlap += 0.25
-    if museum_coin.metal and online_coin.metal and museum_coin.metal.lower() == online_coin.metal.lower():
-        overlap += 0.1
-    score = min(max(overlap, 0.15), 0.99)
-    return round(score, 4)
+SCORING_BATCH_SIZE = 256
+PREFILTER_FIELDS = ("mint", "denomination", "metal", "authority")
+
+
+def _prefilter_candidates(
+    session: Session, catalog: CatalogSnapshot, museum_coin: MuseumCoin | CatalogRow
+) -> Iterator[CatalogRow]:
+    settings = get_settings()
+    eligible = catalog.alive.copy()
+    for field in PREFILTER_FIELDS:
+        value = getattr(museum_coin, field)
+        if value:
+            eligible &= catalog.contains(field, value)
+    eligible &= catalog.overlapping(museum_coin.date_earliest, museum_coin.date_latest, settings.match_date_slack_years)
+    eligible &= catalog.within_tolerance("weight", museum_coin.weight, settings.match_weight_tolerance)
+    eligible &= catalog.within_tolerance("diameter", museum_coin.diameter, settings.match_diameter_tolerance)
+
+    # Listings citing the same catalogue entry are the strongest signal, so they are always considered;
+    # scoring them first also raises the top-K bar early, which lets more of the rest be pruned.
+    # Relistings of one physical coin share a cluster (named after a member listing); only the first is scored.
+    positions = catalog.positions()
+    referenced = [positions[key] for key in shared_reference_candidates(session, museum_coin.coin_id) if key in positions]
+    order = catalog.key_order()
+    seen: set[str] = set()
+    for candidate in catalog.rows(chain(referenced, order[eligible[order]])):
+        cluster = candidate.cluster_id or candidate.id
+        if candidate.id in seen or cluster in seen:
+            continue
+        seen.update((candidate.id, cluster))
+        yield candidate
+
+
+def _batched(items: Iterable[OnlineCoin], size: int) -> Iterator[list[OnlineCoin]]:
+    batch: list[OnlineCoin] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def top_candidates(
+    encoder: FeatureEncoder,
+    museum_coin: MuseumCoin,
+    candidates: Iterable[OnlineCoin],
+    weights: ScoringWeights,
+    top_k: int,
+    min_score: float
+) -> list[tuple[float, OnlineCoin]]:
+    """Best ``top_k`` candidates scoring at least ``min_score``, best first.
+
+    Each batch is first bounded with the exact field-feature score plus the full weight of the text
+    features (MaxScore); candidates whose bound cannot beat the current K-th score are never text-encoded.
+    """
+    query = encoder.encode_query(museum_coin)
+    heap: list[tuple[float, int, OnlineCoin]] = []
+    order = 0
+    for batch in _batched(candidates, SCORING_BATCH_SIZE):
+        bounds = score_upper_bounds(query, encoder.encode_candidates(batch, with_text=False), weights)
+        threshold = heap[0][0] if len(heap) >= top_k else min_score
+        if len(heap) >= top_k:
+            survivors = [candidate for candidate, bound in zip(batch, bounds.tolist()) if bound > threshold]
+        else:
+            survivors = [candidate for candidate, bound in zip(batch, bounds.tolist()) if bound >= threshold]
+        if not survivors:
+            continue
+        scores = score_block(query, encoder.encode_candidates(survivors), weights)
+        for candidate, score in zip(survivors, scores.tolist()):
+            if score < min_score:
+                continue
+            order += 1
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, -order, candidate))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, -order, candidate))
+    return [(score, candidate) for score, _, candidate in sorted(heap, key=lambda item: (item[0], item[1]), reverse=True)]
+
+
+def _record_match(
+    session: Session,
+    existing: MatchRecord | None,
+    museum_coin_id: str,
+    candidate: OnlineCoin,
+    score: float
+) -> bool | None:
+    """Create or rescore one match; returns True if created, False if rescored, None if left alone."""
+    if existing and existing.status == "Accepted":
+        return None
+    if existing:
+        existing.similarity_score = score
+        existing.source = candidate.listing_reference
+        existing.saved_at = datetime.utcnow()
+        return False
+    session.add(MatchRecord(
+        museum_coin_id=museum_coin_id,
+        candidate_id=candidate.id,
+        similarity_score=score,
+        status="Pending",
+        source=candidate.listing_reference,
+        saved_at=datetime.utcnow(),
+        created_by_matcher=True,
+    ))
+    return True
+
+
+def _is_undecided(match: MatchRecord) -> bool:
+    """Pending matches the matcher proposed and no curator has touched; they are the matcher's to replace.
+
+    A curator's decision, even "save for later", clears ``created_by_matcher``; notes keep a row as well.
+    """
+    return (
+        match.created_by_matcher
+        and match.status == "Pending"
+        and match.decided_by is None
+        and match.notes is None
+    )
+
+
+def _stage_created_matches(session: Session, created: dict[str, list[dict]]) -> None:
+    """One match-created event per museum coin, listing the candidates it gained."""
+    for museum_coin_id, matches in created.items():
+        stage_event(session, MATCH_CREATED, {"museumCoinId": museum_coin_id, "matches": matches})
 
 
 def generate_matches(session: Session, museum_coins: Iterable[MuseumCoin] | None = None) -> int:
+    start = time.perf_counter()
     updated = 0
-    coins = list(museum_coins) if museum_coins is not None else session.query(MuseumCoin).all()
+    created = 0
+    dropped = 0
+    # Both catalogs include this session's uncommitted coin changes, so a sync and a match run can share a transaction.
+    coins = list(museum_coins) if museum_coins is not None else list(session_catalog(session, MuseumCoin).rows())
+    listings = session_catalog(session, OnlineCoin)
+    settings = get_settings()
+    weights = get_scoring_weights()
+    encoder = FeatureEncoder()
+    listing_scores: dict[str, float] = {}
+    created_matches: dict[str, list[dict]] = {}
     for coin in coins:
-        candidates = _prefilter_candidates(session, coin)
-        for candidate in candidates:
-            existing = (
-                session.query(MatchRecord)
-                .filter(MatchRecord.museum_coin_id == coin.coin_id, MatchRecord.candidate_id == candidate.id)
-                .first()
-            )
-            if existing and existing.status == "Accepted":
+        ranked = top_candidates(
+            encoder, coin, _prefilter_candidates(session, listings, coin), weights, settings.match_top_k, settings.match_min_score
+        )
+        ranked = boost_ranked_matches(session, coin, ranked)
+        existing_matches = {
+            match.candidate_id: match
+            for match in session.query(MatchRecord).filter(MatchRecord.museum_coin_id == coin.coin_id)
+        }
+        for score, candidate in ranked:
+            outcome = _record_match(session, existing_matches.get(candidate.id), coin.coin_id, candidate, score)
+            if outcome is None:
                 continue
-            score = _compute_score(coin, candidate)
-            candidate.similarity_score = score
-            if existing:
-                existing.similarity_score = score
-                existing.source = candidate.listing_reference
-                existing.saved_at = datetime.utcnow()
-                updated += 1
-            else:
-                match = MatchRecord(
-                    museum_coin_id=coin.coin_id,
-                    candidate_id=candidate.id,
-                    similarity_score=score,
-                    status="Pending",
-                    source=candidate.listing_reference,
-                    saved_at=datetime.utcnow(),
-                )
-                session.add(match)
-                updated += 1
+            listing_scores[candidate.id] = score
+            if outcome:
+                created_matches.setdefault(coin.coin_id, []).append({"candidateId": candidate.id, "similarityScore": score})
+            created += outcome
+            updated += 1
+        # Proposals that fell out of the top K or below the minimum score no longer belong in the review queue.
+        ranked_ids = {candidate.id for _, candidate in ranked}
+        for candidate_id, match in existing_matches.items():
+            if candidate_id not in ranked_ids and _is_undecided(match):
+                session.delete(match)
+                dropped += 1
+    if listing_scores:
+        # Candidates are snapshot rows rather than ORM objects, so their scores are written in one bulk UPDATE.
+        # A rescore is not an edit of the listing: updated_at is kept, and the score is not a catalog column.
+        listings = OnlineCoin.__table__
+        session.execute(
+            update(listings)
+            .where(listings.c.id == bindparam("listing_id"))
+            .values(similarity_score=bindparam("score"), updated_at=listings.c.updated_at),
+            [{"listing_id": key, "score": score} for key, score in listing_scores.items()]
+        )
+    _stage_created_matches(session, created_matches)
+    stage_counter(session, status_counter("Pending"), created - dropped)
+    MATCH_RUN_UPDATES.inc(updated)
+    MATCH_RUN_SECONDS.observe(time.perf_counter() - start)
     return updated
 
+
+class MuseumIndex:
+    """Every museum coin encoded once into a scoring block, for matching listings as they arrive."""
+
+    def __init__(self, catalog: CatalogSnapshot):
+        self.catalog = catalog
+        positions = catalog.key_order()
+        self.encoder = FeatureEncoder()
+        rows = list(catalog.rows(positions))
+        self.block = self.encoder.encode_candidates(rows, key=attrgetter("coin_id"))
+        self.categories = {
+            field: CodedStrings(catalog.categorical[field].vocabulary, catalog.categorical[field].codes[positions])
+            for field in PREFILTER_FIELDS
+        }
+        self.date_earliest = catalog.floats["date_earliest"][positions]
+        self.date_latest = catalog.floats["date_latest"][positions]
+        self.references: dict[str, list[int]] = {}
+        for index, row in enumerate(rows):
+            for key in set(reference_keys(row.reference_list)):
+                self.references.setdefault(key, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self.block)
+
+    def _eligible(self, listing: OnlineCoin) -> np.ndarray:
+        """Same pruning as the museum-to-listing prefilter, seen from the listing.
+
+        A museum coin is kept when each of its mint/denomination/metal/authority values is blank or contained
+        in the listing's, its dates overlap and its measurements are within tolerance; coins citing one of the
+        listing's catalogue references are kept regardless.
+        """
+        settings = get_settings()
+        eligible = np.ones(len(self), dtype=bool)
+        for field, column in self.categories.items():
+            needle = (getattr(listing, field) or "").lower()
+            eligible &= column.matching(lambda value: not value or value.lower() in needle) | (column.codes < 0)
+        if listing.date_earliest is not None and listing.date_latest is not None:
+            slack = settings.match_date_slack_years
+            overlaps = (self.date_earliest <= listing.date_latest + slack) & (self.date_latest >= listing.date_earliest - slack)
+            eligible &= np.isnan(self.date_earliest) | overlaps
+        for column, value, tolerance in (
+            (0, listing.weight, settings.match_weight_tolerance),
+            (1, listing.diameter, settings.match_diameter_tolerance),
+        ):
+            if value is not None:
+                measured = self.block.measurements[:, column]
+                eligible &= np.isnan(measured) | (np.abs(measured - value) <= tolerance)
+        for key in reference_keys(listing.reference_list):
+            eligible[self.references.get(key, [])] = True
+        return eligible
+
+    def best_matches(self, listing: OnlineCoin, weights: ScoringWeights, top_k: int, min_score: float) -> list[tuple[str, float]]:
+        if not len(self):
+            return []
+        # The index is shared across requests, so listings are encoded against its vocabulary without growing it.
+        query = self.encoder.encode_query(listing, extend_vocabulary=False)
+        scores = score_block(query, self.block, weights)
+        scores[~self._eligible(listing)] = -1.0
+        ranked = np.argsort(-scores, kind="stable")[:top_k]
+        return [(self.block.ids[index], float(scores[index])) for index in ranked if scores[index] >= min_score]
+
+
+_museum_index: MuseumIndex | None = None
+_museum_index_lock = threading.Lock()
+
+
+def get_museum_index(session: Session | None = None) -> MuseumIndex:
+    """Shared museum index, rebuilt whenever the museum catalog snapshot picks up an added, removed or updated coin.
+
+    If ``session`` holds uncommitted museum coin changes, a private index over its view is built instead, so the
+    shared one never holds rows that may still roll back.
+    """
+    global _museum_index
+    if session is not None:
+        changed = uncommitted_changes(session, MuseumCoin)
+        if changed is None or changed:
+            return MuseumIndex(session_catalog(session, MuseumCoin))
+    catalog = get_catalog(MuseumCoin)
+    with _museum_index_lock:
+        if _museum_index is None or _museum_index.catalog is not catalog:
+            _museum_index = MuseumIndex(catalog)
+        return _museum_index
+
+
+register_warmer("museum-index", lambda session: get_museum_index())
+
+
+def match_listings(session: Session, listings: Iterable[OnlineCoin]) -> int:
+    """Score freshly ingested listings against every museum coin and store the best matches right away."""
+    start = time.perf_counter()
+    session.flush()
+    # Relistings of an already-clustered coin were matched when their cluster's first listing arrived.
+    listings = [listing for listing in listings if listing.cluster_id in (None, listing.id)]
+    if not listings:
+        return 0
+    settings = get_settings()
+    weights = get_scoring_weights()
+    index = get_museum_index(session)
+    existing_matches = {
+        (match.museum_coin_id, match.candidate_id): match
+        for match in session.query(MatchRecord).filter(MatchRecord.candidate_id.in_([listing.id for listing in listings]))
+    }
+    created = updated = 0
+    created_matches: dict[str, list[dict]] = {}
+    for listing in listings:
+        ranked = index.best_matches(listing, weights, settings.match_top_k, settings.match_min_score)
+        for museum_coin_id, score in ranked:
+            outcome = _record_match(session, existing_matches.get((museum_coin_id, listing.id)), museum_coin_id, listing, score)
+            if outcome is None:
+                continue
+            if outcome:
+                created_matches.setdefault(museum_coin_id, []).append({"candidateId": listing.id, "similarityScore": score})
+            created += outcome
+            updated += 1
+        if ranked:
+            listing.similarity_score = ranked[0][1]
+    _stage_created_matches(session, created_matches)
+    stage_counter(session, status_counter("Pending"), created)
+    MATCH_RUN_UPDATES.inc(updated)
+    INGEST_MATCH_SECONDS.observe(time.perf_counter() - start)
+    return updated
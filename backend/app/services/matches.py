@@ -4,6 +4,8 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from app.models import MatchRecord, MuseumCoin, OnlineCoin
+from app.services.events import DECISION_LOGGED, stage_event
+from app.services.stats import stage_match_transition
 
 
 def log_match_decision(
@@ -47,6 +49,9 @@ def log_match_decision(
     }
     status_value = status_lookup.get(normalized, "Pending")
 
+    old_status = record.status if record else None
+    old_saved_at = record.saved_at if record else None
+
     if record:
         record.status = status_value
         record.notes = notes
@@ -54,6 +59,7 @@ def log_match_decision(
         record.similarity_score = similarity
         record.source = source
         record.decided_by = user_id
+        record.created_by_matcher = False
     else:
         record = MatchRecord(
             museum_coin_id=museum_coin_id,
@@ -67,6 +73,22 @@ def log_match_decision(
         )
         db.add(record)
 
+    stage_match_transition(
+        db,
+        museum_coin.denomination,
+        old_status=old_status,
+        old_saved_at=old_saved_at,
+        new_status=status_value,
+        new_saved_at=record.saved_at
+    )
     db.flush()
+    stage_event(db, DECISION_LOGGED, {
+        "id": record.id,
+        "museumCoinId": museum_coin_id,
+        "candidateId": candidate_id,
+        "status": status_value,
+        "decidedBy": user_id,
+        "savedAt": record.saved_at.isoformat(),
+    })
     return record
 
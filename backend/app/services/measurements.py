@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from sqlalchemy import and_, or_
+
+from app.config import get_settings
+
+
+def _range_condition(column, value: float, tolerance: float, keep_unmeasured: bool):
+    condition = column.between(value - tolerance, value + tolerance)
+    if keep_unmeasured:
+        return or_(column.is_(None), condition)
+    return condition
+
+
+def tolerance_condition(
+    model,
+    weight: float | None = None,
+    diameter: float | None = None,
+    weight_tolerance: float | None = None,
+    diameter_tolerance: float | None = None,
+    keep_unmeasured: bool = False
+):
+    """Rows whose weight/diameter lie within ± tolerance of the given values.
+
+    Each range is served by its own single-column index on ``weight`` or ``diameter``; the planner picks the
+    more selective one and checks the other range on the rows it returns.
+
+    With ``keep_unmeasured`` rows missing a measurement pass that half of the filter, which is what the
+    matcher wants: an unweighed listing is not evidence against a match.
+    """
+    settings = get_settings()
+    conditions = []
+    if weight is not None:
+        tolerance = settings.match_weight_tolerance if weight_tolerance is None else weight_tolerance
+        conditions.append(_range_condition(model.weight, weight, tolerance, keep_unmeasured))
+    if diameter is not None:
+        tolerance = settings.match_diameter_tolerance if diameter_tolerance is None else diameter_tolerance
+        conditions.append(_range_condition(model.diameter, diameter, tolerance, keep_unmeasured))
+    if not conditions:
+        return None
+    return and_(*conditions)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+
+logger = logging.getLogger("app.sql")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+def _format_labels(labelnames: Sequence[str], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items)
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+REQUEST_LATENCY = Histogram(
+    "coinmatch_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "coinmatch_http_request_sql_queries", "SQL statements issued per HTTP request.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "coinmatch_http_request_sql_duration_seconds", "Time spent in SQL per HTTP request.", ("method", "route")
+)
+SQL_QUERIES = Counter("coinmatch_sql_queries_total", "SQL statements executed.")
+SLOW_QUERIES = Counter("coinmatch_sql_slow_queries_total", "SQL statements slower than the slow-query threshold.")
+INGEST_RECORDS = Counter("coinmatch_ingest_records_total", "Coin records upserted by ingest and import.", ("dataset",))
+INGEST_SECONDS = Histogram("coinmatch_ingest_duration_seconds", "Duration of ingest upsert runs.", ("dataset",))
+MATCH_RUN_SECONDS = Histogram("coinmatch_match_run_duration_seconds", "Duration of generate_matches runs.")
+INGEST_MATCH_SECONDS = Histogram(
+    "coinmatch_ingest_match_duration_seconds", "Time spent matching freshly ingested listings against the museum index."
+)
+MATCH_RUN_UPDATES = Counter("coinmatch_match_records_updated_total", "Match records created or rescored.")
+IMAGE_RERANK_SECONDS = Histogram("coinmatch_image_rerank_duration_seconds", "Time spent verifying candidate images by keypoint matching.")
+IMAGE_RERANK_SKIPPED = Counter(
+    "coinmatch_image_rerank_skipped_total", "Image comparisons abandoned because the re-rank latency budget ran out."
+)
+EVENTS_DELIVERED = Counter("coinmatch_events_delivered_total", "Server-sent events handed to connected clients.", ("event",))
+EVENT_CLIENTS_DROPPED = Counter(
+    "coinmatch_event_clients_dropped_total", "Event stream clients disconnected for falling too far behind."
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    SQL_QUERIES.inc()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= get_settings().slow_query_ms:
+        SLOW_QUERIES.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time so the pooled connection's
+    # stack stays in step with the statements actually running on it.
+    if context.connection is not None and context.execution_context is not None:
+        started = context.connection.info.get("query_start_time")
+        if started:
+            started.pop()
+
+
+def install_sql_instrumentation() -> None:
+    # Listening on the Engine class covers engines created later, so nothing is connected here.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
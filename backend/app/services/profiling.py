@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from app.config import get_settings
+
+
+APP_ROOT = str(Path(__file__).resolve().parents[1])
+PROFILE_SUFFIXES = (".pstats", ".folded")
+_SAFE_LABEL = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_dir() -> Path:
+    path = Path(get_settings().profile_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def new_profile_path(label: str, suffix: str) -> Path:
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    safe_label = _SAFE_LABEL.sub("-", label).strip("-") or "profile"
+    return profile_dir() / f"{stamp}-{safe_label}{suffix}"
+
+
+def list_profiles() -> list[dict]:
+    directory = Path(get_settings().profile_dir)
+    if not directory.is_dir():
+        return []
+    entries = []
+    for path in directory.iterdir():
+        if path.suffix not in PROFILE_SUFFIXES or not path.is_file():
+            continue
+        stat = path.stat()
+        entries.append({
+            "name": path.name,
+            "format": "pstats" if path.suffix == ".pstats" else "folded",
+            "size": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+        })
+    return sorted(entries, key=lambda entry: entry["name"], reverse=True)
+
+
+def resolve_profile(name: str) -> Path | None:
+    if os.path.basename(name) != name or not name.endswith(PROFILE_SUFFIXES):
+        return None
+    path = Path(get_settings().profile_dir) / name
+    return path if path.is_file() else None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = "app" + filename[len(APP_ROOT):]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+_active_sampler: ContextVar["StackSampler | None"] = ContextVar("active_sampler", default=None)
+
+
+def _running_context(frame) -> Context | None:
+    """Return the contextvars context a thread is executing its current task under.
+
+    Worker threads run offloaded calls inside ``context.run`` (anyio's worker keeps the copied context in a
+    local named ``context``), and asyncio runs each task step from a handle holding ``_context``; the
+    outermost such frame names the context of the work on that thread.
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    for frame in reversed(frames):
+        local_vars = frame.f_locals
+        context = local_vars.get("context")
+        if isinstance(context, Context):
+            return context
+        context = getattr(local_vars.get("self"), "_context", None)
+        if isinstance(context, Context):
+            return context
+    return None
+
+
+class StackSampler:
+    """Periodically samples the stacks of the threads handling one request.
+
+    ``activate`` marks the current context; handlers run on the event loop or in the threadpool with a copy
+    of it, so only threads whose running context carries the mark are sampled.
+    """
+
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or get_settings().profile_sample_interval_ms / 1000
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def activate(self) -> None:
+        _active_sampler.set(self)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                context = _running_context(frame)
+                if context is None or context.get(_active_sampler) is not self:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    in_app = in_app or frame.f_code.co_filename.startswith(APP_ROOT)
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if in_app:
+                    self.samples[";".join(reversed(stack))] += 1
+
+
+def write_folded(samples: Counter[str], path: Path) -> Path:
+    with path.open("w", encoding="utf-8") as handle:
+        for stack, count in samples.most_common():
+            handle.write(f"{stack} {count}\n")
+    return path
+
+
+@contextmanager
+def cprofile_to_file(label: str) -> Iterator[Path]:
+    path = new_profile_path(label, ".pstats")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(path))
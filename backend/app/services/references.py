@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.orm import Session, aliased, load_only
+
+from app.models import CoinReference, MuseumCoin, OnlineCoin
+
+
+_TOKEN = re.compile(r"[a-z]+(?:[-'.][a-z]+)*|\d+[a-z]?")
+_NUMBER = re.compile(r"^\d+[a-z]?$")
+_ROMAN = re.compile(r"^[ivxlc]+$")
+_UNCERTAIN_PREFIX = re.compile(r"^\s*(cf|see|like|as)\b\.?\s*")
+
+
+class ReferenceKey(NamedTuple):
+    corpus: str
+    volume: str
+    number: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.corpus}|{self.volume}|{self.number}"
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def parse_reference(text: str) -> ReferenceKey | None:
+    tokens = _TOKEN.findall(_UNCERTAIN_PREFIX.sub("", _fold(text)))
+    corpus_tokens: list[str] = []
+    index = 0
+    while index < len(tokens) and not _NUMBER.match(tokens[index]):
+        corpus_tokens.append(tokens[index])
+        index += 1
+    numbers: list[str] = []
+    while index < len(tokens) and _NUMBER.match(tokens[index]):
+        numbers.append(tokens[index].lstrip("0") or "0")
+        index += 1
+    if not corpus_tokens or not numbers:
+        return None
+
+    volume = ""
+    if len(corpus_tokens) > 1 and _ROMAN.match(corpus_tokens[-1]):
+        volume = corpus_tokens.pop()
+    if len(numbers) > 1:
+        volume = " ".join(filter(None, [volume, *numbers[:-1]]))
+    corpus = re.sub(r"[^a-z0-9]", "", "".join(corpus_tokens))
+    if not corpus:
+        return None
+    return ReferenceKey(corpus=corpus, volume=volume, number=numbers[-1])
+
+
+def parse_references(reference_list: str | None) -> list[ReferenceKey]:
+    keys: list[ReferenceKey] = []
+    for part in re.split(r"[;\n]", reference_list or ""):
+        parsed = parse_reference(part)
+        if parsed and parsed not in keys:
+            keys.append(parsed)
+    return keys
+
+
+def reference_keys(reference_list: str | None) -> list[str]:
+    return [parsed.key for parsed in parse_references(reference_list)]
+
+
+def _reference_rows(coin: MuseumCoin | OnlineCoin) -> list[CoinReference]:
+    owner = {"museum_coin": coin} if isinstance(coin, MuseumCoin) else {"online_coin": coin}
+    return [
+        CoinReference(ref_key=parsed.key, corpus=parsed.corpus, volume=parsed.volume, number=parsed.number, **owner)
+        for parsed in parse_references(coin.reference_list)
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_reference_index(session: Session, flush_context, instances) -> None:
+    stale_museum: list[str] = []
+    stale_online: list[str] = []
+    for coin in list(session.new) + list(session.dirty):
+        if not isinstance(coin, (MuseumCoin, OnlineCoin)):
+            continue
+        state = inspect(coin)
+        if not state.pending and not state.attrs.reference_list.history.has_changes():
+            continue
+        if not state.pending:
+            if isinstance(coin, MuseumCoin):
+                stale_museum.append(coin.coin_id)
+            else:
+                stale_online.append(coin.id)
+        session.add_all(_reference_rows(coin))
+    if stale_museum:
+        session.execute(delete(CoinReference).where(CoinReference.museum_coin_id.in_(stale_museum)))
+    if stale_online:
+        session.execute(delete(CoinReference).where(CoinReference.online_coin_id.in_(stale_online)))
+
+
+def rebuild_reference_index(session: Session) -> int:
+    session.execute(delete(CoinReference))
+    created = 0
+    for model in (MuseumCoin, OnlineCoin):
+        query = session.query(model).options(load_only(model.reference_list)).filter(model.reference_list.isnot(None))
+        for coin in query.yield_per(1000):
+            rows = _reference_rows(coin)
+            session.add_all(rows)
+            created += len(rows)
+    session.flush()
+    return created
+
+
+def shared_reference_candidates(session: Session, museum_coin_id: str) -> dict[str, int]:
+    museum_ref = aliased(CoinReference)
+    online_ref = aliased(CoinReference)
+    rows = (
+        session.query(online_ref.online_coin_id, func.count(online_ref.id))
+        .join(museum_ref, museum_ref.ref_key == online_ref.ref_key)
+        .filter(museum_ref.museum_coin_id == museum_coin_id, online_ref.online_coin_id.isnot(None))
+        .group_by(online_ref.online_coin_id)
+    )
+    return {online_id: shared for online_id, shared in rows}
+
+
+def online_ids_for_keys(keys: Iterable[str]):
+    return (
+        select(CoinReference.online_coin_id)
+        .where(CoinReference.ref_key.in_(list(keys)), CoinReference.online_coin_id.isnot(None))
+        .scalar_subquery()
+    )
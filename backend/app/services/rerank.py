@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from operator import attrgetter
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import ImageAsset, MuseumCoin, OnlineCoin
+from app.services.descriptors import count_inliers
+from app.services.images import STORED, load_descriptors
+from app.services.metrics import IMAGE_RERANK_SECONDS, IMAGE_RERANK_SKIPPED
+
+
+FACES = {"obverse": "obverse_image_key", "reverse": "reverse_image_key"}
+
+FaceDescriptors = dict[str, np.ndarray]
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def descriptor_pool() -> ProcessPoolExecutor:
+    """Worker processes shared by query-image extraction and candidate verification."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=get_settings().image_rerank_workers)
+        return _executor
+
+
+def face_descriptors(
+    session: Session,
+    coins: Iterable[MuseumCoin | OnlineCoin],
+    key: Callable[[MuseumCoin | OnlineCoin], str] = attrgetter("id")
+) -> dict[str, FaceDescriptors]:
+    """Stored descriptors of each coin's obverse and reverse images, keyed by coin id then face."""
+    coins = list(coins)
+    urls = {getattr(coin, field) for coin in coins for field in FACES.values()} - {None}
+    if not urls:
+        return {}
+    hashes = dict(
+        session.query(ImageAsset.source_url, ImageAsset.sha256)
+        .filter(ImageAsset.source_url.in_(urls), ImageAsset.status == STORED)
+    )
+    faces: dict[str, FaceDescriptors] = {}
+    for coin in coins:
+        for face, field in FACES.items():
+            sha256 = hashes.get(getattr(coin, field))
+            descriptors = load_descriptors(sha256) if sha256 else None
+            if descriptors is not None and len(descriptors):
+                faces.setdefault(key(coin), {})[face] = descriptors
+    return faces
+
+
+def inlier_score(inliers: int) -> float:
+    minimum = get_settings().image_min_inliers
+    if inliers < minimum:
+        return 0.0
+    return min(1.0, inliers / (3 * minimum))
+
+
+def image_scores(query: FaceDescriptors, candidates: dict[str, FaceDescriptors], budget_ms: float | None = None) -> dict[str, float]:
+    """Geometric verification score in [0, 1] per candidate id, averaged over the faces both sides have.
+
+    Comparisons run in the worker pool; whatever has not finished when the latency budget runs out is
+    dropped, so those candidates simply keep their first-stage rank.
+    """
+    start = time.perf_counter()
+    budget = get_settings().image_rerank_budget_ms if budget_ms is None else budget_ms
+    pool = descriptor_pool()
+    futures = {
+        pool.submit(count_inliers, query[face], faces[face]): candidate_id
+        for candidate_id, faces in candidates.items()
+        for face in FACES
+        if face in query and face in faces
+    }
+    if not futures:
+        return {}
+    done, pending = wait(futures, timeout=budget / 1000)
+    for future in pending:
+        future.cancel()
+    IMAGE_RERANK_SKIPPED.inc(len(pending))
+    per_face: dict[str, list[float]] = {}
+    for future in done:
+        per_face.setdefault(futures[future], []).append(inlier_score(future.result()))
+    IMAGE_RERANK_SECONDS.observe(time.perf_counter() - start)
+    return {candidate_id: sum(scores) / len(scores) for candidate_id, scores in per_face.items()}
+
+
+def rerank_candidates(
+    session: Session,
+    query: FaceDescriptors,
+    candidates: Sequence[OnlineCoin]
+) -> tuple[list[OnlineCoin], dict[str, float]]:
+    """Reorder the leading search results by verified keypoint matches against the query images."""
+    limit = get_settings().image_rerank_candidates
+    head, tail = list(candidates[:limit]), list(candidates[limit:])
+    scores = image_scores(query, face_descriptors(session, head))
+    head.sort(key=lambda candidate: scores.get(candidate.id, 0.0), reverse=True)
+    return head + tail, scores
+
+
+def boost_ranked_matches(
+    session: Session,
+    museum_coin: MuseumCoin,
+    ranked: list[tuple[float, OnlineCoin]]
+) -> list[tuple[float, OnlineCoin]]:
+    """Raise matcher scores of candidates whose images verify against the museum coin's, best first.
+
+    A verified candidate closes ``image_rerank_weight`` of its gap to 1.0; unverified ones keep their score.
+    """
+    settings = get_settings()
+    if not ranked or settings.image_rerank_weight <= 0:
+        return ranked
+    query = face_descriptors(session, [museum_coin], key=attrgetter("coin_id")).get(museum_coin.coin_id)
+    if not query:
+        return ranked
+    head = ranked[:settings.image_rerank_candidates]
+    scores = image_scores(query, face_descriptors(session, [candidate for _, candidate in head]))
+    boosted = [
+        (score + settings.image_rerank_weight * scores.get(candidate.id, 0.0) * (1.0 - score), candidate)
+        for score, candidate in head
+    ]
+    return sorted(boosted, key=lambda item: item[0], reverse=True) + ranked[len(head):]
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass, field, replace
+from operator import attrgetter
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.inscriptions import legend_trigrams
+from app.services.references import reference_keys
+
+
+CATEGORICAL_FIELDS = ("mint", "authority", "denomination", "metal")
+FIELD_FEATURES = (*CATEGORICAL_FIELDS, "weight", "diameter", "die_axis")
+TEXT_FEATURES = ("inscription", "description", "references")
+FEATURES = (*FIELD_FEATURES, *TEXT_FEATURES)
+
+INSCRIPTION_BITS = 512
+DESCRIPTION_BITS = 1024
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+_WORD = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+_DIE_AXIS = re.compile(r"(\d{1,2})\s*h", re.IGNORECASE)
+_STOPWORDS = {"and", "the", "with", "holding", "left", "right", "above", "below", "field", "from"}
+_MISSING = -1
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    mint: float = 0.0
+    authority: float = 0.0
+    denomination: float = 0.0
+    metal: float = 0.0
+    weight: float = 0.0
+    diameter: float = 0.0
+    die_axis: float = 0.0
+    inscription: float = 0.0
+    description: float = 0.0
+    references: float = 0.0
+    weight_tolerance: float = 0.35
+    diameter_tolerance: float = 1.5
+    floor: float = 0.0
+    ceiling: float = 1.0
+
+
+PRESETS: dict[str, ScoringWeights] = {
+    # Exact case-insensitive equality on four attributes, as the original heuristic scored them.
+    "legacy": ScoringWeights(mint=0.35, authority=0.3, denomination=0.25, metal=0.1, floor=0.15, ceiling=0.99),
+    "balanced": ScoringWeights(
+        mint=0.15,
+        authority=0.12,
+        denomination=0.12,
+        metal=0.06,
+        weight=0.12,
+        diameter=0.08,
+        die_axis=0.05,
+        inscription=0.1,
+        description=0.08,
+        references=0.12,
+        floor=0.0,
+        ceiling=0.99,
+    ),
+}
+
+
+def get_scoring_weights() -> ScoringWeights:
+    settings = get_settings()
+    preset = PRESETS.get(settings.match_scoring_preset)
+    if preset is None:
+        raise ValueError(f"Unknown scoring preset '{settings.match_scoring_preset}'")
+    overrides = {key: float(value) for key, value in settings.match_feature_weights.items()}
+    unknown = set(overrides) - set(ScoringWeights.__dataclass_fields__)
+    if unknown:
+        raise ValueError(f"Unknown scoring weights: {', '.join(sorted(unknown))}")
+    return replace(preset, **overrides)
+
+
+def _fold(text: str | None) -> str:
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+def _hash_bits(tokens, bits: int) -> np.ndarray:
+    vector = np.zeros(bits // 8, dtype=np.uint8)
+    for token in tokens:
+        position = zlib.crc32(token.encode("utf-8")) % bits
+        vector[position >> 3] |= 1 << (position & 7)
+    return vector
+
+
+def description_tokens(*texts: str | None) -> set[str]:
+    words = set()
+    for text in texts:
+        words.update(word for word in _WORD.findall(_fold(text)) if word not in _STOPWORDS)
+    return words
+
+
+def reference_tokens(reference_list: str | None) -> set[str]:
+    return set(reference_keys(reference_list))
+
+
+def parse_die_axis(value: str | None) -> float:
+    match = _DIE_AXIS.search(value or "")
+    if not match:
+        return np.nan
+    return float(int(match.group(1)) % 12)
+
+
+@dataclass
+class Vocabulary:
+    ids: dict[str, int] = field(default_factory=dict)
+
+    def encode(self, value: str | None) -> int:
+        key = _fold(value)
+        if not key:
+            return _MISSING
+        return self.ids.setdefault(key, len(self.ids))
+
+    def lookup(self, value: str | None) -> int:
+        """Code of an already known value; unknown values get the missing code, which matches no candidate."""
+        key = _fold(value)
+        if not key:
+            return _MISSING
+        return self.ids.get(key, _MISSING)
+
+
+@dataclass
+class EncodedCoin:
+    categories: np.ndarray
+    measurements: np.ndarray
+    inscription: np.ndarray | None = None
+    description: np.ndarray | None = None
+    # Sorted vocabulary ids of the parsed catalogue reference keys; compared exactly, not hashed.
+    references: np.ndarray | None = None
+
+
+@dataclass
+class CandidateBlock:
+    ids: list[str]
+    categories: np.ndarray
+    measurements: np.ndarray
+    inscription: np.ndarray
+    description: np.ndarray
+    # Reference ids of all rows concatenated, with the block row each id belongs to.
+    references: np.ndarray
+    reference_rows: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _empty_text(count: int, bits: int) -> np.ndarray:
+    return np.zeros((count, bits // 8), dtype=np.uint8)
+
+
+def _no_references() -> np.ndarray:
+    return np.empty(0, dtype=np.int32)
+
+
+class FeatureEncoder:
+    """Encodes coins into fixed-width feature rows; candidate rows are cached by id.
+
+    Text features are the expensive part of encoding, so they are only computed for candidates
+    that are requested ``with_text`` (those that survived bound pruning in the matcher).
+    """
+
+    def __init__(self):
+        self.vocabularies = {name: Vocabulary() for name in CATEGORICAL_FIELDS}
+        self.reference_keys = Vocabulary()
+        self._rows: dict[str, EncodedCoin] = {}
+
+    def _encode_fields(self, coin, extend_vocabulary: bool = True) -> EncodedCoin:
+        return EncodedCoin(
+            categories=np.array(
+                [
+                    self.vocabularies[name].encode(getattr(coin, name)) if extend_vocabulary
+                    else self.vocabularies[name].lookup(getattr(coin, name))
+                    for name in CATEGORICAL_FIELDS
+                ],
+                dtype=np.int32
+            ),
+            measurements=np.array(
+                [
+                    coin.weight if coin.weight is not None else np.nan,
+                    coin.diameter if coin.diameter is not None else np.nan,
+                    parse_die_axis(coin.die_axis),
+                ],
+                dtype=np.float64
+            ),
+        )
+
+    def _encode_text(self, coin, row: EncodedCoin, extend_vocabulary: bool = True) -> EncodedCoin:
+        row.inscription = _hash_bits(legend_trigrams(coin.obverse_inscription, coin.reverse_inscription), INSCRIPTION_BITS)
+        row.description = _hash_bits(
+            description_tokens(coin.obverse_description, coin.reverse_description), DESCRIPTION_BITS
+        )
+        encode = self.reference_keys.encode if extend_vocabulary else self.reference_keys.lookup
+        codes = {encode(key) for key in reference_tokens(coin.reference_list)}
+        codes.discard(_MISSING)
+        row.references = np.array(sorted(codes), dtype=np.int32)
+        return row
+
+    def encode_query(self, coin, extend_vocabulary: bool = True) -> EncodedCoin:
+        """Feature row for the coin being matched.
+
+        By default its values join the vocabulary, so they match candidates encoded later on. Against a block
+        whose candidates are all encoded already, pass ``extend_vocabulary=False``: values no candidate has
+        cannot match anyway, and the encoder stays read-only.
+        """
+        return self._encode_text(coin, self._encode_fields(coin, extend_vocabulary), extend_vocabulary)
+
+    def encode_candidates(
+        self,
+        candidates: Iterable,
+        with_text: bool = True,
+        key: Callable[[object], str] = attrgetter("id")
+    ) -> CandidateBlock:
+        # Ids are collected in the same pass as the rows, so a one-shot iterator of candidates works too.
+        ids = []
+        rows = []
+        for candidate in candidates:
+            candidate_id = key(candidate)
+            row = self._rows.get(candidate_id)
+            if row is None:
+                row = self._rows[candidate_id] = self._encode_fields(candidate)
+            if with_text and row.inscription is None:
+                self._encode_text(candidate, row)
+            ids.append(candidate_id)
+            rows.append(row)
+        if not rows:
+            return CandidateBlock(
+                ids=[],
+                categories=np.empty((0, len(CATEGORICAL_FIELDS)), dtype=np.int32),
+                measurements=np.empty((0, 3)),
+                inscription=_empty_text(0, INSCRIPTION_BITS),
+                description=_empty_text(0, DESCRIPTION_BITS),
+                references=_no_references(),
+                reference_rows=_no_references(),
+            )
+        if with_text:
+            text = {name: np.stack([getattr(row, name) for row in rows]) for name in ("inscription", "description")}
+            text["references"] = np.concatenate([row.references for row in rows])
+            text["reference_rows"] = np.repeat(
+                np.arange(len(rows), dtype=np.int32), [len(row.references) for row in rows]
+            )
+        else:
+            text = {
+                "inscription": _empty_text(len(rows), INSCRIPTION_BITS),
+                "description": _empty_text(len(rows), DESCRIPTION_BITS),
+                "references": _no_references(),
+                "reference_rows": _no_references(),
+            }
+        return CandidateBlock(
+            ids=ids,
+            categories=np.stack([row.categories for row in rows]),
+            measurements=np.stack([row.measurements for row in rows]),
+            **text,
+        )
+
+
+def _jaccard(query: np.ndarray, block: np.ndarray) -> np.ndarray:
+    intersection = _POPCOUNT[block & query].sum(axis=1)
+    union = _POPCOUNT[block | query].sum(axis=1)
+    return np.divide(intersection, union, out=np.zeros(len(block)), where=union > 0)
+
+
+def _tolerance(query: float, values: np.ndarray, tolerance: float) -> np.ndarray:
+    if np.isnan(query) or tolerance <= 0:
+        return np.zeros(len(values))
+    similarity = np.exp(-0.5 * ((values - query) / tolerance) ** 2)
+    return np.nan_to_num(similarity, nan=0.0)
+
+
+def feature_similarities(
+    query: EncodedCoin,
+    block: CandidateBlock,
+    weights: ScoringWeights,
+    features: Sequence[str] = FEATURES
+) -> dict[str, np.ndarray]:
+    similarities: dict[str, np.ndarray] = {}
+    for index, name in enumerate(CATEGORICAL_FIELDS):
+        code = query.categories[index]
+        if code < 0:
+            similarities[name] = np.zeros(len(block))
+        else:
+            similarities[name] = (block.categories[:, index] == code).astype(np.float64)
+    similarities["weight"] = _tolerance(query.measurements[0], block.measurements[:, 0], weights.weight_tolerance)
+    similarities["diameter"] = _tolerance(query.measurements[1], block.measurements[:, 1], weights.diameter_tolerance)
+    axis_distance = np.abs(block.measurements[:, 2] - query.measurements[2])
+    axis_distance = np.minimum(axis_distance, 12 - axis_distance)
+    similarities["die_axis"] = np.nan_to_num(1 - axis_distance / 6, nan=0.0)
+    if "inscription" in features:
+        similarities["inscription"] = _jaccard(query.inscription, block.inscription)
+    if "description" in features:
+        similarities["description"] = _jaccard(query.description, block.description)
+    if "references" in features:
+        # 1.0 when the candidate shares at least one exact catalogue reference key with the query.
+        shared = np.zeros(len(block))
+        shared[block.reference_rows[np.isin(block.references, query.references)]] = 1.0
+        similarities["references"] = shared
+    return similarities
+
+
+def _weighted_sum(similarities: dict[str, np.ndarray], weights: ScoringWeights, features: Sequence[str], size: int) -> np.ndarray:
+    scores = np.zeros(size)
+    for name in features:
+        weight = getattr(weights, name)
+        if weight:
+            scores += weight * similarities[name]
+    return scores
+
+
+def score_upper_bounds(query: EncodedCoin, block: CandidateBlock, weights: ScoringWeights) -> np.ndarray:
+    """MaxScore-style bound: exact field-feature score plus the best any text feature could add."""
+    if not len(block):
+        return np.zeros(0)
+    similarities = feature_similarities(query, block, weights, FIELD_FEATURES)
+    partial = _weighted_sum(similarities, weights, FIELD_FEATURES, len(block))
+    text_ceiling = sum(getattr(weights, name) for name in TEXT_FEATURES)
+    return np.round(np.clip(partial + text_ceiling, weights.floor, weights.ceiling), 4)
+
+
+def score_block(query: EncodedCoin, block: CandidateBlock, weights: ScoringWeights) -> np.ndarray:
+    if not len(block):
+        return np.zeros(0)
+    similarities = feature_similarities(query, block, weights)
+    scores = _weighted_sum(similarities, weights, FEATURES, len(block))
+    return np.round(np.clip(scores, weights.floor, weights.ceiling), 4)
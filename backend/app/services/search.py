@@ -4,16 +4,30 @@ from typing import Optional, Sequence
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.models import OnlineCoin, MuseumCoin, SearchJob
+from app.config import get_settings
+from app.models import MatchRecord, OnlineCoin, SearchJob, SearchJobResult
+from app.services.dates import overlap_condition
+from app.services.inscriptions import search_online_legends
+from app.services.measurements import tolerance_condition
+from app.services.references import online_ids_for_keys, reference_keys
 
 
+# Search endpoints answer with the first page; the rest of the ranked set is paged from the stored job.
+SEARCH_PAGE_SIZE = 20
+
 def run_search(
     db: Session,
     job_type: str,
     museum_coin_id: Optional[str],
     query_text: Optional[str],
     min_score: float = 0.0,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None,
+    weight: Optional[float] = None,
+    diameter: Optional[float] = None,
+    weight_tolerance: Optional[float] = None,
+    diameter_tolerance: Optional[float] = None
 ) -> tuple[SearchJob, Sequence[OnlineCoin]]:
     job = SearchJob(
         job_type=job_type,
@@ -22,38 +36,96 @@ def run_search(
         status="completed",
         created_by=user_id,
         created_at=datetime.utcnow(),
-        completed_at=datetime.utcnow(),
-        result_summary="placeholder-results"
+        completed_at=datetime.utcnow()
     )
     db.add(job)
     db.flush()
 
-    query = db.query(OnlineCoin)
+    base = db.query(OnlineCoin).filter(OnlineCoin.similarity_score >= min_score)
     if museum_coin_id:
-        query = query.filter(OnlineCoin.museum_coin_id == museum_coin_id)
+        base = base.filter(OnlineCoin.museum_coin_id == museum_coin_id)
+    overlap = overlap_condition(OnlineCoin, date_from, date_to)
+    if overlap is not None:
+        base = base.filter(overlap)
+    measured = tolerance_condition(OnlineCoin, weight, diameter, weight_tolerance, diameter_tolerance)
+    if measured is not None:
+        base = base.filter(measured)
+    query = base
+    limit = get_settings().search_result_limit
+    legend_scores: dict[str, float] = {}
     if query_text:
         like = f"%{query_text}%"
-        query = query.filter(
-            func.lower(OnlineCoin.metadata_json).like(func.lower(like))
-            | OnlineCoin.listing_reference.ilike(like)
-        )
-    results = (
-        query.filter(OnlineCoin.similarity_score >= min_score)
-        .order_by(OnlineCoin.similarity_score.desc())
-        .limit(20)
-        .all()
-    )
+        condition = func.lower(OnlineCoin.metadata_json).like(func.lower(like)) | OnlineCoin.listing_reference.ilike(like)
+        keys = reference_keys(query_text)
+        if keys:
+            condition = condition | OnlineCoin.id.in_(online_ids_for_keys(keys))
+        query = query.filter(condition)
+        legend_scores = search_online_legends(db, query_text)
+    results = query.order_by(OnlineCoin.similarity_score.desc()).limit(limit).all()
+    if legend_scores:
+        # Legend hits (including Greek/Latin transliterations of the query) rank ahead of plain text matches.
+        seen = {candidate.id for candidate in results}
+        missing = [online_id for online_id in legend_scores if online_id not in seen]
+        if missing:
+            results.extend(base.filter(OnlineCoin.id.in_(missing)).all())
+        results = sorted(
+            results,
+            key=lambda candidate: (legend_scores.get(candidate.id, 0.0), candidate.similarity_score or 0.0),
+            reverse=True
+        )[:limit]
 
     return job, results
 
 
-def ensure_candidate_links(db: Session, candidates: Sequence[OnlineCoin]) -> None:
-    for candidate in candidates:
-        if candidate.museum_coin_id:
-            continue
-        coin = db.query(MuseumCoin).first()
-        if coin:
-            candidate.museum_coin_id = coin.coin_id
-            db.add(candidate)
+def record_search_results(
+    db: Session,
+    job: SearchJob,
+    results: Sequence[OnlineCoin],
+    image_scores: dict[str, float] | None = None
+) -> None:
+    """Store a job's ranked results so they can be paged later without re-running the search."""
+    image_scores = image_scores or {}
+    db.add_all(
+        SearchJobResult(
+            job_id=job.id,
+            rank=rank,
+            candidate_id=candidate.id,
+            score=candidate.similarity_score,
+            image_score=image_scores.get(candidate.id),
+        )
+        for rank, candidate in enumerate(results, start=1)
+    )
+    job.result_summary = f"{len(results)} result(s)"
     db.flush()
 
+
+def job_results(db: Session, job_id: str, limit: int, offset: int) -> tuple[int, list[tuple[SearchJobResult, OnlineCoin]]]:
+    base = (
+        db.query(SearchJobResult, OnlineCoin)
+        .join(OnlineCoin, OnlineCoin.id == SearchJobResult.candidate_id)
+        .filter(SearchJobResult.job_id == job_id)
+    )
+    total = base.count()
+    return total, base.order_by(SearchJobResult.rank).offset(offset).limit(limit).all()
+
+
+def ensure_candidate_links(db: Session, job: SearchJob, candidates: Sequence[OnlineCoin]) -> None:
+    """Link unlinked listings to the job's museum coin, or else to the museum coin of their best existing match."""
+    unlinked = [candidate for candidate in candidates if not candidate.museum_coin_id]
+    if not unlinked:
+        return
+    if job.museum_coin_id:
+        links = {candidate.id: job.museum_coin_id for candidate in unlinked}
+    else:
+        links: dict[str, str] = {}
+        rows = (
+            db.query(MatchRecord.candidate_id, MatchRecord.museum_coin_id)
+            .filter(MatchRecord.candidate_id.in_([candidate.id for candidate in unlinked]), MatchRecord.status != "Rejected")
+            .order_by((MatchRecord.status == "Accepted").desc(), MatchRecord.similarity_score.desc())
+        )
+        for candidate_id, museum_coin_id in rows:
+            links.setdefault(candidate_id, museum_coin_id)
+    for candidate in unlinked:
+        if candidate.id in links:
+            candidate.museum_coin_id = links[candidate.id]
+    db.flush()
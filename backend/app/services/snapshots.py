@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+SNAPSHOT_MAGIC = b"CMSNAP\x00\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+SUFFIX = ".snap"
+
+_HEADER_LENGTH = struct.Struct("<Q")
+_NAME = re.compile(r"^[a-z0-9_-]+$")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class Snapshot:
+    """One published snapshot file mapped read-only; its arrays are zero-copy views into the shared page cache."""
+
+    def __init__(self, path: Path, version: int, meta: dict, arrays: dict[str, np.ndarray]):
+        self.path = path
+        self.version = version
+        self.meta = meta
+        self.arrays = arrays
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def _version_of(path: Path, name: str) -> int | None:
+    stem, _, version = path.name[:-len(SUFFIX)].rpartition(".")
+    if stem != name or not version.isdigit():
+        return None
+    return int(version)
+
+
+def snapshot_versions(directory: Path, name: str) -> list[tuple[int, Path]]:
+    """Published versions of ``name``, oldest first."""
+    if not directory.is_dir():
+        return []
+    versions = []
+    for path in directory.glob(f"{name}.*{SUFFIX}"):
+        version = _version_of(path, name)
+        if version is not None:
+            versions.append((version, path))
+    return sorted(versions)
+
+
+def latest_version(directory: Path, name: str) -> tuple[int, Path] | None:
+    versions = snapshot_versions(directory, name)
+    return versions[-1] if versions else None
+
+
+def write_snapshot(directory: Path, name: str, arrays: dict[str, np.ndarray], meta: dict, keep: int = 3) -> int:
+    """Publish ``arrays`` as the next version of ``name`` and return that version.
+
+    The file is written under a temporary name and hard-linked into place, so readers never see a partial
+    file and two writers racing for the same version number cannot overwrite each other.
+    Layout: magic, header length, JSON header (dtype/shape/offset per array), then 64-byte aligned array data.
+    """
+    if not _NAME.match(name):
+        raise SnapshotError(f"Invalid snapshot name: {name!r}")
+    directory.mkdir(parents=True, exist_ok=True)
+    layout, offset = {}, 0
+    blobs = []
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        offset += _padding(offset)
+        layout[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        blobs.append((offset, array))
+        offset += array.nbytes
+    header = json.dumps({"format": FORMAT_VERSION, "meta": meta, "arrays": layout}).encode("utf-8")
+    start = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size + len(header)
+    start += _padding(start)
+
+    handle, temp_name = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(SNAPSHOT_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+            temp_file.write(b"\0" * (start - temp_file.tell()))
+            for position, array in blobs:
+                temp_file.write(b"\0" * (start + position - temp_file.tell()))
+                temp_file.write(memoryview(array).cast("B"))
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        latest = latest_version(directory, name)
+        version = latest[0] + 1 if latest else 1
+        while True:
+            try:
+                os.link(temp_name, directory / f"{name}.{version:010d}{SUFFIX}")
+                break
+            except FileExistsError:
+                version += 1
+    finally:
+        Path(temp_name).unlink(missing_ok=True)
+    prune_snapshots(directory, name, keep)
+    return version
+
+
+def open_snapshot(path: Path, version: int) -> Snapshot:
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    prefix = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+    if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot file")
+    (length,) = _HEADER_LENGTH.unpack(mapped[len(SNAPSHOT_MAGIC):prefix])
+    header = json.loads(mapped[prefix:prefix + length])
+    if header.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"{path} has unsupported format {header.get('format')}")
+    start = prefix + length
+    start += _padding(start)
+    arrays = {}
+    for key, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        # The views keep the mapping alive; it is released once the last array referencing it is dropped.
+        arrays[key] = np.frombuffer(mapped, dtype=dtype, count=count, offset=start + spec["offset"]).reshape(spec["shape"])
+    return Snapshot(path, version, header["meta"], arrays)
+
+
+def prune_snapshots(directory: Path, name: str, keep: int) -> None:
+    """Delete all but the newest ``keep`` versions; workers still mapping an old file keep their pages."""
+    for _, path in snapshot_versions(directory, name)[:-max(keep, 1)]:
+        try:
+            path.unlink()
+        except OSError:
+            # Platforms that refuse to delete mapped files retry on the next publish.
+            pass
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Mapping
+
+from sqlalchemy import delete, event, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import MatchRecord, MuseumCoin, OnlineCoin, StatCounter
+from app.services.warmup import register_warmer
+
+
+MUSEUM_COINS = "museum_coins"
+ONLINE_COINS = "online_coins"
+MATCH_STATUS_PREFIX = "matches."
+VERIFIED_DAY_PREFIX = "verified."
+ACCEPTED_TYPE_PREFIX = "accepted_type."
+MATCH_STATUSES = ("Pending", "Accepted", "Rejected")
+# Written only by rebuild_stats; incremental bumps on a never-built table are discarded on first read.
+BUILT_MARKER = "_built_at"
+
+_PENDING_KEY = "pending_stat_deltas"
+
+
+def status_counter(status: str) -> str:
+    return f"{MATCH_STATUS_PREFIX}{status}"
+
+
+def verified_day_counter(day: date) -> str:
+    return f"{VERIFIED_DAY_PREFIX}{day.isoformat()}"
+
+
+def accepted_type_counter(coin_type: str | None) -> str:
+    return f"{ACCEPTED_TYPE_PREFIX}{coin_type or 'Unknown'}"
+
+
+def stage_counter(session: Session, name: str, delta: int = 1) -> None:
+    if not delta:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, Counter())
+    pending[name] += delta
+
+
+def stage_match_transition(
+    session: Session,
+    coin_type: str | None,
+    old_status: str | None,
+    old_saved_at: datetime | None,
+    new_status: str | None,
+    new_saved_at: datetime | None
+) -> None:
+    if old_status == new_status:
+        return
+    if old_status:
+        stage_counter(session, status_counter(old_status), -1)
+        if old_status == "Accepted":
+            stage_counter(session, accepted_type_counter(coin_type), -1)
+            if old_saved_at:
+                stage_counter(session, verified_day_counter(old_saved_at.date()), -1)
+    if new_status:
+        stage_counter(session, status_counter(new_status), 1)
+        if new_status == "Accepted":
+            stage_counter(session, accepted_type_counter(coin_type), 1)
+            if new_saved_at:
+                stage_counter(session, verified_day_counter(new_saved_at.date()), 1)
+
+
+def bump_counters(session: Session, deltas: Mapping[str, int]) -> None:
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        result = session.execute(
+            update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta)
+        )
+        if result.rowcount:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(insert(StatCounter).values(name=name, value=delta))
+        except IntegrityError:
+            # Another writer created the counter first.
+            session.execute(
+                update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta)
+            )
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_pending_counters(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bump_counters(session, pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_counters(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def rebuild_stats(session: Session) -> None:
+    counts: Counter[str] = Counter()
+    counts[MUSEUM_COINS] = session.query(func.count(MuseumCoin.coin_id)).scalar() or 0
+    counts[ONLINE_COINS] = session.query(func.count(OnlineCoin.id)).scalar() or 0
+    for status, total in session.query(MatchRecord.status, func.count(MatchRecord.id)).group_by(MatchRecord.status):
+        counts[status_counter(status)] += total
+    accepted = (
+        session.query(MuseumCoin.denomination, MatchRecord.saved_at)
+        .join(MuseumCoin, MuseumCoin.coin_id == MatchRecord.museum_coin_id)
+        .filter(MatchRecord.status == "Accepted")
+    )
+    for denomination, saved_at in accepted.yield_per(1000):
+        counts[accepted_type_counter(denomination)] += 1
+        if saved_at:
+            counts[verified_day_counter(saved_at.date())] += 1
+
+    session.info.pop(_PENDING_KEY, None)
+    session.execute(delete(StatCounter))
+    rows = [{"name": name, "value": value} for name, value in counts.items() if value]
+    rows.append({"name": BUILT_MARKER, "value": int(datetime.utcnow().timestamp())})
+    session.execute(insert(StatCounter), rows)
+    session.flush()
+
+
+def get_dashboard_stats(session: Session) -> dict:
+    settings = get_settings()
+    today = datetime.utcnow().date()
+    recent_days = [verified_day_counter(today - timedelta(days=offset)) for offset in range(settings.stats_recent_days)]
+    names = [BUILT_MARKER, MUSEUM_COINS, ONLINE_COINS, *(status_counter(status) for status in MATCH_STATUSES), *recent_days]
+
+    values = dict(session.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(names)))
+    if BUILT_MARKER not in values:
+        rebuild_stats(session)
+        values = dict(session.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(names)))
+
+    top_types = (
+        session.query(StatCounter.name, StatCounter.value)
+        .filter(StatCounter.name.startswith(ACCEPTED_TYPE_PREFIX, autoescape=True), StatCounter.value > 0)
+        .order_by(StatCounter.value.desc())
+        .limit(settings.stats_top_n)
+        .all()
+    )
+    return {
+        "missingCoins": values.get(MUSEUM_COINS, 0),
+        "onlineListings": values.get(ONLINE_COINS, 0),
+        "pendingMatches": values.get(status_counter("Pending"), 0),
+        "acceptedMatches": values.get(status_counter("Accepted"), 0),
+        "rejectedMatches": values.get(status_counter("Rejected"), 0),
+        "recentVerifications": sum(values.get(name, 0) for name in recent_days),
+        "recentDays": settings.stats_recent_days,
+        "rebuiltAt": datetime.utcfromtimestamp(values[BUILT_MARKER]).isoformat(),
+        "topMatchedTypes": [
+            {"type": name[len(ACCEPTED_TYPE_PREFIX):], "count": value} for name, value in top_types
+        ],
+    }
+
+
+register_warmer("stats", get_dashboard_stats)
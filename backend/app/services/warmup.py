@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.session import session_scope
+
+
+_WARMERS: list[tuple[str, Callable[[Session], object]]] = []
+
+
+def register_warmer(name: str, warmer: Callable[[Session], object]) -> None:
+    _WARMERS.append((name, warmer))
+
+
+def run_warmers() -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for name, warmer in _WARMERS:
+        start = time.perf_counter()
+        with session_scope() as session:
+            warmer(session)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def _ping_database(session: Session) -> None:
+    session.execute(text("SELECT 1"))
+
+
+register_warmer("database", _ping_database)
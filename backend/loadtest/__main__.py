@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from loadtest import dataset
+from loadtest.runner import (
+    Scenario,
+    compare_to_baseline,
+    format_report,
+    load_dataset,
+    login,
+    run_load,
+    write_baseline
+)
+
+
+DEFAULT_EMAIL = "laure_marest@harvard.edu"
+DEFAULT_PASSWORD = "coinmatch123"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Replay the frontend's API mix under concurrency.")
+    parser.add_argument("--base-url", help="target a running server instead of the in-process app")
+    parser.add_argument("--email", default=DEFAULT_EMAIL)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (default: stop after --iterations)")
+    parser.add_argument("--iterations", type=int, default=500, help="total scenario steps across all workers")
+    parser.add_argument("--museum-coins", type=int, default=500, help="synthetic museum coins to import (0 to skip)")
+    parser.add_argument("--listings", type=int, default=2000, help="synthetic online listings to import (0 to skip)")
+    parser.add_argument("--match", action="store_true", help="run /api/admin/match after importing the dataset")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the request mix")
+    parser.add_argument("--baseline", type=Path, help="compare against this baseline file and exit 1 on regression")
+    parser.add_argument("--save-baseline", type=Path, help="write this run's results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95/p99 slowdown vs baseline (0.25 = 25%%)")
+    return parser.parse_args()
+
+
+def build_client(args: argparse.Namespace) -> httpx.AsyncClient:
+    if args.base_url:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    # Settings are read once per process, so the scratch database must be configured before importing the app.
+    if "COINMATCH_DATABASE_URL" not in os.environ:
+        scratch = Path(tempfile.mkdtemp(prefix="coinmatch-loadtest-")) / "loadtest.db"
+        os.environ["COINMATCH_DATABASE_URL"] = f"sqlite:///{scratch}"
+    from app import seed
+    from app.main import app
+
+    seed.main()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    museum = dataset.museum_coins(args.museum_coins)
+    online = dataset.online_coins(args.listings)
+    async with build_client(args) as client:
+        headers = await login(client, args.email, args.password)
+        if museum or online:
+            await load_dataset(client, headers, dataset.to_ndjson(museum), dataset.to_ndjson(online))
+        if args.match:
+            response = await client.post("/api/admin/match", headers=headers, timeout=None)
+            response.raise_for_status()
+            print(f"Matching updated {response.json()['matches_updated']} record(s)")
+
+        coin_ids = [record["coin_id"] for record in museum] or ["coin-4224"]
+        listing_ids = [record["id"] for record in online] or ["cand-901"]
+        scenario = Scenario(client, headers, coin_ids, listing_ids, random.Random(args.seed))
+        report, elapsed = await run_load(scenario, args.concurrency, args.duration, None if args.duration else args.iterations)
+
+    print(format_report(report, elapsed))
+    if args.save_baseline:
+        write_baseline(report, args.save_baseline, {
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "duration": args.duration,
+            "museum_coins": args.museum_coins,
+            "listings": args.listings,
+        })
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare_to_baseline(report, args.baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import random
+
+
+MINTS = ["Tarentum", "Antioch on the Orontes", "Alexandria", "Athens", "Syracuse", "Corinth", "Rhodes", "Pergamon"]
+AUTHORITIES = [
+    "Pyrrhus of Epirus",
+    "Antiochus IV Epiphanes",
+    "Ptolemy I Soter",
+    "Athenian Demos",
+    "Agathokles",
+    "Eumenes II",
+]
+DENOMINATIONS = [
+    ("Didrachm", "AR (Silver)", 7.6, 21.0),
+    ("Tetradrachm", "AR (Silver)", 17.1, 25.0),
+    ("Stater", "AV (Gold)", 8.5, 18.0),
+    ("Tetrassarion", "AE (Bronze)", 13.4, 27.0),
+    ("Obol", "AR (Silver)", 0.7, 9.0),
+]
+HOUSES = ["CNG", "NAC", "Roma Numismatics", "Leu", "Heritage", "Künker"]
+MOTIFS = ["Youth on horseback", "Helmeted head of Athena", "Taras astride dolphin", "Owl standing right", "Eagle on thunderbolt"]
+
+
+def _coin_fields(rng: random.Random) -> dict:
+    denomination, metal, weight, diameter = rng.choice(DENOMINATIONS)
+    start = rng.randint(150, 480)
+    return {
+        "mint": rng.choice(MINTS),
+        "authority": rng.choice(AUTHORITIES),
+        "date_range": f"circa {start}–{start - rng.randint(5, 40)} BC",
+        "denomination": denomination,
+        "metal": metal,
+        "weight": round(weight + rng.uniform(-0.4, 0.4), 2),
+        "diameter": round(diameter + rng.uniform(-1.0, 1.0), 1),
+        "die_axis": f"{rng.randint(1, 12)}h",
+        "obverse_description": f"{rng.choice(MOTIFS)} right.",
+        "reverse_description": f"{rng.choice(MOTIFS)} left.",
+        "reference_list": f"HGC {rng.randint(1, 10)}, {rng.randint(1, 2000)}",
+    }
+
+
+def museum_coins(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        record = _coin_fields(rng)
+        record.update({
+            "coin_id": f"lt-coin-{index}",
+            "catalog_number": f"HAM Dewing LT{index}",
+            "source_database": "Load test",
+        })
+        records.append(record)
+    return records
+
+
+def online_coins(count: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        record = _coin_fields(rng)
+        house = rng.choice(HOUSES)
+        record.update({
+            "id": f"lt-listing-{index}",
+            "listing_reference": f"{house} {rng.randint(1, 150)}, Lot {rng.randint(1, 900)}",
+            "sale_date": f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "source_name": house,
+            "lot_description_en": f"{record['mint']}. {record['denomination']}, {record['obverse_description']}",
+        })
+        records.append(record)
+    return records
+
+
+def to_ndjson(records: list[dict]) -> bytes:
+    return ("\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n").encode("utf-8")
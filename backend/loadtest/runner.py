@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+
+SEARCH_TERMS = ["Tarentum didrachm", "Athena", "dolphin", "Ptolemy stater", "owl", "Antioch bronze", "HGC 1"]
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        total = len(ordered)
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _percentile(ordered, 50),
+            "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+        }
+
+
+def _percentile(ordered: list[float], percentile: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(percentile / 100 * len(ordered)) - 1))
+    return round(ordered[rank] * 1000, 2)
+
+
+@dataclass
+class Scenario:
+    client: httpx.AsyncClient
+    headers: dict[str, str]
+    coin_ids: list[str]
+    listing_ids: list[str]
+    rng: random.Random
+    stats: dict[str, RouteStats] = field(default_factory=lambda: defaultdict(RouteStats))
+
+    async def _call(self, label: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats[label].latencies.append(time.perf_counter() - start)
+            self.stats[label].errors += 1
+            return None
+        self.stats[label].latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.stats[label].errors += 1
+        return response
+
+    async def dashboard(self) -> None:
+        await self._call("GET /api/stats", "GET", "/api/stats")
+        await self._call("GET /api/match/history", "GET", "/api/match/history", params={"limit": 20})
+
+    async def missing_coins(self) -> None:
+        await self._call("GET /api/museum-coins", "GET", "/api/museum-coins", params={"limit": 100})
+
+    async def coin_detail(self) -> None:
+        coin_id = self.rng.choice(self.coin_ids)
+        await self._call("GET /api/museum-coins/{coin_id}", "GET", f"/api/museum-coins/{coin_id}")
+        await self._call("GET /api/match/history", "GET", "/api/match/history", params={"coin_id": coin_id})
+
+    async def search(self) -> None:
+        payload = {"query": self.rng.choice(SEARCH_TERMS), "museum_coin_id": None, "min_score": 0.0}
+        await self._call("POST /api/search/text", "POST", "/api/search/text", json=payload)
+
+    async def save_match(self) -> None:
+        payload = {
+            "museum_coin_id": self.rng.choice(self.coin_ids),
+            "candidate_id": self.rng.choice(self.listing_ids),
+            "decision": self.rng.choice(["pending", "accept", "reject"]),
+            "notes": "load test",
+        }
+        await self._call("POST /api/match/save", "POST", "/api/match/save", json=payload)
+
+    def mix(self) -> list[tuple[Callable[[], Awaitable[None]], int]]:
+        return [
+            (self.dashboard, 20),
+            (self.missing_coins, 25),
+            (self.coin_detail, 25),
+            (self.search, 20),
+            (self.save_match, 10),
+        ]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict[str, str]:
+    response = await client.post("/api/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["token"]
+    return {"X-Session-Token": token}
+
+
+async def load_dataset(client: httpx.AsyncClient, headers: dict[str, str], museum: bytes, online: bytes) -> None:
+    for dataset, body in (("museum-coins", museum), ("online-coins", online)):
+        response = await client.post(
+            f"/api/import/{dataset}",
+            content=body,
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+            timeout=None
+        )
+        response.raise_for_status()
+        summary = response.json()
+        print(f"Imported {dataset}: {summary['inserted']} inserted, {summary['updated']} updated, {summary['failed']} failed")
+
+
+async def run_load(
+    scenario: Scenario,
+    concurrency: int,
+    duration: float | None,
+    iterations: int | None
+) -> tuple[dict[str, dict], float]:
+    actions, weights = zip(*scenario.mix())
+    remaining = iterations
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        nonlocal remaining
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining is not None:
+            if remaining <= 0:
+                return False
+            remaining -= 1
+        return True
+
+    async def worker() -> None:
+        while take():
+            action = scenario.rng.choices(actions, weights=weights)[0]
+            await action()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {label: stats.summary(elapsed) for label, stats in sorted(scenario.stats.items())}, elapsed
+
+
+def format_report(report: dict[str, dict], elapsed: float) -> str:
+    header = f"{'route':<36} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    for label, row in report.items():
+        lines.append(
+            f"{label:<36} {row['requests']:>7} {row['error_rate'] * 100:>5.1f}% {row['throughput_rps']:>8.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+    lines.append(f"elapsed {elapsed:.1f}s")
+    return "\n".join(lines)
+
+
+def compare_to_baseline(report: dict[str, dict], baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["routes"]
+    regressions = []
+    for label, expected in baseline.items():
+        actual = report.get(label)
+        if actual is None:
+            regressions.append(f"{label}: missing from this run")
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            limit = expected[metric] * (1 + tolerance)
+            if actual[metric] > limit:
+                regressions.append(f"{label}: {metric} {actual[metric]:.1f} > {limit:.1f} (baseline {expected[metric]:.1f})")
+        if actual["error_rate"] > expected["error_rate"] + 0.01:
+            regressions.append(f"{label}: error rate {actual['error_rate']:.2%} > baseline {expected['error_rate']:.2%}")
+    return regressions
+
+
+def write_baseline(report: dict[str, dict], path: Path, settings: dict) -> None:
+    path.write_text(json.dumps({"settings": settings, "routes": report}, indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,45 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter so every sample pays the full import cost.
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    client.get("/health")
+print(json.dumps({"import": imported - start, "lifespan": ready - imported, "total": ready - start}))
+"""
+
+
+def sample() -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.startup", description="Measure worker startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    print(f"{'phase':<10} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for phase in ("import", "lifespan", "total"):
+        values = [entry[phase] * 1000 for entry in samples]
+        print(f"{phase:<10} {statistics.median(values):>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
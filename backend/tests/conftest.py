@@ -0,0 +1,21 @@
+import pytest
+
+from app.config import get_settings
+from app.db.base import Base
+from app.db.session import get_engine
+from app.services import catalog
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setenv("COINMATCH_DATABASE_URL", f"sqlite:///{tmp_path / 'coinmatch.db'}")
+    monkeypatch.setenv("COINMATCH_CATALOG_SNAPSHOTS_ENABLED", "false")
+    get_settings.cache_clear()
+    get_engine.cache_clear()
+    catalog._catalogs.clear()
+    Base.metadata.create_all(bind=get_engine())
+    yield
+    get_engine().dispose()
+    get_settings.cache_clear()
+    get_engine.cache_clear()
+    catalog._catalogs.clear()
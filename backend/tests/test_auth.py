@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import EVENTS_TICKET_PURPOSE, get_stream_user
+from app.db.session import session_scope
+from app.models import User
+from app.services.auth import _ticket_signature, authenticate_user, hash_password, issue_stream_ticket
+
+
+@pytest.fixture
+def user_id(database) -> int:
+    with session_scope() as db:
+        user = User(email="curator@example.org", name="Curator", password_hash=hash_password("secret"))
+        db.add(user)
+        db.flush()
+        return user.id
+
+
+def _signed(payload: str) -> str:
+    return f"{payload}.{_ticket_signature(payload)}"
+
+
+def test_stream_ticket_authenticates_event_stream(user_id):
+    with session_scope() as db:
+        ticket, _ = issue_stream_ticket(db.get(User, user_id), EVENTS_TICKET_PURPOSE)
+
+    assert get_stream_user(x_session_token=None, ticket=ticket).id == user_id
+
+
+@pytest.mark.parametrize("make_ticket", [
+    lambda user_id: _signed(f"{EVENTS_TICKET_PURPOSE}.{user_id}.{int(time.time()) - 1}"),
+    lambda user_id: _signed(f"export.{user_id}.{int(time.time()) + 60}"),
+    lambda user_id: f"{EVENTS_TICKET_PURPOSE}.{user_id}.{int(time.time()) + 60}.{'0' * 64}",
+    lambda user_id: "not-a-ticket",
+], ids=["expired", "wrong-purpose", "bad-signature", "malformed"])
+def test_stream_rejects_invalid_tickets(user_id, make_ticket):
+    with pytest.raises(HTTPException) as error:
+        get_stream_user(x_session_token=None, ticket=make_ticket(user_id))
+    assert error.value.status_code == 401
+
+
+def test_session_token_is_not_a_stream_ticket(user_id):
+    with session_scope() as db:
+        _, token = authenticate_user(db, "curator@example.org", "secret")
+        session_token = token.id
+
+    assert get_stream_user(x_session_token=session_token, ticket=None).id == user_id
+    with pytest.raises(HTTPException):
+        get_stream_user(x_session_token=None, ticket=session_token)
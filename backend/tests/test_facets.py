@@ -0,0 +1,42 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.session import get_engine, session_scope
+from app.models import FacetValue, MuseumCoin
+from app.services.facets import facet_key
+
+
+def _coin(coin_id: str, mint: str) -> MuseumCoin:
+    return MuseumCoin(
+        coin_id=coin_id,
+        mint=mint,
+        authority="Athens",
+        date_range="circa 454–404 BC",
+        denomination="Tetradrachm",
+        metal="AR (Silver)",
+        obverse_description="Head of Athena right.",
+        reverse_description="Owl standing right.",
+    )
+
+
+def test_rolled_back_flush_leaves_no_facet_values(database):
+    session = Session(bind=get_engine())
+    session.add(_coin("coin-1", "Athens"))
+    session.flush()
+    session.rollback()
+    session.close()
+
+    with session_scope() as db:
+        assert db.scalar(select(func.count()).select_from(FacetValue)) == 0
+
+
+def test_existing_facet_values_are_reused(database):
+    with session_scope() as db:
+        db.add(_coin("coin-1", "Athens"))
+    with session_scope() as db:
+        db.add(_coin("coin-2", " ATHENS "))
+
+    with session_scope() as db:
+        mints = db.execute(select(FacetValue).where(FacetValue.attribute == "mint")).scalars().all()
+        assert [(mint.value_key, mint.label, mint.museum_count) for mint in mints] == [(facet_key("Athens"), "Athens", 2)]
+        assert {coin.mint_facet_id for coin in db.scalars(select(MuseumCoin))} == {mints[0].id}
@@ -0,0 +1,93 @@
+from app.db.session import session_scope
+from app.models import MatchRecord, MuseumCoin, OnlineCoin
+from app.services.matcher import generate_matches
+
+
+def _museum_coin() -> MuseumCoin:
+    return MuseumCoin(
+        coin_id="coin-1783",
+        mint="Athens",
+        authority="Athens",
+        date_range="circa 454–404 BC",
+        denomination="Tetradrachm",
+        metal="AR (Silver)",
+        weight=17.2,
+        diameter=24.0,
+        obverse_description="Head of Athena right, wearing crested Attic helmet.",
+        reverse_description="Owl standing right, head facing; olive sprig and crescent behind.",
+    )
+
+
+def _listing(listing_id: str, **fields) -> OnlineCoin:
+    return OnlineCoin(id=listing_id, listing_reference=f"Lot {listing_id}", **fields)
+
+
+def _unrelated_listing(listing_id: str) -> OnlineCoin:
+    # Nothing in common with the museum coin, so the prefilter never offers it as a candidate.
+    return _listing(
+        listing_id,
+        mint="Syracuse",
+        authority="Hieron II",
+        date_range="circa 240–215 BC",
+        denomination="Litra",
+        metal="AE (Bronze)",
+        weight=3.1,
+        diameter=15.0,
+    )
+
+
+def test_match_run_keeps_curator_annotated_pending_matches(database):
+    with session_scope() as session:
+        session.add(_museum_coin())
+        session.add_all([
+            _listing(
+                "cand-100",
+                mint="Athens",
+                authority="Athens",
+                date_range="circa 454–404 BC",
+                denomination="Tetradrachm",
+                metal="AR (Silver)",
+                weight=17.2,
+                diameter=24.0,
+            ),
+            _unrelated_listing("cand-655"),
+            _unrelated_listing("cand-700"),
+            _unrelated_listing("cand-800"),
+        ])
+        session.flush()
+        session.add_all([
+            # A curator's note on a match that is still pending, as in the seed data.
+            MatchRecord(
+                museum_coin_id="coin-1783",
+                candidate_id="cand-655",
+                similarity_score=0.88,
+                status="Pending",
+                notes="Need to confirm monogram detail.",
+            ),
+            # Proposed by an earlier run and then annotated; the note makes it the curator's.
+            MatchRecord(
+                museum_coin_id="coin-1783",
+                candidate_id="cand-700",
+                similarity_score=0.61,
+                status="Pending",
+                notes="Check the die axis.",
+                created_by_matcher=True,
+            ),
+            # Proposed by an earlier run and never touched: the only row a new run may drop.
+            MatchRecord(
+                museum_coin_id="coin-1783",
+                candidate_id="cand-800",
+                similarity_score=0.52,
+                status="Pending",
+                created_by_matcher=True,
+            ),
+        ])
+
+    with session_scope() as session:
+        generate_matches(session)
+
+    with session_scope() as session:
+        matches = {match.candidate_id: match for match in session.query(MatchRecord)}
+    assert set(matches) == {"cand-100", "cand-655", "cand-700"}
+    assert matches["cand-655"].notes == "Need to confirm monogram detail."
+    assert matches["cand-100"].created_by_matcher